@@ -0,0 +1,50 @@
+"""
+Benchmark of the wall time of the command line for simple commands, each in a fresh interpreter, on
+a store of a thousand tasks. The bare interpreter start and importing the TUI are shown for reference:
+a command pays for the interpreter, then for what it imports (pydantic for the commands using tasks).
+
+usage: python benchmarks/bench_cli_startup.py [runs]
+"""
+import os
+import sys
+import subprocess
+import tempfile
+from time import perf_counter
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TASKS = 1000
+
+COMMANDS = {
+    'python -c pass': ['-c', 'pass'],
+    'import the TUI': ['-c', 'import organize_me.app.controller'],
+    '--help': ['-m', 'organize_me.main', '--help'],
+    'list --limit 10': ['-m', 'organize_me.main', 'list', '--limit', '10'],
+    'search': ['-m', 'organize_me.main', 'search', 'task', '--limit', '10'],
+    'add': ['-m', 'organize_me.main', 'add', 'New task', '--tags', 'work'],
+}
+
+
+def wall_time(args: List[str], directory: str) -> float:
+    start = perf_counter()
+    subprocess.run([sys.executable, *args], cwd=directory, check=True, stdout=subprocess.DEVNULL,
+                   env={**os.environ, 'PYTHONPATH': ROOT})
+    return (perf_counter() - start) * 1000
+
+
+def main(runs: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        subprocess.run([sys.executable, '-c', (
+            "from organize_me.app.task_api import TaskApi; "
+            f"TaskApi().add_many({{'title': f'Task {{number}}'}} for number in range({TASKS}))"
+        )], cwd=directory, check=True, env={**os.environ, 'PYTHONPATH': ROOT})
+        print(f"{'command':>16} {'min ms':>8} {'over python ms':>15}")
+        baseline = 0.0
+        for name, args in COMMANDS.items():
+            best = min(wall_time(args, directory) for _ in range(runs))
+            baseline = baseline or best
+            print(f'{name:>16} {best:>8.0f} {best - baseline:>15.0f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
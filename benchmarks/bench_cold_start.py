@@ -0,0 +1,55 @@
+"""
+Benchmark of TaskApi cold start (reading the snapshot into tasks) for every storage format, and of
+the memory the loaded tasks take on the python heap (a memory-mapped snapshot is not counted, the
+kernel pages it in and out as needed).
+
+usage: python benchmarks/bench_cold_start.py [task count ...]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Dict
+
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi, StorageFormat
+
+REPEAT = 3
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    start = datetime(2024, 1, 1)
+    return {
+        task_id: Task(id=task_id, title=f'Task {task_id}', description='x' * 40,
+                      start_date=start, end_date=start + timedelta(hours=task_id))
+        for task_id in range(1, count + 1)
+    }
+
+
+def main(counts: list[int]) -> None:
+    print(f"{'tasks':>8} " + ' '.join(f'{fmt.value + " ms":>10} {fmt.value + " MB":>10}' for fmt in StorageFormat)
+          + f'   (best of {REPEAT})')
+    with tempfile.TemporaryDirectory() as directory:
+        TaskApi.JSON_FILE = os.path.join(directory, 'tasks.json')
+        TaskApi.BINARY_FILE = os.path.join(directory, 'tasks.bin')
+        TaskApi.JOURNAL_FILE = os.path.join(directory, 'tasks.journal')
+        for count in counts:
+            tasks = make_tasks(count)
+            results = []
+            for storage_format in StorageFormat:
+                TaskApi(tasks=tasks, storage_format=storage_format).save_tasks()
+                results.append(min(repeat(lambda: TaskApi(storage_format=storage_format),
+                                          number=1, repeat=REPEAT)) * 1000)
+                tracemalloc.start()
+                task_api = TaskApi(storage_format=storage_format)
+                task_api.page(0, 100)  # the first screen of the UI
+                results.append(tracemalloc.get_traced_memory()[0] / 2 ** 20)
+                tracemalloc.stop()
+                del task_api
+            print(f'{count:>8} ' + ' '.join(f'{result:>10.1f}' for result in results))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,72 @@
+"""
+Benchmark of the bulk import against adding the tasks one by one with TaskApi.add, and of the memory
+the import pipeline holds (into SQLite, which keeps nothing in memory) as the file grows.
+
+usage: python benchmarks/bench_import.py [task count ...]
+"""
+import os
+import sys
+import json
+import tempfile
+import tracemalloc
+from time import perf_counter
+from typing import Callable, List
+
+from organize_me.app.task_api import TaskApi
+from organize_me.app.sqlite_task_api import SqliteTaskApi
+from organize_me.app.task_io import import_tasks
+
+
+def write_jsonl(path: str, count: int) -> None:
+    with open(path, 'w') as file:
+        for number in range(count):
+            file.write(json.dumps({'title': f'Task {number}', 'description': 'x' * 40, 'tags': ['work'],
+                                   'start_date': '2024-01-01T10:00:00', 'end_date': '2024-01-01T11:00:00'}) + '\n')
+
+
+def timed(func: Callable[[], object]) -> float:
+    start = perf_counter()
+    func()
+    return (perf_counter() - start) * 1000
+
+
+def add_one_by_one(path: str) -> None:
+    api = TaskApi(flush_delay=0)
+    with open(path) as file:
+        for line in file:
+            api.add(**json.loads(line))
+
+
+def peak_memory(func: Callable[[], object]) -> float:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return peak
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'tasks':>8} {'add ms':>9} {'import ms':>10} {'sqlite import ms':>17} {'sqlite peak MB':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for name in ('JSON_FILE', 'BINARY_FILE', 'JOURNAL_FILE', 'SEARCH_INDEX_FILE'):
+            setattr(TaskApi, name, os.path.join(directory, name.lower()))
+        for count in counts:
+            path = os.path.join(directory, f'tasks-{count}.jsonl')
+            write_jsonl(path, count)
+            # one by one costs a journal write per task, only timed on the smaller files
+            add = timed(lambda: add_one_by_one(path)) if count <= 10_000 else float('nan')
+            for name in os.listdir(directory):  # start the bulk import from an empty store
+                if not name.endswith('.jsonl'):
+                    os.remove(os.path.join(directory, name))
+            bulk = timed(lambda: import_tasks(TaskApi(), path))
+            db_file = os.path.join(directory, f'tasks-{count}.db')
+            sqlite = timed(lambda: import_tasks(SqliteTaskApi(db_file), path))
+            os.remove(db_file)
+            peak = peak_memory(lambda: import_tasks(SqliteTaskApi(db_file), path))
+            os.remove(db_file)
+            print(f'{count:>8} {add:>9.0f} {bulk:>10.0f} {sqlite:>17.0f} {peak:>15.1f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
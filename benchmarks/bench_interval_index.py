@@ -0,0 +1,63 @@
+"""
+Benchmark of the date range queries of TaskApi (a week of tasks overlapping or starting) against
+the linear scan of the tasks they replace.
+
+usage: python benchmarks/bench_interval_index.py [task count ...]
+"""
+import sys
+import random
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Callable, Dict, List
+
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+
+REPEAT = 5
+YEAR = datetime(2024, 1, 1)
+WEEK = (YEAR + timedelta(days=180), YEAR + timedelta(days=187))
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    rng = random.Random(0)
+    tasks = {}
+    for task_id in range(1, count + 1):
+        start = YEAR + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        # mostly short tasks, a few long ones
+        length = timedelta(minutes=rng.choice([30, 60, 120, 24 * 60, 30 * 24 * 60]))
+        tasks[task_id] = Task(id=task_id, title=f'Task {task_id}', start_date=start, end_date=start + length)
+    return tasks
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def scan_overlapping(tasks: Dict[int, Task], start: datetime, end: datetime) -> List[Task]:
+    return sorted((task for task in tasks.values()
+                   if task.start_date is not None and task.end_date is not None
+                   and task.start_date <= end and task.end_date >= start),
+                  key=lambda task: (task.start_date, task.id))
+
+
+def scan_starting(tasks: Dict[int, Task], start: datetime, end: datetime) -> List[Task]:
+    return sorted((task for task in tasks.values() if task.start_date is not None and start <= task.start_date <= end),
+                  key=lambda task: (task.start_date, task.id))
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'tasks':>8} {'matches':>8} {'build ms':>9} {'overlap ms':>11} {'scan ms':>9} "
+          f"{'starting ms':>12} {'scan ms':>9}")
+    for count in counts:
+        api = TaskApi(tasks=make_tasks(count))
+        build = bench(lambda: api._indexes.clear() or api._interval_index())
+        assert api.tasks_overlapping(*WEEK) == scan_overlapping(api.tasks, *WEEK)
+        print(f'{count:>8} {len(api.tasks_overlapping(*WEEK)):>8} {build:>9.1f} '
+              f'{bench(lambda: api.tasks_overlapping(*WEEK)):>11.2f} '
+              f'{bench(lambda: scan_overlapping(api.tasks, *WEEK)):>9.1f} '
+              f'{bench(lambda: api.tasks_starting_between(*WEEK)):>12.2f} '
+              f'{bench(lambda: scan_starting(api.tasks, *WEEK)):>9.1f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
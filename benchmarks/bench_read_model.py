@@ -0,0 +1,68 @@
+"""
+Benchmark of the bulk read model: memory held and rows-per-second of Task objects against
+TaskColumns, and of paging rows out of a binary snapshot with and without decoding Task objects.
+
+usage: python benchmarks/bench_read_model.py [task count ...]
+"""
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Callable, Dict, List
+
+from organize_me.app.task import Task
+from organize_me.app.task_columns import TaskColumns
+from organize_me.app.binary_snapshot import BinaryTasks, dump_binary, load_binary
+
+REPEAT = 3
+PAGE = 100
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    start = datetime(2024, 1, 1)
+    return {
+        task_id: Task(id=task_id, title=f'Task {task_id}', description='x' * 40,
+                      start_date=start, end_date=start + timedelta(hours=task_id))
+        for task_id in range(1, count + 1)
+    }
+
+
+def heap_size(build: Callable[[], object]) -> float:
+    tracemalloc.start()
+    built = build()  # noqa: F841, kept alive while measuring
+    size = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    return size
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def task_rows(tasks: Dict[int, Task]) -> List[List[object]]:
+    return [list(task.__dict__.values()) for task in tasks.values()]
+
+
+def decode_page(snapshot: BinaryTasks, page_ids: List[int]) -> List[List[object]]:
+    snapshot._cache.clear()  # a page scrolled into view for the first time
+    return [list(snapshot[task_id].__dict__.values()) for task_id in page_ids]
+
+
+def main(counts: list[int]) -> None:
+    print(f"{'tasks':>8} {'Task MB':>8} {'cols MB':>8} {'Task rows ms':>13} {'cols rows ms':>13} "
+          f"{'page decode ms':>15} {'page cols ms':>13}")
+    for count in counts:
+        tasks = make_tasks(count)
+        columns = TaskColumns.from_tasks(tasks.values())
+        snapshot = load_binary(dump_binary(columns))
+        page_ids = list(tasks)[count // 2:count // 2 + PAGE]
+        print(f'{count:>8} '
+              f'{heap_size(lambda: make_tasks(count)):>8.1f} '
+              f'{heap_size(lambda: TaskColumns.from_tasks(make_tasks(count).values())):>8.1f} '
+              f'{bench(lambda: task_rows(tasks)):>13.1f} {bench(columns.rows):>13.1f} '
+              f'{bench(lambda: decode_page(snapshot, page_ids)):>15.2f} '
+              f'{bench(lambda: snapshot.read_columns(page_ids).rows()):>13.2f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
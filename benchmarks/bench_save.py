@@ -0,0 +1,47 @@
+"""
+Benchmark of the snapshot save path: the legacy truncate-and-write against atomic_write at every
+durability level, so a deployment can pick the durability it can afford.
+
+usage: python benchmarks/bench_save.py [task count ...]
+"""
+import os
+import sys
+import tempfile
+from timeit import repeat
+from typing import Callable, Dict
+
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from organize_me.file_utils import Durability, atomic_write
+
+REPEAT = 5
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    return {task_id: Task(id=task_id, title=f'Task {task_id}', description='x' * 40) for task_id in range(1, count + 1)}
+
+
+def truncate_write(path: str, data: bytes) -> None:
+    with open(path, 'wb') as outfile:
+        outfile.write(data)
+
+
+def bench(save: Callable[[], None]) -> float:
+    return min(repeat(save, number=1, repeat=REPEAT)) * 1000
+
+
+def main(counts: list[int]) -> None:
+    print(f"{'tasks':>8} {'truncate':>10} " + ' '.join(f'{level.value:>11}' for level in Durability) + '   (ms, best of 5)')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tasks.json')
+        for count in counts:
+            # serialization is the same for every path, time only the write
+            data = TaskApi._tasks_to_json(make_tasks(count))
+            results = [bench(lambda: truncate_write(path, data))]
+            results += [bench(lambda: atomic_write(path, data, level)) for level in Durability]
+            print(f'{count:>8} ' + ' '.join(f'{result:>10.2f}' for result in results[:1]) + ' '
+                  + ' '.join(f'{result:>11.2f}' for result in results[1:]))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 10_000, 100_000])
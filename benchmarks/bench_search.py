@@ -0,0 +1,48 @@
+"""
+Benchmark of text search: building the search index, querying it, and the linear scan of Api.search
+it replaces.
+
+usage: python benchmarks/bench_search.py [task count ...]
+"""
+import sys
+import random
+from timeit import repeat
+from typing import Callable, Dict, List
+
+from organize_me.app.api import Api
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from organize_me.app.search_index import SearchIndex
+
+REPEAT = 3
+LIMIT = 100
+WORDS = [f'word{number}' for number in range(5000)]
+QUERIES = ['word42', 'word4', 'word1 word2', 'w']
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    rng = random.Random(0)
+    return {
+        task_id: Task(id=task_id, title=' '.join(rng.choices(WORDS, k=4)),
+                      description=' '.join(rng.choices(WORDS, k=12)))
+        for task_id in range(1, count + 1)
+    }
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'tasks':>8} {'query':>12} {'build ms':>9} {'index ms':>9} {'scan ms':>9}")
+    for count in counts:
+        api = TaskApi(tasks=make_tasks(count))
+        build = bench(lambda: SearchIndex().build(api.tasks.values()))
+        api.search('', LIMIT)  # builds the index
+        for query in QUERIES:
+            print(f'{count:>8} {query:>12} {build:>9.1f} {bench(lambda: api.search(query, LIMIT)):>9.2f} '
+                  f'{bench(lambda: Api.search(api, query, LIMIT)):>9.1f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,53 @@
+"""
+Benchmark of the tasks.json formats: the legacy format (every task double-encoded as a JSON string)
+against the single-pass version 2 format, for encoding and decoding the whole task map.
+
+usage: python benchmarks/bench_snapshot_format.py [task count ...]
+"""
+import sys
+import json
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Callable, Dict
+
+from organize_me.app.task import Task
+from organize_me.task_snapshot import dump_tasks, load_tasks
+
+REPEAT = 3
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    start = datetime(2024, 1, 1)
+    return {
+        task_id: Task(id=task_id, title=f'Task {task_id}', description='x' * 40,
+                      start_date=start, end_date=start + timedelta(hours=task_id))
+        for task_id in range(1, count + 1)
+    }
+
+
+def legacy_dump(tasks: Dict[int, Task]) -> bytes:
+    return json.dumps({task_id: task.model_dump_json() for task_id, task in tasks.items()}).encode()
+
+
+def legacy_load(data: bytes) -> Dict[int, Task]:
+    return {int(task_id): Task.model_validate_json(task_json) for task_id, task_json in json.loads(data).items()}
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def main(counts: list[int]) -> None:
+    print(f"{'tasks':>8} {'legacy save':>12} {'v2 save':>10} {'legacy load':>12} {'v2 load':>10} "
+          f"{'legacy size':>12} {'v2 size':>10}   (ms / bytes, best of {REPEAT})")
+    for count in counts:
+        tasks = make_tasks(count)
+        legacy, current = legacy_dump(tasks), dump_tasks(tasks, Task)
+        assert load_tasks(legacy, Task) == load_tasks(current, Task) == tasks
+        print(f'{count:>8} {bench(lambda: legacy_dump(tasks)):>12.1f} {bench(lambda: dump_tasks(tasks, Task)):>10.1f} '
+              f'{bench(lambda: legacy_load(legacy)):>12.1f} {bench(lambda: load_tasks(current, Task)):>10.1f} '
+              f'{len(legacy):>12} {len(current):>10}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,48 @@
+"""
+Benchmark of a sorted page of tasks from the sort indexes of TaskApi against sorting api.data(),
+and of the cost of keeping the indexes ordered on update.
+
+usage: python benchmarks/bench_sorted_page.py [task count ...]
+"""
+import sys
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Callable, Dict, List
+
+from organize_me.app.api import Api
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+
+REPEAT = 3
+PAGE = 100
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    start = datetime(2024, 1, 1)
+    return {
+        task_id: Task(id=task_id, title=f'Task {count - task_id}',
+                      start_date=start + timedelta(hours=task_id * 7919 % count),
+                      end_date=start + timedelta(hours=task_id * 7919 % count + 1))
+        for task_id in range(1, count + 1)
+    }
+
+
+def bench(func: Callable[[], object], number: int = 1) -> float:
+    return min(repeat(func, number=number, repeat=REPEAT)) / number * 1000
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'tasks':>8} {'sort by':>12} {'index page ms':>14} {'sort data ms':>13} {'update ms':>10}")
+    for count in counts:
+        api = TaskApi(tasks=make_tasks(count), flush_delay=3600)  # keep the writes out of the update timing
+        middle = count // 2
+        for column in api.sort_columns():
+            api.page(0, PAGE, column)  # builds the index
+            print(f'{count:>8} {column:>12} {bench(lambda: api.page(middle, PAGE, column)):>14.2f} '
+                  f'{bench(lambda: Api.page(api, middle, PAGE, column)):>13.1f} '
+                  f'{bench(lambda: api.update(1, title="Renamed"), number=100):>10.3f}')
+        api._flush_timer.cancel()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,55 @@
+"""
+Benchmark of tag filters evaluated on the bitmaps of the tag index against checking the tags of
+every task, and of the cost of building the index.
+
+usage: python benchmarks/bench_tag_filter.py [task count ...]
+"""
+import sys
+import random
+from timeit import repeat
+from typing import Callable, Dict, List
+
+from organize_me.app.task import Task
+from organize_me.app.tag_index import TagIndex
+from organize_me.app.tag_filter import matches, parse_tag_filter
+
+REPEAT = 5
+LIMIT = 100
+TAGS = [f'tag{number}' for number in range(50)]
+FILTERS = ['tag1', 'tag1 and tag2', 'tag1 and not (tag2 or tag3)', 'not tag1']
+
+
+def make_tasks(count: int) -> Dict[int, Task]:
+    rng = random.Random(0)
+    return {task_id: Task(id=task_id, title=f'Task {task_id}', tags=rng.sample(TAGS, 3))
+            for task_id in range(1, count + 1)}
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def scan(tasks: Dict[int, Task], expression: str) -> int:
+    tag_filter = parse_tag_filter(expression)
+    return sum(matches(tag_filter, set(task.tags)) for task in tasks.values())
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'tasks':>8} {'filter':>28} {'matches':>8} {'build ms':>9} {'count ms':>9} "
+          f"{'page ms':>8} {'scan ms':>8}")
+    for count in counts:
+        tasks = make_tasks(count)
+        index = TagIndex()
+        build = bench(lambda: TagIndex().build(tasks.values()))
+        index.build(tasks.values())
+        for expression in FILTERS:
+            tag_filter = parse_tag_filter(expression)
+            assert index.count(tag_filter) == scan(tasks, expression)
+            print(f'{count:>8} {expression:>28} {index.count(tag_filter):>8} {build:>9.1f} '
+                  f'{bench(lambda: index.count(tag_filter)):>9.3f} '
+                  f'{bench(lambda: index.filter(tag_filter, LIMIT)):>8.3f} '
+                  f'{bench(lambda: scan(tasks, expression)):>8.1f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
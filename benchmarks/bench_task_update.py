@@ -0,0 +1,40 @@
+"""
+Microbenchmark of Task.update: the previous per-field setattr + full re-validation path against the
+batched update that validates once, for both Task models.
+
+usage: python benchmarks/bench_task_update.py [number of updates]
+"""
+import sys
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Any, Type, Union
+
+from organize_me.app.task import Task as AppTask
+from organize_me.task import Task as LegacyTask
+
+REPEAT = 5
+
+
+def setattr_update(task: Union[AppTask, LegacyTask], **kwargs: Any) -> None:
+    """Task.update as it was: one validated assignment (and update_date bump) per field, then a full copy."""
+    for field, value in kwargs.items():
+        if value is not None and field in task.__class__.model_fields:
+            setattr(task, field, value)
+    task.__class__.model_validate(task.model_dump())
+
+
+def main(number: int) -> None:
+    start = datetime(2024, 1, 1)
+    changes = {'title': 'Updated task', 'description': 'Updated description',
+               'start_date': start, 'end_date': start + timedelta(days=1)}
+    print(f"{'model':>8} {'setattr us':>11} {'batched us':>11} {'speedup':>8}   (per 4-field update, best of {REPEAT})")
+    task_cls: Type[Union[AppTask, LegacyTask]]
+    for name, task_cls in (('app', AppTask), ('legacy', LegacyTask)):
+        task = task_cls(id=1, title='Task', start_date=start, end_date=start)
+        old = min(repeat(lambda: setattr_update(task, **changes), number=number, repeat=REPEAT)) / number * 1e6
+        new = min(repeat(lambda: task.update(**changes), number=number, repeat=REPEAT)) / number * 1e6
+        print(f'{name:>8} {old:>11.1f} {new:>11.1f} {old / new:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
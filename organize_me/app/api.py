@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Callable
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Callable, Mapping, Optional
+from organize_me.app.tag_filter import matches, parse_tag_filter
 
 
 class Api(ABC):
@@ -13,6 +15,125 @@ class Api(ABC):
         """
         pass
 
+    def columns(self) -> List[str]:
+        """
+        Get the column names of the data
+
+        Returns:
+            list: the column names, in the same order as the values of each row
+        """
+        return self.data()[0]
+
+    def count(self) -> int:
+        """
+        Count the rows in the API
+
+        Returns:
+            int: the number of rows
+        """
+        return len(self.data()[1])
+
+    def page(self, offset: int, limit: int, sort_by: Optional[str] = None) -> List[List[Any]]:
+        """
+        Extract a window of rows from the API, to be overridden by APIs that can do it without
+        building (and sorting) the whole data set
+
+        Args:
+            :param offset: the index of the first row to return
+            :param limit: the maximal number of rows to return
+            :param sort_by: a column to order the rows by, rows without a value last, None for the API order
+
+        Returns:
+            list: the rows from offset to offset + limit, fewer when the data ends before
+        """
+        columns, rows = self.data()
+        if sort_by is not None:
+            column = columns.index(sort_by)
+            rows = sorted(rows, key=lambda row: (row[column] is None, row[column] if row[column] is not None else 0))
+        return rows[offset:offset + limit]
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterator[List[Any]]:
+        """
+        Stream every row of the API, to be overridden by APIs that can do it without paging
+
+        Args:
+            :param batch_size: the number of rows to fetch at a time
+
+        Returns:
+            iterator: the rows, in the API order
+        """
+        offset = 0
+        while rows := self.page(offset, batch_size):
+            yield from rows
+            offset += len(rows)
+
+    def sort_columns(self) -> List[str]:
+        """
+        Get the columns the API keeps the rows ordered by, which page can sort by cheaply
+
+        Returns:
+            list: the column names, empty when the API does not keep any order
+        """
+        return []
+
+    def search(self, query: str, limit: int) -> List[List[Any]]:
+        """
+        Find the rows matching a free text query, to be overridden by APIs that keep a search index
+
+        Args:
+            :param query: the words to look for, every one of them has to appear in a matching row
+            :param limit: the maximal number of rows to return
+
+        Returns:
+            list: the matching rows
+        """
+        words = query.casefold().split()
+        if not words:
+            return []
+        found = []
+        for row in self.data()[1]:
+            text = ' '.join(str(value).casefold() for value in row if isinstance(value, str))
+            if all(word in text for word in words):
+                found.append(row)
+                if len(found) == limit:
+                    break
+        return found
+
+    def filter_by_tags(self, expression: str, limit: int) -> List[List[Any]]:
+        """
+        Find the rows whose tags pass a tag filter, to be overridden by APIs that keep a tag index
+
+        Args:
+            :param expression: a tag filter such as ``work and not (done or archived)``, see tag_filter
+            :param limit: the maximal number of rows to return
+
+        Returns:
+            list: the matching rows, rows of data without a tags column have no tags
+        """
+        tag_filter = parse_tag_filter(expression)
+        columns, rows = self.data()
+        column = columns.index('tags') if 'tags' in columns else None
+        matching_rows = []
+        for row in rows:
+            if matches(tag_filter, {tag.casefold() for tag in row[column]} if column is not None else set()):
+                matching_rows.append(row)
+                if len(matching_rows) == limit:
+                    break
+        return matching_rows
+
+    def tags(self) -> List[str]:
+        """
+        Get the tags in use
+
+        Returns:
+            list: every tag of the rows, case-folded and sorted
+        """
+        columns, rows = self.data()
+        if 'tags' not in columns:
+            return []
+        column = columns.index('tags')
+        return sorted({tag.casefold() for row in rows for tag in row[column]})
+
     @abstractmethod
     def add(self, **kwargs: Any) -> int:
         """
@@ -50,6 +171,66 @@ class Api(ABC):
         """
         pass
 
+    def add_many(self, items: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Add many rows in a single transaction
+
+        Args:
+            :param items: the data of every row to be added
+
+        Returns:
+            list: the ids of the added rows, in the order of the items
+        """
+        with self.transaction():
+            return [self.add(**item) for item in items]
+
+    def update_many(self, updates: Mapping[int, Dict[str, Any]]) -> None:
+        """
+        Update many rows in a single transaction
+
+        Args:
+            :param updates: the data to be updated, by the id of its row
+
+        """
+        with self.transaction():
+            for o_id, data in updates.items():
+                self.update(o_id, **data)
+
+    def delete_many(self, o_ids: Iterable[int]) -> None:
+        """
+        Delete many rows in a single transaction
+
+        Args:
+            :param o_ids: the ids of the rows to be deleted
+
+        """
+        with self.transaction():
+            for o_id in o_ids:
+                self.delete(o_id)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group changes so they are persisted together when the block ends, and dropped when it raises.
+        Transactions nest, an inner one is part of the outer one. To be overridden by APIs that can
+        defer and undo their writes, by default every change is kept as soon as it is made.
+        """
+        yield
+
+    def flush(self) -> None:
+        """
+        Persist any changes the API has not written yet, called before the application quits.
+        APIs that persist every change right away have nothing to do.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Persist any changes the API has not written yet and release the files it holds, called when the
+        application quits. The API is not used after.
+        """
+        self.flush()
+
     @abstractmethod
     def fields(self) -> Dict[str, Callable[[str], Any]]:
         """
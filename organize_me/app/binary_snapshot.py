@@ -0,0 +1,273 @@
+"""
+Binary columnar snapshot of the tasks, an alternative to tasks.json that loads without parsing JSON
+or validating every task.
+
+Layout (little-endian), every column holding one value per task in the same task order:
+    header          magic, format version, task count, size of the string blob
+    id              16 bytes unsigned per task (uuid4 ids are 128 bit)
+    <date>_us       int64 microseconds since the epoch of the wall-clock time, NULL_DATE for None
+    <date>_tz       int32 utc offset in seconds, NAIVE for naive datetimes
+    <string>_start  int64 offset of the utf-8 string in the blob
+    <string>_len    int64 byte length of the string, -1 for None
+    <list>_start    int64 offset of the space-separated utf-8 items in the blob (version 2 and up)
+    <list>_len      int64 byte length of the items
+    blob            every string of the snapshot, concatenated
+
+Version 1 snapshots, written before tasks had tags, are read as tasks without tags.
+"""
+
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, Literal, MutableMapping, Optional, Tuple, Union
+from organize_me.app.task import Task
+from organize_me.app.task_columns import TaskColumns
+
+
+MAGIC = b'OMTB'
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sHHQQ')  # magic, version, reserved, task count, blob size
+ID_SIZE = 16
+NULL_DATE = -2 ** 63
+NAIVE = -2 ** 31
+EPOCH = datetime(1970, 1, 1)
+DATE_FIELDS = ('create_date', 'update_date', 'start_date', 'end_date')
+STRING_FIELDS = ('title', 'description')
+LIST_FIELDS = ('tags',)  # tuples of strings without whitespace
+TASK_FIELDS = tuple(Task.model_fields)
+# column name -> (array typecode, item size); the id column comes first and is handled separately
+COLUMNS: Tuple[Tuple[str, Literal['q', 'i'], int], ...] = (
+    *((f'{field}_us', 'q', 8) for field in DATE_FIELDS),
+    *((f'{field}_tz', 'i', 4) for field in DATE_FIELDS),
+    *((f'{field}_start', 'q', 8) for field in STRING_FIELDS),
+    *((f'{field}_len', 'q', 8) for field in STRING_FIELDS),
+    *((f'{field}_start', 'q', 8) for field in LIST_FIELDS),
+    *((f'{field}_len', 'q', 8) for field in LIST_FIELDS),
+)
+V1_COLUMNS = tuple(column for column in COLUMNS if not column[0].startswith(LIST_FIELDS))
+
+
+def columns_of(version: int) -> Tuple[Tuple[str, Literal['q', 'i'], int], ...]:
+    """The columns of a snapshot of the given format version, in file order."""
+    return V1_COLUMNS if version == 1 else COLUMNS
+
+
+def column_offsets(count: int, version: int = VERSION) -> Dict[str, int]:
+    """
+    Compute where every column (and the blob) of a snapshot of count tasks starts.
+
+    :param count: the number of tasks in the snapshot
+    :param version: the format version of the snapshot
+    :return: the byte offset of every column, keyed by column name, 'id' and 'blob' included
+    """
+    offsets = {'id': HEADER.size}
+    position = HEADER.size + ID_SIZE * count
+    for name, _, size in columns_of(version):
+        offsets[name] = position
+        position += size * count
+    offsets['blob'] = position
+    return offsets
+
+
+def read_header(data: bytes | memoryview) -> Tuple[int, int, int]:
+    """
+    Check the header of a snapshot.
+
+    :param data: the snapshot
+    :return: the format version, the task count and the blob size
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("binary task snapshot is truncated")
+    magic, version, _, count, blob_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in READABLE_VERSIONS:
+        raise ValueError(f"not a version {' or '.join(map(str, READABLE_VERSIONS))} binary task snapshot")
+    return version, count, blob_size
+
+
+def dump_binary(tasks: TaskColumns) -> bytes:
+    """
+    Encode tasks as a binary snapshot.
+
+    :param tasks: the tasks to encode
+    :return: the encoded snapshot
+    """
+    if any(not 0 < task_id < 2 ** (8 * ID_SIZE) for task_id in tasks.id):
+        raise ValueError("Task IDs must be positive 128 bit integers to fit a binary snapshot")
+    columns: Dict[str, array[int]] = {}
+    for field in DATE_FIELDS:
+        encoded_dates = [_encode_date(date) for date in getattr(tasks, field)]
+        columns[f'{field}_us'] = array('q', [micros for micros, _ in encoded_dates])
+        columns[f'{field}_tz'] = array('i', [tz_offset for _, tz_offset in encoded_dates])
+    blob = bytearray()
+    for field in STRING_FIELDS:
+        starts = columns[f'{field}_start'] = array('q')
+        lengths = columns[f'{field}_len'] = array('q')
+        for value in getattr(tasks, field):
+            encoded = value.encode() if value is not None else b''
+            starts.append(len(blob))
+            lengths.append(len(encoded) if value is not None else -1)
+            blob += encoded
+    for field in LIST_FIELDS:
+        starts = columns[f'{field}_start'] = array('q')
+        lengths = columns[f'{field}_len'] = array('q')
+        for items in getattr(tasks, field):
+            encoded = ' '.join(items).encode()
+            starts.append(len(blob))
+            lengths.append(len(encoded))
+            blob += encoded
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, 0, len(tasks), len(blob)),
+        b''.join(task_id.to_bytes(ID_SIZE, 'little') for task_id in tasks.id),
+        *(columns[name].tobytes() for name, _, _ in COLUMNS),
+        bytes(blob),
+    ])
+
+
+def load_binary(data: Union[bytes, mmap.mmap]) -> 'BinaryTasks':
+    """
+    Open a binary snapshot. Only the task ids are decoded up front, see BinaryTasks.
+
+    :param data: the content of the snapshot file, or a memory map of it
+    :return: the tasks keyed by id
+    """
+    return BinaryTasks(data)
+
+
+class BinaryTasks(MutableMapping[int, Task]):
+    """
+    The tasks of a binary snapshot, keyed by id in snapshot order.
+
+    Loading only decodes the id column into an id -> row index. The other columns are read in place
+    (from a memory map, they are not even read from disk until touched) and a task is decoded into a
+    Task when it is accessed. Decoded tasks are kept in a small LRU cache, so resident memory follows
+    the working set rather than the task count. The snapshot was validated when it was written, so
+    tasks are built without running the validators again.
+
+    Tasks set after loading (new or modified ones) are pinned in memory until the next snapshot, a
+    task modified in place has to be set again to be pinned. New tasks are appended to the order.
+    """
+    NEW = -1  # row of a task that is not in the snapshot
+    CACHE_SIZE = 1024  # decoded tasks kept in memory
+
+    def __init__(self, data: Union[bytes, mmap.mmap]) -> None:
+        self._data = data
+        self._view = view = memoryview(data)
+        version, count, blob_size = read_header(view)
+        offsets = column_offsets(count, version)
+        self._columns = {
+            name: view[offsets[name]:offsets[name] + size * count].cast(typecode)
+            for name, typecode, size in columns_of(version)
+        }
+        self._blob = view[offsets['blob']:offsets['blob'] + blob_size]
+        ids = view[offsets['id']:offsets['id'] + ID_SIZE * count]
+        self._rows: Dict[int, int] = {
+            int.from_bytes(ids[position:position + ID_SIZE], 'little'): row
+            for row, position in enumerate(range(0, ID_SIZE * count, ID_SIZE))
+        }
+        ids.release()
+        self._pinned: Dict[int, Task] = {}
+        self._cache: OrderedDict[int, Task] = OrderedDict()
+
+    def __getitem__(self, task_id: int) -> Task:
+        task = self._pinned.get(task_id)
+        if task is not None:
+            return task
+        task = self._cache.get(task_id)
+        if task is not None:
+            self._cache.move_to_end(task_id)
+            return task
+        task = self._cache[task_id] = self._decode(task_id, self._rows[task_id])
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return task
+
+    def __setitem__(self, task_id: int, task: Task) -> None:
+        self._rows.setdefault(task_id, self.NEW)
+        self._pinned[task_id] = task
+        self._cache.pop(task_id, None)
+
+    def __delitem__(self, task_id: int) -> None:
+        del self._rows[task_id]
+        self._pinned.pop(task_id, None)
+        self._cache.pop(task_id, None)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._rows
+
+    def close(self) -> None:
+        """Release the snapshot and close its memory map, only the pinned tasks can be read after."""
+        for column in self._columns.values():
+            column.release()
+        self._blob.release()
+        self._view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def read_columns(self, task_ids: Iterable[int]) -> TaskColumns:
+        """
+        Read tasks for a bulk read path: the values of tasks that are not in memory are read straight
+        from the snapshot, without building a Task nor evicting the cached ones.
+
+        :param task_ids: the ids of the tasks to read
+        :return: the tasks, in the order of the ids
+        """
+        return TaskColumns(
+            tuple(self._pinned[task_id].__dict__.values()) if task_id in self._pinned
+            else tuple(self._decode_values(task_id, self._rows[task_id]).values())
+            for task_id in task_ids
+        )
+
+    def _decode(self, task_id: int, row: int) -> Task:
+        return _construct(self._decode_values(task_id, row))
+
+    def _decode_values(self, task_id: int, row: int) -> Dict[str, Any]:
+        # filled in Task field order: id, title, description, the dates, then the tags
+        values: Dict[str, Any] = {'id': task_id}
+        for field in STRING_FIELDS:
+            length = self._columns[f'{field}_len'][row]
+            start = self._columns[f'{field}_start'][row]
+            values[field] = str(self._blob[start:start + length], 'utf-8') if length >= 0 else None
+        for field in DATE_FIELDS:
+            values[field] = _decode_date(self._columns[f'{field}_us'][row], self._columns[f'{field}_tz'][row])
+        for field in LIST_FIELDS:
+            values[field] = ()
+            if f'{field}_len' in self._columns:  # not in version 1 snapshots
+                length = self._columns[f'{field}_len'][row]
+                start = self._columns[f'{field}_start'][row]
+                if length:
+                    values[field] = tuple(str(self._blob[start:start + length], 'utf-8').split(' '))
+        return values
+
+
+def _construct(values: Dict[str, Any]) -> Task:
+    # what Task.model_construct does, minus its per-field bookkeeping
+    task = Task.__new__(Task)
+    object.__setattr__(task, '__dict__', values)
+    object.__setattr__(task, '__pydantic_fields_set__', set(TASK_FIELDS))
+    object.__setattr__(task, '__pydantic_extra__', None)
+    object.__setattr__(task, '__pydantic_private__', None)
+    return task
+
+
+def _encode_date(date: Optional[datetime]) -> Tuple[int, int]:
+    if date is None:
+        return NULL_DATE, NAIVE
+    offset = date.utcoffset()
+    micros = (date.replace(tzinfo=None) - EPOCH) // timedelta(microseconds=1)
+    return micros, NAIVE if offset is None else int(offset.total_seconds())
+
+
+def _decode_date(micros: int, tz_offset: int) -> Optional[datetime]:
+    if micros == NULL_DATE:
+        return None
+    date = EPOCH + timedelta(microseconds=micros)
+    return date if tz_offset == NAIVE else date.replace(tzinfo=timezone(timedelta(seconds=tz_offset)))
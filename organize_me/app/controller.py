@@ -3,13 +3,19 @@ from organize_me.app.layout import Layout
 from organize_me.app.task import Task
 from organize_me.app.api import Api
 from datetime import datetime
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict
+
+if TYPE_CHECKING:
+    from organize_me.google_calendar.async_calendar import AsyncCalendarClient
 
 
 class Controller:
-    def __init__(self, tasks: Optional[Dict[int, Task]] = None):
-        self.api: Api = TaskApi(tasks)
-        self.app_layout = Layout(api=self.api)
+    FLUSH_DELAY = 0.5  # seconds, coalesces bursts of edits in the UI into a single write
+
+    def __init__(self, tasks: Optional[Dict[int, Task]] = None, api: Optional[Api] = None,
+                 calendar: Optional['AsyncCalendarClient'] = None):
+        self.api: Api = api or TaskApi(tasks, flush_delay=self.FLUSH_DELAY)
+        self.app_layout = Layout(api=self.api, calendar=calendar)
 
     def run(self) -> None:
         self.app_layout.run()
@@ -26,4 +32,5 @@ def test_controller() -> Controller:
 if __name__ == '__main__':
     controller = test_controller()
     # controller = Controller()
+    # controller = Controller(api=SqliteTaskApi())
     controller.run()
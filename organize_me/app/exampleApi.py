@@ -1,4 +1,5 @@
-from typing import Any, List, Callable, Tuple
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Callable, Tuple
 from organize_me.app.api import Api
 from datetime import datetime
 from random import randint
@@ -47,6 +48,16 @@ class ExampleApi(Api):
         else:
             raise ValueError(f"ID {o_id} not found")
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # rows are replaced rather than changed in place, a shallow copy is enough to roll back
+        people = dict(self.people)
+        try:
+            yield
+        except BaseException:
+            self.people = people
+            raise
+
     def fields(self) -> dict[str, Callable[[str], Any]]:
         return {
             "id": int,
@@ -37,3 +37,18 @@ class EmptyObjectDataError(Exception):
     def __init__(self) -> None:
         self.message = "Object data is empty"
         super().__init__(self.message)
+
+
+class TagFilterSyntaxError(Exception):
+    """Raised when a tag filter expression cannot be parsed."""
+    def __init__(self, expression: str, reason: str) -> None:
+        self.message = f"Invalid tag filter {expression!r}: {reason}"
+        super().__init__(self.message)
+
+
+class TaskImportError(Exception):
+    """Raised when a record of an imported file is not a valid task."""
+    def __init__(self, record_number: int, reason: str) -> None:
+        self.record_number = record_number
+        self.message = f"Record {record_number} is not a valid task: {reason}"
+        super().__init__(self.message)
@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+from organize_me.app.task import Task
+from organize_me.app.task_index import TaskIndex
+
+START = itemgetter(0)
+
+
+def date_key(date: datetime) -> datetime:
+    """Make dates comparable: aware dates are converted to naive local time, the time of datetime.now()."""
+    return date if date.tzinfo is None else date.astimezone().replace(tzinfo=None)
+
+
+class IntervalIndex(TaskIndex):
+    """
+    Sorted-endpoint index of the start_date/end_date ranges of the tasks, tasks without a range are
+    not indexed.
+
+    Every task is kept in a list sorted by start date, for start date range lookups. For overlap
+    queries the tasks are also bucketed by the length of their range in powers of two: within a
+    bucket no range is longer than the bucket length, so the tasks of the bucket overlapping a range
+    all start in that range widened by the bucket length. That is a bisected slice of the bucket,
+    where only the tasks starting within a bucket length before the range can end too early.
+    """
+
+    def __init__(self) -> None:
+        self._starts: List[Tuple[datetime, int]] = []  # (start, id) of every task, sorted
+        # bucket -> (start, id, end) of the tasks whose range is under 2 ** bucket seconds, sorted
+        self._buckets: Dict[int, List[Tuple[datetime, int, datetime]]] = {}
+        self._ranges: Dict[int, Tuple[datetime, datetime]] = {}  # task id -> its range, to remove it by id
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def add(self, task: Task) -> None:
+        if task.start_date is not None and task.end_date is not None:
+            self.add_range(task.id, task.start_date, task.end_date)
+
+    def add_range(self, task_id: int, start: datetime, end: datetime) -> None:
+        """
+        Index the range of a task that is not in the index
+
+        Args:
+            :param task_id: the id of the task
+            :param start: the start date of the task
+            :param end: the end date of the task
+        """
+        start, end = date_key(start), date_key(end)
+        self._ranges[task_id] = start, end
+        insort(self._starts, (start, task_id))
+        insort(self._buckets.setdefault(self._bucket(start, end), []), (start, task_id, end))
+
+    def remove(self, task_id: int) -> None:
+        if task_id not in self._ranges:
+            return
+        start, end = self._ranges.pop(task_id)
+        del self._starts[bisect_left(self._starts, (start, task_id))]
+        bucket = self._buckets[self._bucket(start, end)]
+        del bucket[bisect_left(bucket, (start, task_id, end))]
+
+    def build(self, tasks: Iterable[Task]) -> None:
+        self.build_ranges((task.id, task.start_date, task.end_date) for task in tasks)
+
+    def build_ranges(self, ranges: Iterable[Tuple[int, Optional[datetime], Optional[datetime]]]) -> None:
+        """
+        Index many tasks at once, sorting once instead of inserting every task in order
+
+        Args:
+            :param ranges: the id, start date and end date of every task, tasks without dates are skipped
+        """
+        for task_id, start, end in ranges:
+            if start is not None and end is not None:
+                start, end = date_key(start), date_key(end)
+                self._ranges[task_id] = start, end
+                self._starts.append((start, task_id))
+                self._buckets.setdefault(self._bucket(start, end), []).append((start, task_id, end))
+        self._starts.sort()
+        for bucket in self._buckets.values():
+            bucket.sort()
+
+    def starting_between(self, start: datetime, end: datetime) -> List[int]:
+        """
+        Find the tasks starting within a range
+
+        Args:
+            :param start: the earliest start date (inclusive)
+            :param end: the latest start date (inclusive)
+
+        Returns:
+            list: the ids of the matching tasks ordered by start date
+        """
+        start, end = date_key(start), date_key(end)
+        first = bisect_left(self._starts, start, key=START)
+        return [task_id for _, task_id in self._starts[first:bisect_right(self._starts, end, first, key=START)]]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[int]:
+        """
+        Find the tasks whose range shares at least an instant with a range
+
+        Args:
+            :param start: the start of the range (inclusive)
+            :param end: the end of the range (inclusive)
+
+        Returns:
+            list: the ids of the matching tasks ordered by start date
+        """
+        start, end = date_key(start), date_key(end)
+        matches: List[Tuple[datetime, int]] = []
+        for size, bucket in self._buckets.items():
+            try:
+                earliest = start - timedelta(seconds=2 ** size)
+            except OverflowError:
+                earliest = datetime.min
+            last = bisect_right(bucket, end, key=START)
+            first = bisect_left(bucket, earliest, hi=last, key=START)
+            matches.extend((task_start, task_id) for task_start, task_id, task_end in bucket[first:last]
+                           if task_end >= start)
+        matches.sort()
+        return [task_id for _, task_id in matches]
+
+    @staticmethod
+    def _bucket(start: datetime, end: datetime) -> int:
+        # ranges of [2 ** (bucket - 1), 2 ** bucket) seconds share a bucket
+        return ((end - start) // timedelta(seconds=1)).bit_length()
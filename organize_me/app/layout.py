@@ -1,19 +1,23 @@
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 from datetime import datetime
 
 from textual.app import App, ComposeResult
-from textual.widgets import DataTable, Footer, Label
+from textual.widgets import DataTable, Footer, Input, Label
 from textual.coordinate import Coordinate
 from textual.widgets.data_table import RowKey
 from textual.containers import Vertical
 
 from organize_me.app.api import Api
-from organize_me.app.exceptions import EmptyObjectDataError
+from organize_me.app.exceptions import EmptyObjectDataError, TagFilterSyntaxError
 from organize_me.app.layout_validation import (validate_table_exists, validate_table_not_empty,
                                                validate_item_exists, safe_action)
 # Example API for testing
 from organize_me.app.exampleApi import ExampleApi
 
+if TYPE_CHECKING:  # the calendar modules are imported by whoever connects a calendar
+    from organize_me.google_calendar.async_calendar import AsyncCalendarClient
+    from organize_me.google_calendar.calendar_sync import EventChange
+
 
 def format_long_date(date: datetime) -> str:
     return date.strftime("%Y-%m-%d %H:%M")
@@ -21,53 +25,232 @@ def format_long_date(date: datetime) -> str:
 
 class Layout(App[Any]):
     OBJ_ID_COL = 0
+    PAGE_SIZE = 100  # rows fetched from the API at a time, the rest are fetched while scrolling
+    OUTBOX_RETRY_INTERVAL = 60.0  # seconds between attempts to send the calendar changes left queued
     CSS_PATH = "css/layout.tcss"
     BINDINGS = [
         ("a", "add", "add a new row"),
         ("u", "update", "update the current row"),
-        ("r", "remove", "remove the current row"),
+        ("r", "remove", "remove the selected rows, or the current row"),
+        ("space", "select", "select the current row"),
+        ("s", "sort", "change the order of the rows"),
+        ("slash", "search", "filter the rows"),
+        ("t", "filter_tags", "filter the rows by tags"),
+        ("escape", "clear_filter", "show all the rows"),
+        ("c", "sync_calendar", "sync the tasks with the calendar"),
         ("q", "quit", "Quit the application"),
     ]
 
-    def __init__(self, api: Api) -> None:
+    def __init__(self, api: Api, calendar: Optional['AsyncCalendarClient'] = None) -> None:
         super().__init__()
         if not api.fields():
             raise EmptyObjectDataError()
         self.api = api
+        self.calendar = calendar  # its requests run in workers, the table stays responsive meanwhile
         self.table: DataTable[Any] = DataTable(cursor_type="row")
         self.label_status = Label("", name="status")
+        self.search_input = Input(placeholder="search", id="search")
+        self.search_input.display = False
+        self.tag_input = Input(placeholder="tags, e.g. work and not (done or archived)", id="tag_filter")
+        self.tag_input.display = False
+        # while one is set, the table holds the rows matching it instead of the pages
+        self.search_query = ""
+        self.tag_filter = ""
+        self.sort_by: Optional[str] = None  # the column the pages are ordered by, None for the API order
+        self.selected_rows: Dict[int, RowKey] = {}  # object id -> table row, acted on together
+        self.fetched_rows = 0  # number of API rows already in the table
+        self.all_rows_fetched = False
 
     def on_mount(self) -> None:
         # TODO: can moved to css file, change the datatable division to main-container and overall-footer ids
         self.query_one(DataTable).styles.height = "99%"
         self.query_one(Label).styles.height = "auto"
         self.query_one(Footer).styles.height = "auto"
+        self.table.focus()
+        if self.calendar is not None:
+            self.set_interval(self.OUTBOX_RETRY_INTERVAL, self.drain_outbox)
+            self.drain_outbox()  # changes queued by the last run
+
+    def on_unmount(self) -> None:
+        """Make sure no pending change is lost when the application quits."""
+        self.api.close()
+        if self.calendar is not None:
+            self.calendar.close()
 
     def compose(self) -> ComposeResult:
         """Compose the UI components."""
-        columns, data = self.api.data()
-        data = self._convert_dates_to_str(data)
-        self.table.add_columns(*columns)
-        self.table.add_rows(data)
+        self.table.add_columns(*self.api.columns())
+        self.fetch_next_page()
         yield Vertical(
+            self.search_input,
+            self.tag_input,
             self.table,
             self.label_status,
             Footer(),
             id="main_container",
         )
 
+    def fetch_next_page(self) -> None:
+        """Fetch the next page of rows from the API and append it to the table."""
+        rows = self.api.page(self.fetched_rows, self.PAGE_SIZE, self.sort_by)
+        self.table.add_rows(self._convert_dates_to_str(rows))
+        self.fetched_rows += len(rows)
+        self.all_rows_fetched = len(rows) < self.PAGE_SIZE
+
+    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        """Fetch more rows once the cursor gets within half a page of the last fetched row."""
+        if not self.filtering and not self.all_rows_fetched and event.cursor_row >= self.table.row_count - self.PAGE_SIZE // 2:
+            self.fetch_next_page()
+
+    def reload_rows(self) -> None:
+        """Replace the rows of the table with the first page."""
+        self.table.clear()
+        self.selected_rows.clear()
+        self.fetched_rows = 0
+        self.fetch_next_page()
+
+    def action_sort(self) -> None:
+        """Order the rows by the next column the API keeps an order of, after the last one back to the API order."""
+        orders: List[Optional[str]] = [None, *self.api.sort_columns()]
+        self.sort_by = orders[(orders.index(self.sort_by) + 1) % len(orders)]
+        if not self.filtering:
+            self.reload_rows()
+        self.update_label_status(f"sorted by {self.sort_by}" if self.sort_by else "unsorted")
+
+    @property
+    def filtering(self) -> bool:
+        """Whether the table holds filtered rows rather than the pages."""
+        return bool(self.search_query or self.tag_filter)
+
+    def action_search(self) -> None:
+        """Show the search input, the table is filtered while typing."""
+        self.show_filter_input(self.search_input)
+
+    def action_filter_tags(self) -> None:
+        """Show the tag filter input, the table is filtered while typing."""
+        self.show_filter_input(self.tag_input)
+
+    def show_filter_input(self, filter_input: Input) -> None:
+        """Show one of the filter inputs, the filters do not combine so the other one is cleared."""
+        for other_input in (self.search_input, self.tag_input):
+            if other_input is not filter_input and other_input.display:
+                other_input.display = False
+                other_input.value = ""
+        filter_input.display = True
+        filter_input.focus()
+
+    def action_clear_filter(self) -> None:
+        """Hide the filter inputs and go back to the paged rows."""
+        for filter_input in (self.search_input, self.tag_input):
+            filter_input.display = False
+            filter_input.value = ""  # the change event restores the rows
+        self.table.focus()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Replace the rows of the table with the rows matching the filter being typed."""
+        if event.input is self.tag_input:
+            self.tag_filter = event.value.strip()
+        else:
+            self.search_query = event.value.strip()
+        if not self.filtering:
+            self.reload_rows()
+            return
+        try:
+            rows = (self.api.filter_by_tags(self.tag_filter, self.PAGE_SIZE) if self.tag_filter
+                    else self.api.search(self.search_query, self.PAGE_SIZE))
+        except TagFilterSyntaxError as error:
+            # most likely not typed to the end yet, keep the last rows
+            self.update_label_status(error.message)
+            return
+        self.table.clear()
+        self.selected_rows.clear()
+        self.table.add_rows(self._convert_dates_to_str(rows))
+        self.update_label_status("")
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Keep the results and move to the table to act on them."""
+        self.table.focus()
+
+    def action_sync_calendar(self) -> None:
+        """Sync the tasks with the calendar in the background, a sync still running is cancelled."""
+        if self.calendar is None:
+            self.update_label_status("no calendar connected")
+            return
+        self.run_worker(self.sync_calendar(self.calendar), group="calendar_sync", exclusive=True)
+
+    async def sync_calendar(self, calendar: 'AsyncCalendarClient') -> None:
+        """Sync the tasks with the calendar both ways, reporting in the status label."""
+        self.update_label_status("calendar: syncing...")
+        try:
+            report = await calendar.sync_tasks(self.api)
+        except Exception as error:
+            self.update_label_status(f"calendar: sync failed, {error}")
+            return
+        if report.received:
+            self.reload_rows()
+        failed = f", {len(report.errors)} failed" if report.errors else ""
+        self.update_label_status(
+            f"calendar: {report.sent} sent, {report.received} received, {report.skipped} unchanged{failed}")
+
+    def push_to_calendar(self, changes: Sequence['EventChange']) -> None:
+        """
+        Queue task changes in the calendar outbox, a local write, and send them in the background,
+        reporting the progress in the status label. Changes that cannot be sent now are sent later.
+        """
+        if self.calendar is None:
+            self.update_label_status("no calendar connected")
+            return
+        self.calendar.outbox.add(*changes)
+        self.drain_outbox()
+
+    def drain_outbox(self) -> None:
+        """Send the changes waiting in the calendar outbox in the background, if any."""
+        if self.calendar is not None and len(self.calendar.outbox):
+            self.run_worker(self._drain_outbox(self.calendar), group="calendar_push")
+
+    async def _drain_outbox(self, calendar: 'AsyncCalendarClient') -> None:
+        self.update_label_status(f"calendar: sending {len(calendar.outbox)} changes...")
+        try:
+            result = await calendar.drain_outbox(
+                lambda done, total: self.update_label_status(f"calendar: {done}/{total} changes sent"))
+        except Exception as error:
+            self.update_label_status(f"calendar: sending failed, {error}")
+            return
+        failed = f", {len(result.errors)} failed" if result.errors else ""
+        pending = f", {len(calendar.outbox)} pending" if len(calendar.outbox) else ""
+        self.update_label_status(f"calendar: {len(result.events)} changes sent{failed}{pending}")
+
     def update_label_status(self, text: str) -> None:
         """Update the status label with the provided text."""
         self.label_status.update(text)
 
+    @safe_action
+    @validate_table_exists
+    @validate_table_not_empty
+    def action_select(self) -> None:
+        """Add the current row to the selected rows, or take it out when it is already selected."""
+        object_id = self.get_object_id()
+        if self.selected_rows.pop(object_id, None) is None:
+            self.selected_rows[object_id] = self.get_row_key()
+        self.update_label_status(f"{len(self.selected_rows)} rows selected")
+
     @safe_action
     @validate_table_exists
     @validate_table_not_empty
     def action_remove(self) -> None:
-        """Remove the selected row from the table."""
-        self.api.delete(self.get_object_id())
-        self.table.remove_row(self.get_row_key())
-        self.update_label_status("row removed")
+        """Remove the selected rows, or the current row when none is selected, in a single API transaction."""
+        rows = self.selected_rows or {self.get_object_id(): self.get_row_key()}
+        self.api.delete_many(list(rows))
+        if self.calendar is not None:
+            from organize_me.google_calendar.calendar_sync import EventChange
+            synced = [task_id for task_id in rows if task_id in self.calendar.sync_state.records]
+            if synced:
+                self.push_to_calendar([EventChange.delete(task_id) for task_id in synced])
+        for row_key in rows.values():
+            self.table.remove_row(row_key)
+        self.fetched_rows -= len(rows)
+        self.selected_rows = {}
+        self.update_label_status("row removed" if len(rows) == 1 else f"{len(rows)} rows removed")
 
     @safe_action
     @validate_table_exists
@@ -84,7 +267,14 @@ class Layout(App[Any]):
     def add_item_callback(self, item: Dict[str, object]) -> None:
         """Callback for adding a new item to the API and table."""
         self.api.add(**item)
-        self.table.add_row(*item.values())
+        if self.filtering:
+            return
+        if self.sort_by is not None:
+            self.reload_rows()  # the new row belongs somewhere in the order, the pages are cheap to fetch again
+        # while rows are still being fetched the new row shows up with the page that holds it
+        elif self.all_rows_fetched:
+            self.table.add_row(*item.values())
+            self.fetched_rows += 1
 
     @safe_action
     @validate_table_exists
@@ -123,9 +313,10 @@ class Layout(App[Any]):
 
     @staticmethod
     def _convert_dates_to_str(data: List[List[Any]]) -> List[List[str | None]]:
-        """Convert datetime objects in data to string representation."""
+        """Convert datetime objects (and tag tuples) in data to string representation."""
         return [
-            [format_long_date(value) if isinstance(value, datetime) else value for value in row]
+            [format_long_date(value) if isinstance(value, datetime)
+             else ', '.join(value) if isinstance(value, tuple) else value for value in row]
             for row in data
         ]
 
@@ -0,0 +1,129 @@
+import re
+import json
+import heapq
+from bisect import bisect_left, insort
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+from organize_me.app.task import Task
+from organize_me.app.task_index import TaskIndex
+
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded words."""
+    return TOKEN.findall(text.casefold())
+
+
+class SearchIndex(TaskIndex):
+    """
+    Inverted index of the words of task titles and descriptions.
+
+    Every query word matches the indexed words it is a prefix of, so results update while the query
+    is being typed, and a task matches when all the query words do.
+    """
+    VERSION = 1
+    CHECK_WORDS_BELOW = 256  # candidate count under which the remaining terms are checked task by task
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Set[int]] = {}  # word -> ids of the tasks holding it
+        self._words: Dict[int, FrozenSet[str]] = {}  # task id -> its words, to remove it by id
+        self._sorted_words: List[str] = []  # the keys of the postings, for prefix lookups
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add(self, task: Task) -> None:
+        words = frozenset(tokenize(task.title) + tokenize(task.description or ''))
+        self._words[task.id] = words
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                insort(self._sorted_words, word)
+            postings.add(task.id)
+
+    def remove(self, task_id: int) -> None:
+        for word in self._words.pop(task_id, ()):
+            postings = self._postings[word]
+            postings.discard(task_id)
+            if not postings:
+                del self._postings[word]
+                del self._sorted_words[bisect_left(self._sorted_words, word)]
+
+    def search(self, query: str, limit: int) -> List[int]:
+        """
+        Find the tasks matching every word of a query
+
+        Args:
+            :param query: free text, every word of it is matched as a word prefix
+            :param limit: the maximal number of results
+
+        Returns:
+            list: the ids of the matching tasks, the ones holding every word whole first (by id)
+        """
+        terms = sorted(set(tokenize(query)), key=self._count_words)
+        if not terms:
+            return []
+        exact = set.intersection(*(self._postings.get(term, set()) for term in terms))
+        results = heapq.nsmallest(limit, exact)
+        if len(results) == limit:
+            return results
+        if len(terms) == 1:
+            # a short prefix matches most tasks, stop reading postings once the limit is reached
+            start, end = self._word_range(terms[0])
+            candidates: Iterable[int] = (task_id for word in self._sorted_words[start:end]
+                                         for task_id in self._postings[word])
+        else:
+            # start from the term with the fewest words, the others only narrow it down
+            matches = self._prefixed(terms[0])
+            for term in terms[1:]:
+                if len(matches) <= self.CHECK_WORDS_BELOW:
+                    # few candidates left, checking their words beats unioning the postings of a short prefix
+                    matches = {task_id for task_id in matches
+                               if any(word.startswith(term) for word in self._words[task_id])}
+                else:
+                    matches &= self._prefixed(term)
+            candidates = matches
+        for task_id in candidates:
+            if task_id not in exact:
+                exact.add(task_id)  # also dedupes the tasks holding several words of the prefix
+                results.append(task_id)
+                if len(results) == limit:
+                    break
+        return results
+
+    def _word_range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self._sorted_words, prefix)
+        return start, bisect_left(self._sorted_words, prefix + '\U0010ffff', start)
+
+    def _prefixed(self, prefix: str) -> Set[int]:
+        start, end = self._word_range(prefix)
+        return set().union(*(self._postings[word] for word in self._sorted_words[start:end]))
+
+    def _count_words(self, prefix: str) -> int:
+        start, end = self._word_range(prefix)
+        return end - start
+
+    def dumps(self, **metadata: Any) -> str:
+        """Serialize the index, with metadata telling which state of the tasks it reflects."""
+        return json.dumps({'version': self.VERSION, **metadata,
+                           'words': {str(task_id): sorted(words) for task_id, words in self._words.items()}})
+
+    @classmethod
+    def loads(cls, data: str) -> tuple['SearchIndex', Dict[str, Any]]:
+        """
+        Deserialize an index written by dumps
+
+        Returns:
+            tuple: the index and the metadata it was written with
+        """
+        document = json.loads(data)
+        if document.pop('version', None) != cls.VERSION:
+            raise ValueError(f"not a version {cls.VERSION} search index")
+        index = cls()
+        for task_id, words in document.pop('words').items():
+            index._words[int(task_id)] = frozenset(words)
+            for word in words:
+                index._postings.setdefault(word, set()).add(int(task_id))
+        index._sorted_words = sorted(index._postings)
+        return index, document
@@ -0,0 +1,75 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+from organize_me.app.task import Task
+from organize_me.app.task_index import TaskIndex
+from organize_me.app.interval_index import date_key
+
+SortKey = Tuple[Any, ...]
+
+
+class SortIndex(TaskIndex):
+    """
+    The task ids kept ordered by the value of a field, then by id, tasks without a value last.
+
+    A mutation moves a single entry of the sorted list (a bisection and a memmove), so a sorted page
+    is a slice of the list rather than a sort of every task.
+    """
+
+    def __init__(self, field: str) -> None:
+        """
+        :param field: the Task field to order the tasks by
+        """
+        self.field = field
+        self._order: List[SortKey] = []  # the sort key of every task, sorted, the id is its last item
+        self._keys: Dict[int, SortKey] = {}  # task id -> its sort key, to remove it by id
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, task: Task) -> None:
+        key = self._keys[task.id] = self._key(task.id, getattr(task, self.field))
+        insort(self._order, key)
+
+    def remove(self, task_id: int) -> None:
+        key = self._keys.pop(task_id, None)
+        if key is not None:
+            del self._order[bisect_left(self._order, key)]
+
+    def build(self, tasks: Iterable[Task]) -> None:
+        self.build_values((task.id, getattr(task, self.field)) for task in tasks)
+
+    def build_values(self, values: Iterable[Tuple[int, Any]]) -> None:
+        """
+        Index many tasks at once, sorting once instead of inserting every task in order
+
+        Args:
+            :param values: the id and the value of the field of every task
+        """
+        for task_id, value in values:
+            key = self._keys[task_id] = self._key(task_id, value)
+            self._order.append(key)
+        self._order.sort()
+
+    def page(self, offset: int, limit: int) -> List[int]:
+        """
+        Get a window of the ordered task ids
+
+        Args:
+            :param offset: the position of the first id to return
+            :param limit: the maximal number of ids to return
+
+        Returns:
+            list: the ids from offset to offset + limit
+        """
+        return [key[-1] for key in self._order[offset:offset + limit]]
+
+    @staticmethod
+    def _key(task_id: int, value: Any) -> SortKey:
+        if value is None:
+            return 1, task_id
+        if isinstance(value, datetime):
+            value = date_key(value)
+        elif isinstance(value, str):
+            value = value.casefold()
+        return 0, value, task_id
@@ -0,0 +1,334 @@
+import os
+import uuid
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Iterable, Iterator, List, Optional, Tuple
+from organize_me.app.exceptions import TaskNotFoundError, DuplicateIdError
+from organize_me.app.task import Task
+from organize_me.app.api import Api
+from organize_me.app.task_api import TaskApi
+from organize_me.app.search_index import tokenize
+from organize_me.app.tag_filter import TagFilter, parse_tag_filter
+
+
+class SqliteTaskApi(Api):
+    """
+    Task storage backed by a local SQLite file.
+
+    Only the rows a query asks for are loaded, every mutation is a single row write, and the
+    date and title columns are indexed so lookups and range queries do not scan the table. The words
+    of titles and descriptions are kept in their own table, ordered by word, for prefix search, and so
+    are the case-folded tags, for tag filters. Tags are stored space-separated in the tasks table.
+    Task ids are uuid4 integers that do not fit a 64-bit INTEGER column, so they are stored as text.
+    Dates are stored as fixed-width ISO strings, which keeps their text order chronological.
+    """
+    DB_FILE = os.path.join(os.getcwd(), 'tasks.db')
+    COLUMNS = list(Task.model_fields.keys())
+    TAGS_COLUMN = COLUMNS.index('tags')
+    DATE_COLUMNS = frozenset(('create_date', 'update_date', 'start_date', 'end_date'))
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            create_date TEXT NOT NULL,
+            update_date TEXT NOT NULL,
+            start_date TEXT,
+            end_date TEXT,
+            tags TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS tasks_start_date ON tasks (start_date);
+        CREATE INDEX IF NOT EXISTS tasks_end_date ON tasks (end_date);
+        CREATE INDEX IF NOT EXISTS tasks_update_date ON tasks (update_date);
+        CREATE INDEX IF NOT EXISTS tasks_title ON tasks (title);
+        CREATE INDEX IF NOT EXISTS tasks_title_nocase ON tasks (title COLLATE NOCASE);
+        CREATE TABLE IF NOT EXISTS task_words (
+            word TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            PRIMARY KEY (word, task_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS task_words_task_id ON task_words (task_id);
+        CREATE TABLE IF NOT EXISTS task_tags (
+            tag TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            PRIMARY KEY (tag, task_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS task_tags_task_id ON task_tags (task_id);
+    """
+
+    def __init__(self, db_file: Optional[str] = None):
+        self.connection = sqlite3.connect(db_file or self.DB_FILE)
+        self._in_transaction = False
+        self.connection.executescript(self.SCHEMA)
+        if 'tags' not in [column[1] for column in self.connection.execute("PRAGMA table_info(tasks)")]:
+            # databases created before tasks had tags
+            with self.connection:
+                self.connection.execute("ALTER TABLE tasks ADD COLUMN tags TEXT NOT NULL DEFAULT ''")
+        if self.connection.execute("SELECT 1 FROM task_words LIMIT 1").fetchone() is None:
+            # databases created before the words table existed
+            with self.connection:
+                self._index_words(Task.model_validate(dict(zip(self.COLUMNS, self._row_to_values(row))))
+                                  for row in self.connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM tasks"))
+
+    def fields(self) -> dict[str, Callable[[str], Any]]:
+        return Task.fields()
+
+    def data(self) -> tuple[List[str], List[List[Any]]]:
+        cursor = self.connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM tasks ORDER BY rowid")
+        return self.columns(), [self._row_to_values(row) for row in cursor]
+
+    def columns(self) -> List[str]:
+        return list(self.COLUMNS)
+
+    def count(self) -> int:
+        count: int = self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        return count
+
+    def page(self, offset: int, limit: int, sort_by: Optional[str] = None) -> List[List[Any]]:
+        if sort_by is None:
+            order = "rowid"
+        elif sort_by in self.COLUMNS:
+            # walks the index of the column, titles in case-insensitive order like TaskApi
+            collation = " COLLATE NOCASE" if sort_by == 'title' else ""
+            order = f"{sort_by}{collation} NULLS LAST, rowid"
+        else:
+            raise ValueError(f"cannot sort by {sort_by}, not a column")
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks ORDER BY {order} LIMIT ? OFFSET ?", (limit, offset)
+        )
+        return [self._row_to_values(row) for row in cursor]
+
+    def sort_columns(self) -> List[str]:
+        return ['start_date', 'update_date', 'title']
+
+    def search(self, query: str, limit: int) -> List[List[Any]]:
+        words = set(tokenize(query))
+        if not words:
+            return []
+        # every query word matches the words it is a prefix of, a range scan of the primary key
+        matches = ' INTERSECT '.join(["SELECT task_id FROM task_words WHERE word >= ? AND word < ?"] * len(words))
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE id IN ({matches}) ORDER BY rowid LIMIT ?",
+            (*(bound for word in words for bound in (word, word + '\U0010ffff')), limit),
+        )
+        return [self._row_to_values(row) for row in cursor]
+
+    def filter_by_tags(self, expression: str, limit: int) -> List[List[Any]]:
+        sql, parameters = self._tag_filter_sql(parse_tag_filter(expression))
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE id IN ({sql}) ORDER BY rowid LIMIT ?",
+            (*parameters, limit),
+        )
+        return [self._row_to_values(row) for row in cursor]
+
+    def tags(self) -> List[str]:
+        return [tag for tag, in self.connection.execute("SELECT DISTINCT tag FROM task_tags ORDER BY tag")]
+
+    @classmethod
+    def _tag_filter_sql(cls, tag_filter: TagFilter) -> Tuple[str, List[str]]:
+        # every node is a query of the ids passing it, combined by compound selects
+        operator, *operands = tag_filter
+        if operator == 'tag':
+            return "SELECT task_id FROM task_tags WHERE tag = ?", [operands[0]]
+        if operator == 'not':
+            sql, parameters = cls._tag_filter_sql(operands[0])
+            return f"SELECT id FROM tasks EXCEPT SELECT * FROM ({sql})", parameters
+        (left, left_parameters), (right, right_parameters) = map(cls._tag_filter_sql, operands)
+        compound = "INTERSECT" if operator == 'and' else "UNION"
+        return f"SELECT * FROM ({left}) {compound} SELECT * FROM ({right})", left_parameters + right_parameters
+
+    def add(self, **kwargs: Any) -> int:
+        if 'id' in kwargs and self._exists(kwargs['id']):
+            raise DuplicateIdError(kwargs['id'])
+        task_id: int = self._generate_task_id() if 'id' not in kwargs else kwargs['id']
+        data = self.serialize_data(**kwargs)
+        data.pop('id', None)
+        task = Task(id=task_id, **data)
+        with self._write():
+            self.connection.execute(
+                f"INSERT INTO tasks ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                self._task_to_row(task),
+            )
+            self._index_words([task])
+            self._index_tags([task])
+        return task_id
+
+    def update(self, o_id: int, **kwargs: Any) -> None:
+        task = self.get_task(o_id)
+        task.update(**kwargs)
+        assignments = ', '.join(f'{column} = ?' for column in self.COLUMNS[1:])
+        with self._write():
+            self.connection.execute(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                                    (*self._task_to_row(task)[1:], str(o_id)))
+            self.connection.execute("DELETE FROM task_words WHERE task_id = ?", (str(o_id),))
+            self.connection.execute("DELETE FROM task_tags WHERE task_id = ?", (str(o_id),))
+            self._index_words([task])
+            self._index_tags([task])
+
+    def delete(self, o_id: int) -> None:
+        with self._write():
+            cursor = self.connection.execute("DELETE FROM tasks WHERE id = ?", (str(o_id),))
+            self.connection.execute("DELETE FROM task_words WHERE task_id = ?", (str(o_id),))
+            self.connection.execute("DELETE FROM task_tags WHERE task_id = ?", (str(o_id),))
+        if cursor.rowcount == 0:
+            raise TaskNotFoundError(o_id)
+
+    def get_task(self, task_id: int) -> Task:
+        row = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE id = ?", (str(task_id),)
+        ).fetchone()
+        if row is None:
+            raise TaskNotFoundError(task_id)
+        return Task.model_validate(dict(zip(self.COLUMNS, self._row_to_values(row))))
+
+    def tasks_starting_between(self, start: datetime, end: datetime) -> List[Task]:
+        """
+        Get the tasks whose start date falls within a range, served by the start_date index
+
+        Args:
+            :param start: the earliest start date (inclusive)
+            :param end: the latest start date (inclusive)
+
+        Returns:
+            list: the matching tasks ordered by start date
+        """
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE start_date BETWEEN ? AND ? ORDER BY start_date",
+            (self._date_to_str(start), self._date_to_str(end)),
+        )
+        return [Task.model_validate(dict(zip(self.COLUMNS, self._row_to_values(row)))) for row in cursor]
+
+    def tasks_overlapping(self, start: datetime, end: datetime) -> List[Task]:
+        """
+        Get the tasks whose start_date/end_date range overlaps a range
+
+        Args:
+            :param start: the start of the range (inclusive)
+            :param end: the end of the range (inclusive)
+
+        Returns:
+            list: the matching tasks ordered by start date
+        """
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE start_date <= ? AND end_date >= ? ORDER BY start_date",
+            (self._date_to_str(end), self._date_to_str(start)),
+        )
+        return [Task.model_validate(dict(zip(self.COLUMNS, self._row_to_values(row)))) for row in cursor]
+
+    def migrate_from_task_api(self, task_api: Optional[TaskApi] = None) -> int:
+        """
+        Import the tasks persisted by TaskApi (its snapshot, JSON or binary, plus its journal) into the database
+
+        Args:
+            :param task_api: the store to migrate, the one of the TaskApi files when None
+
+        Returns:
+            int: the number of migrated tasks
+        """
+        source = TaskApi() if task_api is None else task_api
+        try:
+            return self.import_tasks(source.tasks.values())
+        finally:
+            if task_api is None:
+                source.close()
+
+    def import_tasks(self, tasks: Iterable[Task], batch_size: int = 1000) -> int:
+        """
+        Add (or replace, by id) many validated tasks in a single transaction
+
+        Args:
+            :param tasks: the tasks to store, consumed a batch at a time
+            :param batch_size: the number of tasks written per statement batch
+
+        Returns:
+            int: the number of stored tasks
+        """
+        count = 0
+        task_iterator = iter(tasks)
+        with self._write():
+            while batch := list(islice(task_iterator, batch_size)):
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO tasks ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    (self._task_to_row(task) for task in batch),
+                )
+                for table in ('task_words', 'task_tags'):
+                    self.connection.executemany(f"DELETE FROM {table} WHERE task_id = ?",
+                                                ((str(task.id),) for task in batch))
+                self._index_words(batch)
+                self._index_tags(batch)
+                count += len(batch)
+        return count
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterator[List[Any]]:
+        cursor = self.connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM tasks ORDER BY rowid")
+        while rows := cursor.fetchmany(batch_size):
+            yield from (self._row_to_values(row) for row in rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run the changes of the block in a single SQLite transaction, committed when the block ends."""
+        if self._in_transaction:  # nested, committed or rolled back with the outer transaction
+            yield
+            return
+        self._in_transaction = True
+        try:
+            with self.connection:
+                yield
+        finally:
+            self._in_transaction = False
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _write(self) -> ContextManager[Any]:
+        # a transaction of its own for every write, unless it is part of a larger one
+        if self._in_transaction:
+            return nullcontext()
+        return self.connection
+
+    def _index_words(self, tasks: Iterable[Task]) -> None:
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO task_words (word, task_id) VALUES (?, ?)",
+            ((word, str(task.id)) for task in tasks
+             for word in set(tokenize(task.title) + tokenize(task.description or ''))),
+        )
+
+    def _index_tags(self, tasks: Iterable[Task]) -> None:
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO task_tags (tag, task_id) VALUES (?, ?)",
+            ((tag.casefold(), str(task.id)) for task in tasks for tag in task.tags),
+        )
+
+    def _exists(self, task_id: int) -> bool:
+        return self.connection.execute("SELECT 1 FROM tasks WHERE id = ?", (str(task_id),)).fetchone() is not None
+
+    def _generate_task_id(self) -> int:
+        while True:
+            task_id = uuid.uuid4().int
+            if not self._exists(task_id):
+                return task_id
+
+    @classmethod
+    def _task_to_row(cls, task: Task) -> Tuple[Any, ...]:
+        values = [getattr(task, column) for column in cls.COLUMNS]
+        values[0] = str(values[0])
+        values[cls.TAGS_COLUMN] = ' '.join(values[cls.TAGS_COLUMN])
+        return tuple(cls._date_to_str(value) if isinstance(value, datetime) else value for value in values)
+
+    @classmethod
+    def _row_to_values(cls, row: Tuple[Any, ...]) -> List[Any]:
+        values: List[Any] = [
+            datetime.fromisoformat(value) if value is not None and column in cls.DATE_COLUMNS else value
+            for column, value in zip(cls.COLUMNS, row)
+        ]
+        values[0] = int(values[0])
+        tags = values[cls.TAGS_COLUMN]
+        values[cls.TAGS_COLUMN] = tuple(tags.split(' ')) if tags else ()
+        return values
+
+    @staticmethod
+    def _date_to_str(date: datetime) -> str:
+        return date.isoformat(timespec='microseconds')
@@ -0,0 +1,100 @@
+"""
+Tag filter expressions, e.g. ``work and not (done or archived)``.
+
+    expression  := term ('or' term)*
+    term        := factor (['and'] factor)*     -- tags next to each other are and-ed
+    factor      := 'not' factor | '(' expression ')' | tag
+
+Keywords and tags are case-insensitive, ``-tag`` is a shorthand for ``not tag``. A parsed expression
+is a tree of tuples: ``('tag', name)``, ``('not', operand)``, ``('and', left, right)`` and
+``('or', left, right)``, evaluated by the tag index, the SQL of SqliteTaskApi or matches().
+"""
+
+import re
+from typing import Any, Collection, List, Tuple
+from organize_me.app.exceptions import TagFilterSyntaxError
+
+TagFilter = Tuple[Any, ...]
+
+TOKEN = re.compile(r'\s*(\(|\)|-|[^\s()]+)')
+KEYWORDS = ('and', 'or', 'not')
+
+
+def parse_tag_filter(expression: str) -> TagFilter:
+    """
+    Parse a tag filter expression
+
+    Args:
+        :param expression: the expression, see the module documentation for the syntax
+
+    Returns:
+        tuple: the expression tree
+    """
+    tokens: List[str] = TOKEN.findall(expression.casefold())
+    if not tokens:
+        raise TagFilterSyntaxError(expression, "no tag given")
+    position = 0
+
+    def peek() -> str:
+        return tokens[position] if position < len(tokens) else ''
+
+    def take() -> str:
+        nonlocal position
+        if position == len(tokens):
+            raise TagFilterSyntaxError(expression, "unexpected end")
+        position += 1
+        return tokens[position - 1]
+
+    def parse_expression() -> TagFilter:
+        node = parse_term()
+        while peek() == 'or':
+            take()
+            node = ('or', node, parse_term())
+        return node
+
+    def parse_term() -> TagFilter:
+        node = parse_factor()
+        while peek() not in ('', 'or', ')'):
+            if peek() == 'and':
+                take()
+            node = ('and', node, parse_factor())
+        return node
+
+    def parse_factor() -> TagFilter:
+        token = take()
+        if token in ('not', '-'):
+            return 'not', parse_factor()
+        if token == '(':
+            node = parse_expression()
+            if take() != ')':
+                raise TagFilterSyntaxError(expression, "missing closing parenthesis")
+            return node
+        if token in (')', 'and', 'or'):
+            raise TagFilterSyntaxError(expression, f"unexpected {token!r}")
+        return 'tag', token
+
+    tree = parse_expression()
+    if position != len(tokens):
+        raise TagFilterSyntaxError(expression, f"unexpected {peek()!r}")
+    return tree
+
+
+def matches(tag_filter: TagFilter, tags: Collection[str]) -> bool:
+    """
+    Check the tags of a single task against a parsed filter
+
+    Args:
+        :param tag_filter: the expression tree
+        :param tags: the case-folded tags of the task
+
+    Returns:
+        bool: whether the task passes the filter
+    """
+    operator, *operands = tag_filter
+    if operator == 'tag':
+        return operands[0] in tags
+    if operator == 'not':
+        return not matches(operands[0], tags)
+    if operator == 'and':
+        return matches(operands[0], tags) and matches(operands[1], tags)
+    return matches(operands[0], tags) or matches(operands[1], tags)
@@ -0,0 +1,137 @@
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+from organize_me.app.task import Task
+from organize_me.app.task_index import TaskIndex
+from organize_me.app.tag_filter import TagFilter
+
+
+class TagIndex(TaskIndex):
+    """
+    Bitmap index of the tags of the tasks.
+
+    Every task gets a slot, a bit position, and every tag a bitmap of the slots of its tasks, held
+    in a Python int: an arbitrary-length bitset whose and/or/not run over machine words in C. A tag
+    filter is evaluated as a handful of bitmap operations, whatever the number of tasks. The slots
+    of removed tasks are reused, so the bitmaps stay as long as the task count.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[int, int] = {}  # task id -> slot
+        self._ids: List[int] = []  # slot -> task id, 0 for a free slot
+        self._free: List[int] = []  # slots of removed tasks
+        self._live = 0  # bitmap of the used slots, the complement of a tag is taken within it
+        self._bitmaps: Dict[str, int] = {}  # case-folded tag -> bitmap of the tasks holding it
+        self._tags: Dict[int, FrozenSet[str]] = {}  # task id -> its case-folded tags, to remove it by id
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, task: Task) -> None:
+        self.add_tags(task.id, task.tags)
+
+    def add_tags(self, task_id: int, tags: Iterable[str]) -> None:
+        """
+        Index the tags of a task that is not in the index
+
+        Args:
+            :param task_id: the id of the task
+            :param tags: the tags of the task
+        """
+        bit = 1 << self._take_slot(task_id)
+        self._live |= bit
+        folded = self._tags[task_id] = frozenset(tag.casefold() for tag in tags)
+        for tag in folded:
+            self._bitmaps[tag] = self._bitmaps.get(tag, 0) | bit
+
+    def remove(self, task_id: int) -> None:
+        slot = self._slots.pop(task_id, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        self._live &= mask
+        for tag in self._tags.pop(task_id):
+            bitmap = self._bitmaps[tag] & mask
+            if bitmap:
+                self._bitmaps[tag] = bitmap
+            else:
+                del self._bitmaps[tag]
+        self._ids[slot] = 0
+        self._free.append(slot)
+
+    def build(self, tasks: Iterable[Task]) -> None:
+        self.build_tags((task.id, task.tags) for task in tasks)
+
+    def build_tags(self, tags: Iterable[Tuple[int, Iterable[str]]]) -> None:
+        """
+        Index many tasks at once, setting the bits of every bitmap in one go
+
+        Args:
+            :param tags: the id and the tags of every task
+        """
+        new_slots: List[int] = []
+        slots: Dict[str, List[int]] = {}
+        for task_id, task_tags in tags:
+            slot = self._take_slot(task_id)
+            new_slots.append(slot)
+            folded = self._tags[task_id] = frozenset(tag.casefold() for tag in task_tags)
+            for tag in folded:
+                slots.setdefault(tag, []).append(slot)
+        # a bitmap built bit by bit is copied on every bit, a bit string is parsed once
+        self._live |= _bitmap(new_slots)
+        for tag, tag_slots in slots.items():
+            self._bitmaps[tag] = self._bitmaps.get(tag, 0) | _bitmap(tag_slots)
+
+    def _take_slot(self, task_id: int) -> int:
+        slot = self._free.pop() if self._free else len(self._ids)
+        if slot == len(self._ids):
+            self._ids.append(task_id)
+        else:
+            self._ids[slot] = task_id
+        self._slots[task_id] = slot
+        return slot
+
+    def tags(self) -> List[str]:
+        """Get every indexed tag, case-folded and sorted."""
+        return sorted(self._bitmaps)
+
+    def count(self, tag_filter: TagFilter) -> int:
+        """Count the tasks passing a parsed tag filter."""
+        return self.evaluate(tag_filter).bit_count()
+
+    def filter(self, tag_filter: TagFilter, limit: int) -> List[int]:
+        """
+        Find the tasks passing a tag filter
+
+        Args:
+            :param tag_filter: a filter parsed by parse_tag_filter
+            :param limit: the maximal number of results
+
+        Returns:
+            list: the ids of the matching tasks
+        """
+        bits = format(self.evaluate(tag_filter), 'b')[::-1]  # bit string, slot 0 first
+        ids: List[int] = []
+        slot = bits.find('1')
+        while slot != -1 and len(ids) < limit:
+            ids.append(self._ids[slot])
+            slot = bits.find('1', slot + 1)
+        return ids
+
+    def evaluate(self, tag_filter: TagFilter) -> int:
+        """Compute the bitmap of the tasks passing a parsed tag filter."""
+        operator, *operands = tag_filter
+        if operator == 'tag':
+            return self._bitmaps.get(operands[0], 0)
+        if operator == 'not':
+            return self._live & ~self.evaluate(operands[0])
+        if operator == 'and':
+            return self.evaluate(operands[0]) & self.evaluate(operands[1])
+        return self.evaluate(operands[0]) | self.evaluate(operands[1])
+
+
+def _bitmap(slots: List[int]) -> int:
+    if not slots:
+        return 0
+    bits = bytearray(b'0') * (max(slots) + 1)  # slot 0 first
+    for slot in slots:
+        bits[slot] = ord('1')
+    return int(bits[::-1], 2)
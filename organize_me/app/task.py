@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional, ClassVar, Any, Dict, Callable, Union
-from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
+from typing import Optional, ClassVar, Any, Dict, Callable, Union, Iterable, Tuple
+from pydantic import BaseModel, ValidationError, Field, field_validator, model_validator, ConfigDict
 
 
 class Task(BaseModel):
@@ -11,6 +11,7 @@ class Task(BaseModel):
     ERROR_DATE_RANGE_MISSING: ClassVar[str] = "Both start and end dates must be provided."
     ERROR_END_DATE_BEFORE_START: ClassVar[str] = "End date cannot be before the start date."
     ERROR_CREATE_DATE_IN_FUTURE: ClassVar[str] = "Creation date cannot be set in the future."
+    ERROR_TAG_INVALID: ClassVar[str] = "Tags cannot be empty or contain whitespace or commas."
 
     id: int = Field(frozen=True)
     title: str = Field(...)
@@ -19,6 +20,7 @@ class Task(BaseModel):
     update_date: datetime = Field(default_factory=datetime.now)
     start_date: Optional[datetime] = Field(default=None)
     end_date: Optional[datetime] = Field(default=None)
+    tags: Tuple[str, ...] = Field(default=())
 
     @staticmethod
     def fields() -> Dict[str, Callable[[str], Any]]:
@@ -30,6 +32,11 @@ class Task(BaseModel):
                 return date_input
             return None
 
+        def tags_convert(tags_input: Union[str, None, Iterable[str]]) -> Tuple[str, ...]:
+            if isinstance(tags_input, str):
+                return tuple(tag.strip() for tag in tags_input.split(',') if tag.strip())
+            return tuple(tags_input or ())
+
         return {
             "id": int,
             "title": str,
@@ -38,6 +45,7 @@ class Task(BaseModel):
             "update_date": lambda x: date_convert(x),
             "start_date": lambda x: date_convert(x),
             "end_date": lambda x: date_convert(x),
+            "tags": lambda x: tags_convert(x),
         }
 
     # noinspection PyNestedDecorators
@@ -62,6 +70,22 @@ class Task(BaseModel):
     def validate_description(cls, value: Optional[str]) -> Optional[str]:
         return value.strip() if value else value
 
+    # noinspection PyNestedDecorators
+    @field_validator('tags', mode='before')
+    @classmethod
+    def split_tags(cls, value: Any) -> Any:
+        # tags typed as text are comma-separated
+        return [tag for tag in value.split(',') if tag.strip()] if isinstance(value, str) else value
+
+    # noinspection PyNestedDecorators
+    @field_validator('tags')
+    @classmethod
+    def validate_tags(cls, value: Tuple[str, ...]) -> Tuple[str, ...]:
+        tags = tuple(dict.fromkeys(tag.strip() for tag in value))  # without duplicates, in order
+        if any(not tag or ',' in tag or any(char.isspace() for char in tag) for tag in tags):
+            raise ValueError(cls.ERROR_TAG_INVALID)
+        return tags
+
     # noinspection PyNestedDecorators
     @field_validator('create_date')
     @classmethod
@@ -88,10 +112,20 @@ class Task(BaseModel):
             self.update_date = datetime.now()
 
     def update(self, **kwargs: Any) -> None:
-        for field, value in kwargs.items():
-            if value is not None and field in self.model_fields:
-                setattr(self, field, value)
-        self.__validate__()
-
-    def __validate__(self) -> None:
-        self.__class__.model_validate(self.model_dump())
+        """
+        Apply several changes at once: the task is validated a single time with all of them applied
+        (field validators and the date range alike) and update_date is bumped once. Nothing is changed
+        when the validation fails. None values and unknown fields are ignored.
+        """
+        changes = {field: value for field, value in kwargs.items()
+                   if value is not None and field in self.__class__.model_fields}
+        if not changes:
+            return
+        for field, value in changes.items():
+            if self.__class__.model_fields[field].frozen:
+                raise ValidationError.from_exception_data(
+                    self.__class__.__name__, [{'type': 'frozen_field', 'loc': (field,), 'input': value}]
+                )
+        validated = self.__class__.model_validate({**self.__dict__, 'update_date': datetime.now(), **changes})
+        self.__dict__.update(validated.__dict__)
+        self.__pydantic_fields_set__.update(changes, ('update_date',))
@@ -1,59 +1,409 @@
 import os
-import json
+import mmap
 import uuid
-from typing import Optional, Dict, Any, List, Callable
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+from typing import Optional, Dict, Any, List, Callable, Set, MutableMapping, Iterable, Iterator, TypeVar, cast
 from organize_me.app.exceptions import TaskNotFoundError, DuplicateIdError
 from organize_me.app.task import Task
 from organize_me.app.api import Api
+from organize_me.app.task_journal import TaskJournal
+from organize_me.app.binary_snapshot import BinaryTasks, dump_binary, load_binary
+from organize_me.app.task_columns import TaskColumns
+from organize_me.app.task_index import TaskIndex
+from organize_me.app.search_index import SearchIndex
+from organize_me.app.interval_index import IntervalIndex
+from organize_me.app.sort_index import SortIndex
+from organize_me.app.tag_index import TagIndex
+from organize_me.app.tag_filter import parse_tag_filter
+from organize_me.file_utils import Durability, atomic_write
+from organize_me.task_snapshot import dump_tasks, load_tasks
+
+IndexT = TypeVar('IndexT', bound=TaskIndex)
+
+
+class StorageFormat(str, Enum):
+    JSON = 'json'      # tasks.json, readable and portable
+    BINARY = 'binary'  # tasks.bin, columnar, fast cold start for large task lists
 
 
 class TaskApi(Api):
     JSON_FILE = os.path.join(os.getcwd(), 'tasks.json')
+    BINARY_FILE = os.path.join(os.getcwd(), 'tasks.bin')
+    JOURNAL_FILE = os.path.join(os.getcwd(), 'tasks.journal')
+    SEARCH_INDEX_FILE = os.path.join(os.getcwd(), 'tasks.search.json')
+    COMPACT_THRESHOLD = 1000  # journal records to accumulate before rewriting the snapshot
+    FLUSH_DELAY = 0.0  # seconds to wait for more edits before flushing, 0 flushes on every edit
+    DURABILITY = Durability.FSYNC_FILE
+    STORAGE_FORMAT = StorageFormat.JSON
+    SORT_COLUMNS = ('start_date', 'update_date', 'title')  # orders offered to the layout, any field can be sorted by
 
-    def __init__(self, tasks: Optional[Dict[int, Task]] = None):
-        self.tasks: Dict[int, Task] = tasks or self.read_json()
+    def __init__(self, tasks: Optional[Dict[int, Task]] = None, flush_delay: Optional[float] = None,
+                 durability: Optional[Durability] = None, storage_format: Optional[StorageFormat] = None):
+        self.durability = self.DURABILITY if durability is None else durability
+        self.storage_format = self.STORAGE_FORMAT if storage_format is None else storage_format
+        self.journal = TaskJournal(self.JOURNAL_FILE, self.durability)
+        self.flush_delay = self.FLUSH_DELAY if flush_delay is None else flush_delay
+        self._dirty: Set[int] = set()  # ids of tasks added, updated or deleted since the last flush
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()  # guards the tasks against the background flush
+        # tasks given by the caller are not what the snapshot on disk holds, so the first
+        # mutation has to write a full snapshot instead of journaling on top of a stale one
+        self._snapshot_stale = bool(tasks)
+        self.tasks: MutableMapping[int, Task] = tasks or self.read_tasks()
+        # ids of the tasks that differ from the snapshot on disk, an index saved with the snapshot is stale for them
+        self._changed_since_snapshot = set(self.journal.task_ids)
+        self._indexes: Dict[str, TaskIndex] = {}  # built on first use, by name
+        # during a transaction, the tasks changed by it as they were before, None for the added ones
+        self._undo: Optional[Dict[int, Optional[Task]]] = None
 
     def fields(self) -> dict[str, Callable[[str], Any]]:
         return Task.fields()
 
     def data(self) -> tuple[List[str], List[List[Any]]]:
-        return list(Task.model_fields.keys()), [list(task.__dict__.values()) for task in self.tasks.values()]
+        return self.columns(), self.read_columns(self.tasks).rows()
+
+    def columns(self) -> List[str]:
+        return list(Task.model_fields.keys())
+
+    def count(self) -> int:
+        return len(self.tasks)
+
+    def page(self, offset: int, limit: int, sort_by: Optional[str] = None) -> List[List[Any]]:
+        if sort_by is None:
+            return self.read_columns(islice(self.tasks, offset, offset + limit)).rows()
+        return self.read_columns(self._sort_index(sort_by).page(offset, limit)).rows()
+
+    def sort_columns(self) -> List[str]:
+        return list(self.SORT_COLUMNS)
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterator[List[Any]]:
+        task_ids = iter(list(self.tasks))  # a copy, the tasks may change between batches
+        while batch := list(islice(task_ids, batch_size)):
+            with self._lock:
+                rows = self.read_columns(task_id for task_id in batch if task_id in self.tasks).rows()
+            yield from rows
+
+    def import_tasks(self, tasks: Iterable[Task]) -> int:
+        """
+        Add (or replace, by id) many validated tasks with a single write: a full snapshot, journaling
+        every task would write them twice. The indexes are dropped and rebuilt on their next use,
+        which is cheaper than updating them task by task. Nothing is stored when iterating the tasks
+        raises.
+
+        Args:
+            :param tasks: the tasks to store, consumed once
+
+        Returns:
+            int: the number of stored tasks
+        """
+        with self._lock:
+            self._indexes.clear()
+            previous: Dict[int, Optional[Task]] = {}  # to undo the import when the tasks fail to come
+            count = 0
+            try:
+                for count, task in enumerate(tasks, 1):
+                    previous.setdefault(task.id, self.tasks.get(task.id))
+                    self.tasks[task.id] = task
+            except BaseException:
+                for task_id, previous_task in previous.items():
+                    if previous_task is None:
+                        del self.tasks[task_id]
+                    else:
+                        self.tasks[task_id] = previous_task
+                raise
+            if count:
+                self.save_tasks()
+            return count
+
+    def search(self, query: str, limit: int) -> List[List[Any]]:
+        return self.read_columns(self._search_index().search(query, limit)).rows()
+
+    def filter_by_tags(self, expression: str, limit: int) -> List[List[Any]]:
+        return self.read_columns(self._tag_index().filter(parse_tag_filter(expression), limit)).rows()
+
+    def tags(self) -> List[str]:
+        return self._tag_index().tags()
+
+    def tasks_starting_between(self, start: datetime, end: datetime) -> List[Task]:
+        """
+        Get the tasks whose start date falls within a range
+
+        Args:
+            :param start: the earliest start date (inclusive)
+            :param end: the latest start date (inclusive)
+
+        Returns:
+            list: the matching tasks ordered by start date
+        """
+        return [self.tasks[task_id] for task_id in self._interval_index().starting_between(start, end)]
+
+    def tasks_overlapping(self, start: datetime, end: datetime) -> List[Task]:
+        """
+        Get the tasks whose start_date/end_date range overlaps a range, e.g. the tasks of a week
+
+        Args:
+            :param start: the start of the range (inclusive)
+            :param end: the end of the range (inclusive)
+
+        Returns:
+            list: the matching tasks ordered by start date
+        """
+        return [self.tasks[task_id] for task_id in self._interval_index().overlapping(start, end)]
+
+    def read_columns(self, task_ids: Iterable[int]) -> TaskColumns:
+        """
+        Read tasks for a bulk read path, without decoding the ones still in a binary snapshot into Task objects
+
+        Args:
+            :param task_ids: the ids of the tasks to read
+
+        Returns:
+            TaskColumns: the tasks, in the order of the ids
+        """
+        if isinstance(self.tasks, BinaryTasks):
+            return self.tasks.read_columns(task_ids)
+        return TaskColumns.from_tasks(self.tasks[task_id] for task_id in task_ids)
 
     def add(self, **kwargs: Any) -> int:
         if 'id' in kwargs and kwargs['id'] in self.tasks:
             raise DuplicateIdError(kwargs['id'])
         task_id: int = self._generate_task_id() if 'id' not in kwargs else kwargs['id']
         data = self.serialize_data(**kwargs)
-        self.tasks[task_id] = Task(id=task_id, **data)
+        with self._lock:
+            self._remember(task_id)
+            self.tasks[task_id] = Task(id=task_id, **data)
+            self._mark_changed(task_id)
         return task_id
 
     def update(self, o_id: int, **kwargs: Any) -> None:
-        self.get_task(o_id).update(**kwargs)
-        self.save_tasks()
+        with self._lock:
+            task = self.get_task(o_id)
+            self._remember(o_id)
+            task.update(**kwargs)
+            self.tasks[o_id] = task  # pins the task when the tasks are a lazily decoded snapshot
+            self._mark_changed(o_id)
 
     def delete(self, o_id: int) -> None:
-        if o_id not in self.tasks:
-            raise TaskNotFoundError(o_id)
-        self.tasks.pop(o_id)
-        self.save_tasks()
+        with self._lock:
+            if o_id not in self.tasks:
+                raise TaskNotFoundError(o_id)
+            self._remember(o_id)
+            self.tasks.pop(o_id)
+            self._mark_changed(o_id)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Hold the changes back until the block ends, then persist them like a single edit: one journal
+        write (or snapshot) for all of them. When the block raises, the changed tasks are put back as
+        they were. The lock is held throughout, the background flush cannot write half a transaction.
+        """
+        with self._lock:
+            if self._undo is not None:  # nested, committed or rolled back with the outer transaction
+                yield
+                return
+            undo: Dict[int, Optional[Task]] = {}
+            self._undo = undo
+            try:
+                yield
+            except BaseException:
+                for task_id, task in undo.items():
+                    if task is None:
+                        self.tasks.pop(task_id, None)
+                    else:
+                        self.tasks[task_id] = task
+                    self._mark_changed(task_id)  # reindexes it, the restored task is persisted like any change
+                raise
+            finally:
+                self._undo = None
+                if self._dirty:
+                    self._schedule_flush()
+
+    def flush(self) -> None:
+        """
+        Persist the tasks changed since the last flush, a single journal write for all of them.
+        Inside a transaction the changes wait for the end of the transaction.
+        """
+        with self._lock:
+            if self._undo is not None:
+                return
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            if self._snapshot_stale or len(self.journal) + len(self._dirty) > self.COMPACT_THRESHOLD:
+                self.save_tasks()
+            else:
+                self.journal.append(*(
+                    self.journal.put_record(self.tasks[task_id]) if task_id in self.tasks
+                    else self.journal.delete_record(task_id)
+                    for task_id in self._dirty
+                ))
+                self._dirty.clear()
+
+    def close(self) -> None:
+        """Flush the pending changes and close the memory map of the binary snapshot."""
+        with self._lock:
+            self.flush()
+            if isinstance(self.tasks, BinaryTasks):
+                self.tasks.close()
 
     def save_tasks(self) -> None:
-        with open(self.JSON_FILE, 'w') as outfile:
-            json.dump(self._tasks_to_json(self.tasks), outfile)
+        """Write a full snapshot of the tasks and truncate the journal it supersedes."""
+        with self._lock:
+            if self.storage_format == StorageFormat.BINARY:
+                atomic_write(self.BINARY_FILE, dump_binary(self.read_columns(self.tasks)), self.durability)
+                stale_snapshot = self.JSON_FILE
+                # map the new snapshot, the tasks pinned in memory since the last one are now part of it
+                previous, self.tasks = self.tasks, self.read_binary()
+                if isinstance(previous, BinaryTasks):
+                    previous.close()
+            else:
+                atomic_write(self.JSON_FILE, self._tasks_to_json(self.tasks), self.durability)
+                stale_snapshot = self.BINARY_FILE
+                if isinstance(self.tasks, BinaryTasks):  # the binary snapshot is removed, its tasks are read in
+                    previous, self.tasks = self.tasks, dict(self.tasks.items())
+                    previous.close()
+            # the journal is relative to the snapshot just written, a snapshot in the other format is not
+            if os.path.exists(stale_snapshot):
+                os.remove(stale_snapshot)
+            self.journal.clear()
+            self._snapshot_stale = False
+            self._dirty.clear()
+            self._changed_since_snapshot.clear()
+            if 'search' in self._indexes:
+                atomic_write(self.SEARCH_INDEX_FILE, self._search_index().dumps(snapshot=self._snapshot_stamp()),
+                             Durability.NONE)  # an index lost in a crash is rebuilt, no need to fsync it
+            elif os.path.exists(self.SEARCH_INDEX_FILE):
+                os.remove(self.SEARCH_INDEX_FILE)
+
+    def _mark_changed(self, task_id: int) -> None:
+        self._changed_since_snapshot.add(task_id)
+        for index in self._indexes.values():
+            index.remove(task_id)
+            if task_id in self.tasks:
+                index.add(self.tasks[task_id])
+        self._mark_dirty(task_id)
+
+    def _get_index(self, name: str, build: Callable[[], IndexT]) -> IndexT:
+        with self._lock:
+            if name not in self._indexes:
+                self._indexes[name] = build()
+            return cast(IndexT, self._indexes[name])
+
+    def _search_index(self) -> SearchIndex:
+        return self._get_index('search', self._load_search_index)
+
+    def _interval_index(self) -> IntervalIndex:
+        def build() -> IntervalIndex:
+            index = IntervalIndex()
+            columns = self.read_columns(self.tasks)  # without decoding a binary snapshot into Task objects
+            index.build_ranges(zip(columns.id, columns.start_date, columns.end_date))
+            return index
+        return self._get_index('interval', build)
+
+    def _tag_index(self) -> TagIndex:
+        def build() -> TagIndex:
+            index = TagIndex()
+            columns = self.read_columns(self.tasks)
+            index.build_tags(zip(columns.id, columns.tags))
+            return index
+        return self._get_index('tags', build)
+
+    def _sort_index(self, field: str) -> SortIndex:
+        if field not in Task.model_fields:
+            raise ValueError(f"cannot sort by {field}, not a Task field")
+
+        def build() -> SortIndex:
+            index = SortIndex(field)
+            columns = self.read_columns(self.tasks)
+            index.build_values(zip(columns.id, getattr(columns, field)))
+            return index
+        return self._get_index(f'sort:{field}', build)
+
+    def _load_search_index(self) -> SearchIndex:
+        """
+        Load the search index saved with the snapshot and bring it up to date with the journal,
+        or build it from the tasks when there is no usable saved index.
+        """
+        if not self._snapshot_stale and os.path.exists(self.SEARCH_INDEX_FILE):
+            try:
+                with open(self.SEARCH_INDEX_FILE) as file:
+                    index, metadata = SearchIndex.loads(file.read())
+            except (ValueError, KeyError):
+                index, metadata = SearchIndex(), {}
+            if metadata.get('snapshot') == self._snapshot_stamp():
+                for task_id in self._changed_since_snapshot:
+                    index.remove(task_id)
+                    if task_id in self.tasks:
+                        index.add(self.tasks[task_id])
+                return index
+        index = SearchIndex()
+        index.build(self.tasks.values())
+        return index
+
+    def _snapshot_stamp(self) -> Optional[List[Any]]:
+        # identifies the snapshot file an index was derived from
+        for path in (self.BINARY_FILE, self.JSON_FILE):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                return [os.path.basename(path), stat.st_mtime_ns, stat.st_size]
+        return None
+
+    def _remember(self, task_id: int) -> None:
+        # keeps the task as it was before the transaction first changed it, to roll it back
+        if self._undo is not None and task_id not in self._undo:
+            task = self.tasks.get(task_id)
+            self._undo[task_id] = task.model_copy() if task is not None else None  # update changes it in place
+
+    def _mark_dirty(self, task_id: int) -> None:
+        self._dirty.add(task_id)
+        if self._undo is None:  # a transaction flushes when it ends
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        # debounce: every edit pushes the flush back, so a burst of edits costs a single write
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+        self._flush_timer.start()
 
     @staticmethod
-    def _tasks_to_json(data: Dict[int, Task]) -> Dict[int, str]:
-        return {task_id: task.model_dump_json() for task_id, task in data.items()}
+    def _tasks_to_json(data: MutableMapping[int, Task]) -> bytes:
+        return dump_tasks(dict(data), Task)
 
     @staticmethod
-    def _json_to_tasks(data: Dict[int, str]) -> Dict[int, Task]:
-        return {int(task_id): Task.model_validate_json(task_json) for task_id, task_json in data.items()}
+    def _json_to_tasks(data: bytes) -> Dict[int, Task]:
+        return load_tasks(data, Task)
+
+    def read_tasks(self) -> MutableMapping[int, Task]:
+        """
+        Load the last snapshot and replay the journal written since on top of it. The snapshot may be
+        in the other storage format when the format was just switched, it is rewritten on the next save.
+        """
+        if self.storage_format == StorageFormat.BINARY and os.path.exists(self.BINARY_FILE):
+            tasks = self.read_binary()
+        elif os.path.exists(self.JSON_FILE):
+            tasks = self.read_json()
+        else:
+            tasks = self.read_binary() if os.path.exists(self.BINARY_FILE) else {}
+        return self.journal.replay(tasks)
 
     def read_json(self) -> Dict[int, Task]:
-        if os.path.exists(self.JSON_FILE):
-            with open(self.JSON_FILE, 'r') as file:
-                return self._json_to_tasks(json.load(file))
-        return {}
+        with open(self.JSON_FILE, 'rb') as file:
+            return self._json_to_tasks(file.read())
+
+    def read_binary(self) -> MutableMapping[int, Task]:
+        with open(self.BINARY_FILE, 'rb') as file:
+            return load_binary(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
 
     def _generate_task_id(self) -> int:
         while True:
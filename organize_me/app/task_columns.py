@@ -0,0 +1,50 @@
+from typing import Any, Iterable, List, Sequence, Tuple
+from organize_me.app.task import Task
+
+
+class TaskColumns:
+    """
+    Read-only struct-of-arrays model of tasks: one tuple per Task field, the i-th item of every tuple
+    belonging to the i-th task.
+
+    Bulk read paths (the rows of the table, snapshots) only need the values of the tasks, this holds
+    them without a pydantic object (and its validation machinery) per task. Tasks that are going to
+    be modified are still Task objects.
+    """
+    __slots__ = tuple(Task.model_fields)
+
+    id: Tuple[int, ...]
+    title: Tuple[str, ...]
+    description: Tuple[Any, ...]
+    create_date: Tuple[Any, ...]
+    update_date: Tuple[Any, ...]
+    start_date: Tuple[Any, ...]
+    end_date: Tuple[Any, ...]
+    tags: Tuple[Tuple[str, ...], ...]
+
+    def __init__(self, rows: Iterable[Sequence[Any]] = ()) -> None:
+        """
+        :param rows: the values of every task, in Task field order
+        """
+        columns = list(zip(*rows)) or [()] * len(self.__slots__)
+        for field, column in zip(self.__slots__, columns):
+            object.__setattr__(self, field, column)
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> 'TaskColumns':
+        return cls(tuple(task.__dict__.values()) for task in tasks)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def rows(self) -> List[List[Any]]:
+        """
+        Get the values of every task, the row format of Api.data
+
+        Returns:
+            list: a list of values per task, in Task field order
+        """
+        return [list(row) for row in zip(*(getattr(self, field) for field in self.__slots__))]
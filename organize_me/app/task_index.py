@@ -0,0 +1,40 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+from organize_me.app.task import Task
+
+
+class TaskIndex(ABC):
+    """
+    Secondary index over the tasks of an Api, kept up to date by the Api on every add/update/delete.
+    An index remembers what it derived from each task, so a task is removed by id alone.
+    """
+
+    @abstractmethod
+    def add(self, task: Task) -> None:
+        """
+        Index a task that is not in the index
+
+        Args:
+            :param task: the task to index
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, task_id: int) -> None:
+        """
+        Remove a task from the index, tasks that are not in the index are ignored
+
+        Args:
+            :param task_id: the id of the task to remove
+        """
+        pass
+
+    def reindex(self, task: Task) -> None:
+        """Update the index after the task changed."""
+        self.remove(task.id)
+        self.add(task)
+
+    def build(self, tasks: Iterable[Task]) -> None:
+        """Index all the given tasks."""
+        for task in tasks:
+            self.add(task)
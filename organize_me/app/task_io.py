@@ -0,0 +1,337 @@
+"""
+Bulk import and export of tasks as JSON Lines, CSV or iCalendar files.
+
+Files are streamed: records are read and validated a batch at a time, so the import pipeline holds a
+single batch whatever the size of the file (the task store itself holds what it always holds, every
+task for TaskApi, nothing for SqliteTaskApi). The batches go to the store in a single write.
+
+    JSON Lines  one task per line, the JSON of Task
+    CSV         a header row of Task field names, ISO dates and comma-separated tags
+    iCalendar   a VTODO per task: SUMMARY, DESCRIPTION, DTSTART, DUE, CATEGORIES, CREATED and
+                LAST-MODIFIED; VEVENTs (DTEND instead of DUE) are imported as well
+
+Records without an id get a new one, records holding the id of a stored task replace it, so importing
+an export restores it. iCalendar dates have no sub-second precision, and are imported as the naive
+local times of tasks: times in UTC or in a time zone are converted to local time.
+"""
+
+import os
+import csv
+import json
+import uuid
+from datetime import date, datetime, timezone
+from enum import Enum
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import TypeAdapter, ValidationError
+from organize_me.app.exceptions import TaskImportError
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from organize_me.app.sqlite_task_api import SqliteTaskApi
+
+TaskStore = Union[TaskApi, SqliteTaskApi]
+
+BATCH_SIZE = 1000  # records validated (and written) at a time
+TASK_FIELDS = tuple(Task.model_fields)
+TASK_LIST = TypeAdapter(List[Task])
+ICS_UID_DOMAIN = '@organize-me'
+ICS_LINE_OCTETS = 75  # longer content lines are folded
+
+
+class TaskFileFormat(str, Enum):
+    JSONL = 'jsonl'
+    CSV = 'csv'
+    ICS = 'ics'
+
+    @classmethod
+    def from_path(cls, path: str) -> 'TaskFileFormat':
+        """Guess the format of a file from its extension."""
+        extension = os.path.splitext(path)[1].lower().lstrip('.')
+        formats = {'jsonl': cls.JSONL, 'ndjson': cls.JSONL, 'csv': cls.CSV, 'ics': cls.ICS, 'ical': cls.ICS}
+        if extension not in formats:
+            raise ValueError(f"Unknown task file format {extension!r}, expected one of {', '.join(formats)}")
+        return formats[extension]
+
+
+class ImportResult(NamedTuple):
+    imported: int
+    skipped: int  # invalid records, only skipped when asked to
+
+
+def import_tasks(store: TaskStore, path: str, file_format: Optional[TaskFileFormat] = None,
+                 skip_invalid: bool = False, batch_size: int = BATCH_SIZE) -> ImportResult:
+    """
+    Import the tasks of a file
+
+    Args:
+        :param store: the API to add the tasks to
+        :param path: the file to import
+        :param file_format: the format of the file, guessed from its extension by default
+        :param skip_invalid: skip the records that are not valid tasks instead of raising TaskImportError,
+            nothing is imported when it is raised
+        :param batch_size: the number of records validated at a time
+
+    Returns:
+        ImportResult: the number of imported and skipped records
+    """
+    file_format = file_format or TaskFileFormat.from_path(path)
+    record_count = 0
+
+    def counted(records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal record_count
+        for record_count, record in enumerate(records, 1):
+            yield record
+
+    with open(path, newline='', encoding='utf-8') as file:
+        batches = validate_batches(counted(read_records(file, file_format)), batch_size, skip_invalid)
+        imported = store.import_tasks(task for batch in batches for task in batch)
+    return ImportResult(imported, record_count - imported)
+
+
+def export_tasks(store: TaskStore, path: str, file_format: Optional[TaskFileFormat] = None) -> int:
+    """
+    Export every task to a file, streaming them out of the store
+
+    Args:
+        :param store: the API to export the tasks of
+        :param path: the file to write
+        :param file_format: the format of the file, guessed from its extension by default
+
+    Returns:
+        int: the number of exported tasks
+    """
+    file_format = file_format or TaskFileFormat.from_path(path)
+    columns = store.columns()
+    records = (dict(zip(columns, row)) for row in store.iter_rows(BATCH_SIZE))
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        return write_records(file, records, file_format)
+
+
+def read_records(file: TextIO, file_format: TaskFileFormat) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the raw records of a task file, as dicts of Task fields to be validated
+
+    Args:
+        :param file: the file, opened in text mode (with newline='' for CSV)
+        :param file_format: the format of the file
+
+    Returns:
+        iterator: a dict per record
+    """
+    if file_format == TaskFileFormat.JSONL:
+        return (json.loads(line) for line in file if line.strip())
+    if file_format == TaskFileFormat.CSV:
+        # empty cells are missing values, the defaults of Task apply
+        return ({field: value for field, value in row.items() if value != ''} for row in csv.DictReader(file))
+    return _read_ics(file)
+
+
+def write_records(file: TextIO, records: Iterable[Dict[str, Any]], file_format: TaskFileFormat) -> int:
+    """
+    Write task records, dicts of Task field values
+
+    Args:
+        :param file: the file, opened in text mode (with newline='' for CSV)
+        :param records: the records to write
+        :param file_format: the format of the file
+
+    Returns:
+        int: the number of written records
+    """
+    count = 0
+    if file_format == TaskFileFormat.JSONL:
+        for count, record in enumerate(records, 1):
+            file.write(json.dumps({field: _to_text(value) if isinstance(value, datetime) else value
+                                   for field, value in record.items()}) + '\n')
+    elif file_format == TaskFileFormat.CSV:
+        writer = csv.writer(file)
+        writer.writerow(TASK_FIELDS)
+        for count, record in enumerate(records, 1):
+            writer.writerow(_to_text(record.get(field)) for field in TASK_FIELDS)
+    else:
+        file.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//organize_me//tasks//EN\r\n')
+        for count, record in enumerate(records, 1):
+            file.write(''.join(_fold(line) for line in _ics_lines(record)))
+        file.write('END:VCALENDAR\r\n')
+    return count
+
+
+def validate_batches(records: Iterable[Dict[str, Any]], batch_size: int = BATCH_SIZE,
+                     skip_invalid: bool = False) -> Iterator[List[Task]]:
+    """
+    Turn raw records into tasks, validating a whole batch in one pydantic call
+
+    Args:
+        :param records: the raw records, records without an id are given a new one
+        :param batch_size: the number of records validated at a time
+        :param skip_invalid: skip invalid records instead of raising TaskImportError
+
+    Returns:
+        iterator: the valid tasks of every batch
+    """
+    position = 0
+    record_iterator = iter(records)
+    while batch := list(islice(record_iterator, batch_size)):
+        without_id = [record for record in batch if record.get('id') in (None, '')]
+        for record, task_id in zip(without_id, new_task_ids(len(without_id))):
+            record['id'] = task_id
+        try:
+            tasks = TASK_LIST.validate_python(batch)
+        except (ValidationError, TypeError):  # TypeError: the validators comparing naive and aware dates
+            # find the invalid records, a record at a time
+            tasks = []
+            for number, record in enumerate(batch, position + 1):
+                try:
+                    tasks.append(Task.model_validate(record))
+                except (ValidationError, TypeError) as error:
+                    if not skip_invalid:
+                        raise TaskImportError(number, str(error)) from error
+        position += len(batch)
+        yield tasks
+
+
+def new_task_ids(count: int) -> List[int]:
+    """
+    Generate uuid4 task ids, the ids TaskApi gives new tasks.
+    The odds of a collision with an existing id are those of uuid4, the ids are not checked.
+    """
+    return [uuid.uuid4().int for _ in range(count)]
+
+
+def _to_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return ','.join(value)
+    return str(value)
+
+
+def _read_ics(file: TextIO) -> Iterator[Dict[str, Any]]:
+    record: Optional[Dict[str, Any]] = None
+    nesting = 0  # depth of the components nested in the task (alarms), their properties are not the task's
+    for name, parameters, value in _ics_content_lines(file):
+        if name == 'BEGIN' and value in ('VTODO', 'VEVENT'):
+            record = {}
+        elif record is None:
+            continue
+        elif name in ('BEGIN', 'END') and (nesting or name == 'BEGIN'):
+            nesting += 1 if name == 'BEGIN' else -1
+        elif nesting:
+            continue
+        elif name == 'END' and value in ('VTODO', 'VEVENT'):
+            # a task has both dates or none
+            record.setdefault('start_date', record.get('end_date'))
+            record.setdefault('end_date', record.get('start_date'))
+            yield record
+            record = None
+        elif name == 'UID' and value.endswith(ICS_UID_DOMAIN) and value[:-len(ICS_UID_DOMAIN)].isdigit():
+            record['id'] = int(value[:-len(ICS_UID_DOMAIN)])
+        elif name == 'SUMMARY':
+            record['title'] = _ics_unescape(value)
+        elif name == 'DESCRIPTION':
+            record['description'] = _ics_unescape(value)
+        elif name == 'CATEGORIES':
+            # tags are single words
+            record['tags'] = [*record.get('tags', ()),
+                              *('-'.join(_ics_unescape(category).split()) for category in _ics_split(value))]
+        elif name in ('DTSTART', 'DTEND', 'DUE', 'CREATED', 'LAST-MODIFIED'):
+            field = {'DTSTART': 'start_date', 'DTEND': 'end_date', 'DUE': 'end_date',
+                     'CREATED': 'create_date', 'LAST-MODIFIED': 'update_date'}[name]
+            record[field] = _ics_date(value, parameters.get('TZID'))
+
+
+def _ics_content_lines(file: TextIO) -> Iterator[tuple[str, Dict[str, str], str]]:
+    # unfold the continuation lines (starting with a space or a tab) and split name;params:value
+    line = ''
+    for raw_line in file:
+        raw_line = raw_line.rstrip('\r\n')
+        if raw_line[:1] in (' ', '\t'):
+            line += raw_line[1:]
+            continue
+        if line:
+            yield _ics_split_line(line)
+        line = raw_line
+    if line:
+        yield _ics_split_line(line)
+
+
+def _ics_split_line(line: str) -> tuple[str, Dict[str, str], str]:
+    head, _, value = line.partition(':')
+    name, *parameters = head.split(';')
+    return name.upper(), dict(parameter.partition('=')[::2] for parameter in parameters), value
+
+
+def _ics_split(value: str) -> List[str]:
+    # split on the commas that are not escaped
+    items, item, escaped = [], '', False
+    for char in value:
+        if char == ',' and not escaped:
+            items.append(item)
+            item = ''
+            continue
+        item += char
+        escaped = char == '\\' and not escaped
+    return [*items, item]
+
+
+def _ics_unescape(value: str) -> str:
+    return (value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';')
+            .replace('\\\\', '\\'))
+
+
+def _ics_escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_date(value: str, tzid: Optional[str]) -> datetime:
+    # dates of tasks are naive local times, times in utc or in a zone are converted to them
+    if 'T' not in value:  # a date without time
+        return datetime.combine(date(int(value[:4]), int(value[4:6]), int(value[6:8])), datetime.min.time())
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        return parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    if tzid:
+        try:
+            return parsed.replace(tzinfo=ZoneInfo(tzid)).astimezone().replace(tzinfo=None)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass  # unknown zones are read as floating times
+    return parsed
+
+
+def _ics_date_text(value: datetime) -> str:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return value.strftime('%Y%m%dT%H%M%S')  # a floating time
+
+
+def _ics_lines(record: Dict[str, Any]) -> Iterator[str]:
+    yield 'BEGIN:VTODO'
+    yield f"UID:{record['id']}{ICS_UID_DOMAIN}"
+    yield f"DTSTAMP:{_ics_date_text(record['update_date'].astimezone(timezone.utc))}"
+    yield f"SUMMARY:{_ics_escape(record['title'])}"
+    if record.get('description') is not None:
+        yield f"DESCRIPTION:{_ics_escape(record['description'])}"
+    for name, field in (('CREATED', 'create_date'), ('LAST-MODIFIED', 'update_date')):
+        yield f'{name}:{_ics_date_text(record[field].astimezone(timezone.utc))}'  # always in utc
+    for name, field in (('DTSTART', 'start_date'), ('DUE', 'end_date')):
+        if record.get(field) is not None:
+            yield f'{name}:{_ics_date_text(record[field])}'
+    if record.get('tags'):
+        yield f"CATEGORIES:{','.join(_ics_escape(tag) for tag in record['tags'])}"
+    yield 'END:VTODO'
+
+
+def _fold(line: str) -> str:
+    # content lines are limited to 75 octets, continued on lines starting with a space
+    folded, octets = [], 0
+    for char in line:
+        size = len(char.encode())
+        if octets + size > ICS_LINE_OCTETS:
+            folded.append('\r\n ')
+            octets = 1
+        folded.append(char)
+        octets += size
+    return ''.join(folded) + '\r\n'
@@ -0,0 +1,88 @@
+import os
+import json
+from typing import MutableMapping, Set
+from organize_me.app.task import Task
+from organize_me.file_utils import Durability, fsync_dir
+
+
+class TaskJournal:
+    """
+    Append-only log of task mutations.
+
+    Every add/update is written as a ``put`` record holding the full task and every delete as a
+    ``delete`` record holding the task id, one JSON document per line. The journal is replayed on
+    top of the last snapshot at startup and truncated whenever a new snapshot is written.
+    """
+    PUT = 'put'
+    DELETE = 'delete'
+
+    def __init__(self, path: str, durability: Durability = Durability.FSYNC_FILE) -> None:
+        self.path = path
+        self.durability = durability
+        self.records = 0
+        self.task_ids: Set[int] = set()  # ids of the tasks the replayed records put or deleted
+
+    def __len__(self) -> int:
+        return self.records
+
+    def put_record(self, task: Task) -> str:
+        return '{"op": "%s", "task": %s}\n' % (self.PUT, task.model_dump_json())
+
+    def delete_record(self, task_id: int) -> str:
+        return json.dumps({'op': self.DELETE, 'id': task_id}) + '\n'
+
+    def append(self, *records: str) -> None:
+        """Append records built by put_record / delete_record with a single write."""
+        created = not os.path.exists(self.path)
+        with open(self.path, 'a') as journal:
+            journal.write(''.join(records))
+            if self.durability != Durability.NONE:
+                journal.flush()
+                os.fsync(journal.fileno())
+        if created and self.durability == Durability.FSYNC_DIR:
+            fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+        self.records += len(records)
+
+    def replay(self, tasks: MutableMapping[int, Task]) -> MutableMapping[int, Task]:
+        """
+        Apply the journal records on top of the given tasks
+
+        Args:
+            :param tasks: the tasks loaded from the last snapshot, updated in place
+
+        Returns:
+            dict: the tasks after all the journal records were applied
+        """
+        self.records = 0
+        self.task_ids.clear()
+        if not os.path.exists(self.path):
+            return tasks
+        valid_size = 0
+        with open(self.path, 'rb') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if record is None or not line.endswith(b'\n'):
+                    break
+                if record['op'] == self.PUT:
+                    task = Task.model_validate(record['task'])
+                    tasks[task.id] = task
+                    self.task_ids.add(task.id)
+                elif record['op'] == self.DELETE:
+                    tasks.pop(record['id'], None)
+                    self.task_ids.add(record['id'])
+                valid_size += len(line)
+                self.records += 1
+        if valid_size != os.path.getsize(self.path):
+            # a crash in the middle of an append leaves a torn last record, cut it off
+            # so the next append does not get glued onto it
+            os.truncate(self.path, valid_size)
+        return tasks
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.records = 0
+        self.task_ids.clear()
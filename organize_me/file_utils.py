@@ -0,0 +1,48 @@
+import os
+import tempfile
+from enum import Enum
+from typing import Union
+
+
+class Durability(str, Enum):
+    """How hard a save tries to survive a crash, from cheapest to safest."""
+    NONE = 'none'              # temp file + rename: survives a crash of the process, not of the machine
+    FSYNC_FILE = 'fsync-file'  # also fsync the file before the rename: the new content is on disk
+    FSYNC_DIR = 'fsync-dir'    # also fsync the directory after the rename: the rename itself is on disk
+
+
+def atomic_write(path: str, data: Union[str, bytes], durability: Durability = Durability.FSYNC_FILE) -> None:
+    """
+    Replace the content of a file so that readers (and a crash) see either the old or the new content,
+    never a truncated file.
+
+    :param path: the file to write
+    :param data: the new content of the file
+    :param durability: how much to fsync before returning
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data.encode() if isinstance(data, str) else data)
+            if durability != Durability.NONE:
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if durability == Durability.FSYNC_DIR:
+        fsync_dir(directory)
+
+
+def fsync_dir(directory: str) -> None:
+    """Flush a directory entry change (create, rename, unlink) to disk, where the platform supports it."""
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on windows
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,187 @@
+"""
+Non-blocking access to Google Calendar for the TUI.
+
+The client library is synchronous, every request blocks until its response arrives. The requests are
+run on a small pool of threads instead, and awaited from the event loop, so a Textual worker can wait
+for the calendar while the interface keeps handling input. The threads of the pool share one service:
+the one connect() returns sends each request over an HTTP connection of the calling thread. It is
+built on first use, connecting may log the user in and the TUI does not wait for it to start.
+
+Requests go through the request scheduler, single edits in the interactive lane and pushes in the
+background one. A push leaves a thread of the pool free, so an edit never waits behind its batches for
+a thread, only (ahead of them) for a token.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from organize_me.app.api import Api
+from organize_me.google_calendar.auth_connection import connect
+from organize_me.google_calendar.calendar_sync import BATCH_SIZE, MAX_ATTEMPTS, CalendarSync, EventChange, SyncResult
+from organize_me.google_calendar.event_cache import CACHE_FILE, EventCache
+from organize_me.google_calendar.outbox import OUTBOX_FILE, Outbox
+from organize_me.google_calendar.request_scheduler import Priority, RequestScheduler, default_scheduler
+from organize_me.google_calendar.task_event_sync import SYNC_STATE_FILE, SyncReport, SyncState, TaskEventSync
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource  # type: ignore
+
+T = TypeVar('T')
+MAX_WORKERS = 4  # concurrent requests, the Calendar API rate limits a user well before more would help
+
+
+class LazyService:
+    """Stands for a Calendar service object, building it on first use."""
+
+    def __init__(self, service_factory: Callable[[], 'Resource']) -> None:
+        """
+        :param service_factory: Builds an authorized service, called once.
+        """
+        self._service_factory = service_factory
+        self._service: Optional['Resource'] = None
+        self._lock = threading.Lock()
+
+    def service(self) -> 'Resource':
+        """
+        Get the service.
+        :return: The service, built on the first call.
+        """
+        with self._lock:
+            if self._service is None:
+                self._service = self._service_factory()
+            return self._service
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service(), name)
+
+
+class AsyncCalendarClient:
+    """Runs calendar requests on a bounded thread pool, to be awaited from the event loop."""
+
+    def __init__(self, service_factory: Callable[[], 'Resource'] = connect, calendar_id: str = 'primary',
+                 cache_path: Optional[str] = CACHE_FILE, max_workers: int = MAX_WORKERS,
+                 scheduler: RequestScheduler = default_scheduler, state_path: Optional[str] = SYNC_STATE_FILE,
+                 outbox_path: Optional[str] = OUTBOX_FILE) -> None:
+        """
+        :param service_factory: Builds an authorized service safe to use from several threads, called once.
+        :param calendar_id: The calendar to read and write.
+        :param cache_path: The file of the local event cache, None to keep it in memory only.
+        :param max_workers: The most requests in flight at a time.
+        :param scheduler: Rate limits and retries the requests.
+        :param state_path: The file of the task sync state, None to keep it in memory only.
+        :param outbox_path: The file of the changes waiting to be sent, None to keep them in memory only.
+        """
+        self.calendar_id = calendar_id
+        self.service = LazyService(service_factory)
+        self.cache = EventCache(self.service, calendar_id, cache_path)
+        self.sync_state = SyncState(state_path)
+        self.outbox = Outbox(outbox_path)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='calendar')
+        self.scheduler = scheduler
+        self._cache_lock = asyncio.Lock()  # a single refresh of the cache at a time
+        self._push_slots = asyncio.Semaphore(max(max_workers - 1, 1))  # batches in flight, a thread is kept for edits
+
+    async def run(self, call: Callable[['Resource'], T]) -> T:
+        """
+        Run blocking calendar code on the pool.
+        :param call: Called with the service, on a thread of the pool.
+        :return: What the call returned.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: call(self.service.service()))
+
+    async def refresh_events(self) -> List[str]:
+        """
+        Bring the local event cache up to date, see EventCache.sync.
+        :return: The ids of the events changed since the last refresh.
+        """
+        async with self._cache_lock:
+            return await self.run(lambda service: self.cache.sync())
+
+    async def insert_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = await self.run(lambda service: self.scheduler.execute(
+            service.events().insert(calendarId=self.calendar_id, body=event), Priority.INTERACTIVE))
+        return result
+
+    async def update_event(self, event_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = await self.run(lambda service: self.scheduler.execute(
+            service.events().update(calendarId=self.calendar_id, eventId=event_id, body=event), Priority.INTERACTIVE))
+        return result
+
+    async def delete_event(self, event_id: str) -> None:
+        await self.run(lambda service: self.scheduler.execute(
+            service.events().delete(calendarId=self.calendar_id, eventId=event_id), Priority.INTERACTIVE))
+
+    async def push(self, changes: Sequence[EventChange], progress: Optional[Callable[[int, int], None]] = None,
+                   max_attempts: int = MAX_ATTEMPTS) -> SyncResult:
+        """
+        Send task changes to the calendar, batches of them concurrently, see CalendarSync.sync.
+        :param changes: At most one change per task.
+        :param progress: Called on the event loop with the changes done so far and the total, after every batch.
+        :param max_attempts: The number of times a change failing transiently is sent.
+        :return: The events of the changes that went through and the errors of the ones that did not.
+        """
+        if len({change.task_id for change in changes}) != len(changes):
+            raise ValueError("More than one change of the same task, merge them before syncing")
+        result = SyncResult({}, {})
+        done = 0
+
+        async def send(batch: Sequence[EventChange]) -> None:
+            nonlocal done
+            async with self._push_slots:
+                batch_result = await self.run(
+                    lambda service: CalendarSync(service, self.calendar_id, max_attempts=max_attempts,
+                                                 scheduler=self.scheduler).sync(batch))
+            result.events.update(batch_result.events)
+            result.errors.update(batch_result.errors)
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(changes))
+
+        await asyncio.gather(*(send(changes[start:start + BATCH_SIZE]) for start in range(0, len(changes), BATCH_SIZE)))
+        return result
+
+    async def drain_outbox(self, progress: Optional[Callable[[int, int], None]] = None) -> SyncResult:
+        """
+        Send the changes of the outbox, see push. A change is sent once per round, the ones failing
+        transiently stay queued for a later drain. The changes queued while a round is sent go in the
+        next, rounds stop once one sends nothing (the calendar is unreachable) or the outbox is empty.
+        :param progress: Called on the event loop with the changes done so far and the total of the round.
+        :return: The events of the changes that went through and the errors of the ones that did not,
+            the changes that failed transiently are left in the outbox.
+        """
+        drained = SyncResult({}, {})
+        while changes := self.outbox.take():
+            result = SyncResult({}, {})
+            try:
+                result = await self.push(changes, progress, max_attempts=1)
+            finally:
+                self.outbox.settle(result)  # what was not sent, when cancelled or failing, stays queued
+            for task_id in result.events:
+                drained.errors.pop(task_id, None)
+            drained.events.update(result.events)
+            drained.errors.update(result.errors)
+            if not result.events:
+                break
+        return drained
+
+    async def sync_tasks(self, api: Api) -> SyncReport:
+        """
+        Sync the tasks with the calendar both ways, see TaskEventSync: only the tasks and events that
+        changed since the last sync cost a request. The tasks are read and written on the event loop.
+        The outbox is drained first, the pass compares the tasks with the events they were sent as.
+        :param api: The tasks.
+        :return: What the pass did.
+        """
+        sync = TaskEventSync(api, self.cache, self.sync_state)
+        await self.drain_outbox()
+        async with self._cache_lock:
+            await self.run(lambda service: self.cache.sync())
+            plan = sync.plan()
+            return sync.apply(plan, await self.push(plan.changes))
+
+    def close(self) -> None:
+        """Stop the pool, requests not started yet are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
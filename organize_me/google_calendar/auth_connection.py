@@ -1,20 +1,33 @@
 import os.path
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
-from googleapiclient.discovery import build  # type: ignore
-from googleapiclient.discovery import Resource
+# the Google client libraries take hundreds of milliseconds to import, they are imported on first use
+# so that the application does not pay for them when calendar sync is not used
+if TYPE_CHECKING:
+    import httplib2  # type: ignore
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import Resource  # type: ignore
+    from googleapiclient.http import HttpRequest  # type: ignore
 
 
 # Configurations
 SCOPES = ["https://www.googleapis.com/auth/calendar"]   # when changing scopes, delete token.json
 TOKEN_FILE = "token.json"                               # contains user access token
 CREDENTIALS_FILE = "credentials.json"                   # contains client_id and client_secret
+# seconds before the access token expires that it is refreshed, more than the threshold under which
+# the client library would refresh it itself, from the thread of whichever request comes first
+REFRESH_MARGIN = 300.0
+# seconds to the next attempt of a failed refresh, and the least time between two refreshes when the
+# tokens handed out live shorter than REFRESH_MARGIN
+REFRESH_RETRY_DELAY = 30.0
 
+_connection: Optional['Connection'] = None
+_connection_lock = threading.Lock()
 
-def save_credentials(creds: Credentials) -> None:
+
+def save_credentials(creds: 'Credentials') -> None:
     """
     Save the credentials for future runs.
     :param creds: Existing user credentials
@@ -23,12 +36,15 @@ def save_credentials(creds: Credentials) -> None:
         token.write(creds.to_json())  # type: ignore[no-untyped-call]
 
 
-def user_login(creds: Optional[Credentials] = None) -> Credentials:
+def user_login(creds: Optional['Credentials'] = None) -> 'Credentials':
     """
     Manages user login and token refresh.
     :param creds: Existing user credentials, if available.
     :return: Updated user credentials.
     """
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
+
     if creds and creds.expired and creds.refresh_token:
         creds.refresh(Request())  # type: ignore[no-untyped-call]
     else:
@@ -40,19 +56,128 @@ def user_login(creds: Optional[Credentials] = None) -> Credentials:
     return creds
 
 
-def connect() -> Resource:
+def load_credentials() -> 'Credentials':
     """
-    Connect to the Google Calendar API, handling user authentication if necessary.
-    :return: Authorized Google Calendar API service instance
+    Load the credentials saved by the last run, refreshing them or logging the user in if necessary.
+    :return: Valid user credentials
     """
+    from google.oauth2.credentials import Credentials
+
     creds = None
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)  # type: ignore[no-untyped-call]
     if not creds or not creds.valid:
         creds = user_login(creds)
+    return creds
+
+
+class Connection:
+    """
+    The credentials and the Calendar service of the process, shared by all threads.
+
+    The service is built once. httplib2 connections are not thread safe, so every request goes out over
+    an HTTP connection of the thread executing it, all authorized with the same credentials. A timer
+    thread refreshes the access token before it expires, requests do not wait for a refresh.
+    """
+
+    def __init__(self, creds: 'Credentials', refresh_margin: float = REFRESH_MARGIN,
+                 http_factory: Optional[Callable[[], 'httplib2.Http']] = None) -> None:
+        """
+        :param creds: Valid user credentials.
+        :param refresh_margin: Seconds before the access token expires that it is refreshed.
+        :param http_factory: Builds the HTTP connection of a thread, googleapiclient's build_http by default.
+        """
+        from googleapiclient.discovery import build
+        from googleapiclient.http import build_http
+
+        self.creds = creds
+        self.refresh_margin = refresh_margin
+        self._http_factory = http_factory or build_http
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        # the discovery document shipped with the client library, instead of fetching it on every connection
+        self.service = build("calendar", "v3", credentials=creds, static_discovery=True,
+                             requestBuilder=self._build_request)
+        self._schedule_refresh()
+
+    def http(self) -> 'httplib2.Http':
+        """
+        Get the authorized HTTP connection of the calling thread.
+        :return: The connection, built on the first call from the thread.
+        """
+        from google_auth_httplib2 import AuthorizedHttp  # type: ignore
+
+        if not hasattr(self._local, 'http'):
+            self._local.http = AuthorizedHttp(self.creds, http=self._http_factory())
+        http: 'httplib2.Http' = self._local.http
+        return http
+
+    def _build_request(self, http: 'httplib2.Http', *args: Any, **kwargs: Any) -> 'HttpRequest':
+        # the service hands the connection it was built with, the request takes the one of its thread
+        from googleapiclient.http import HttpRequest
+
+        return HttpRequest(self.http(), *args, **kwargs)
+
+    def refresh(self) -> None:
+        """Refresh the access token and save it, a failed refresh is retried after REFRESH_RETRY_DELAY."""
+        from google.auth.exceptions import GoogleAuthError
+        from google.auth.transport.requests import Request
+
+        delay = None
+        with self._refresh_lock:
+            try:
+                self.creds.refresh(Request())  # type: ignore[no-untyped-call]
+                save_credentials(self.creds)
+            except (GoogleAuthError, OSError):
+                # offline for now, requests refresh the token themselves once it has expired
+                delay = REFRESH_RETRY_DELAY
+        # a token living shorter than the margin would be refreshed again at once, over and over
+        self._schedule_refresh(delay, min_delay=REFRESH_RETRY_DELAY)
+
+    def _schedule_refresh(self, delay: Optional[float] = None, min_delay: float = 0.0) -> None:
+        expiry = self.creds.expiry  # naive UTC, None when the token does not expire
+        if delay is None:
+            if expiry is None:
+                return
+            delay = (expiry.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+            delay -= self.refresh_margin
+        with self._refresh_lock:
+            if self._closed:
+                return
+            self._timer = threading.Timer(max(delay, min_delay), self.refresh)
+            self._timer.daemon = True  # does not keep the process alive
+            self._timer.start()
+
+    def close(self) -> None:
+        """Stop refreshing the access token."""
+        with self._refresh_lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+def connect() -> 'Resource':
+    """
+    Connect to the Google Calendar API, handling user authentication if necessary. The connection is
+    made once and shared, later calls (from any thread) return the same service.
+    :return: Authorized Google Calendar API service instance, safe to use from several threads
+    """
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = Connection(load_credentials())
+        return _connection.service
+
 
-    service = build("calendar", "v3", credentials=creds)
-    return service
+def disconnect() -> None:
+    """Drop the shared connection, the next connect() loads the credentials and builds the service again."""
+    global _connection
+    with _connection_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
 
 
 def main() -> None:
@@ -1,36 +1,41 @@
+"""
+Requests on the events of the user's primary calendar. They go through a request scheduler, the
+process-wide one by default, which rate limits them and retries the ones failing transiently; errors
+that remain are raised.
+"""
+
 from datetime import datetime, timezone
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
+
+from organize_me.google_calendar.request_scheduler import Priority, RequestScheduler, default_scheduler
 
-from googleapiclient.discovery import Resource  # type: ignore
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource  # type: ignore
 
 
-def get_future_events(service: Resource) -> Any:
+def get_future_events(service: 'Resource', scheduler: RequestScheduler = default_scheduler,
+                      priority: Priority = Priority.INTERACTIVE) -> List[Dict[str, Any]]:
     """
     Fetches the next 10 upcoming events from the user's primary Google Calendar.
 
     :param service: Authorized Google Calendar API service instance.
+    :param scheduler: Rate limits and retries the request.
+    :param priority: The lane of the request.
     :return: A list of dictionaries containing event details.
     """
     now = datetime.now(timezone.utc).isoformat()  # Ensures UTC timezone
     print("Getting the upcoming 10 events")
 
-    try:
-        # Requesting future events sorted by start time
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=now,
-                maxResults=3,
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
-        )
-        return events_result.get("items", [])
-    except Exception as error:
-        print(f"An error occurred: {error}")
-        return []
+    # Requesting future events sorted by start time
+    request = service.events().list(
+        calendarId="primary",
+        timeMin=now,
+        maxResults=3,
+        singleEvents=True,
+        orderBy="startTime",
+    )
+    events: List[Dict[str, Any]] = scheduler.execute(request, priority).get("items", [])
+    return events
 
 
 def display(events: List[Dict[str, Any]]) -> None:
@@ -49,27 +54,33 @@ def display(events: List[Dict[str, Any]]) -> None:
         print(start, event["summary"])
 
 
-def delete_event(service: Resource, event_id: str) -> None:
+def delete_event(service: 'Resource', event_id: str, scheduler: RequestScheduler = default_scheduler,
+                 priority: Priority = Priority.INTERACTIVE) -> None:
     """
     Deletes an event from the user's primary Google Calendar.
 
     :param service: Authorized Google Calendar API service instance.
     :param event_id: The ID of the event to be deleted.
+    :param scheduler: Rate limits and retries the request.
+    :param priority: The lane of the request.
     """
-    service.events().delete(calendarId="primary", eventId=event_id).execute()
+    scheduler.execute(service.events().delete(calendarId="primary", eventId=event_id), priority)
 
 
 # event dictionary keys: 'summary', 'location', 'description', 'start', 'end', 'attendees', 'reminders'
-def add_event(service: Resource, event: Dict[str, Any]) -> None:
+def add_event(service: 'Resource', event: Dict[str, Any], scheduler: RequestScheduler = default_scheduler,
+              priority: Priority = Priority.INTERACTIVE) -> None:
     """
     Adds an event to the user's primary Google Calendar.
 
     :param service: Authorized Google Calendar API service instance.
     :param event: A dictionary containing event details.
+    :param scheduler: Rate limits and retries the request.
+    :param priority: The lane of the request.
     """
     if not event:
         raise ValueError("Event dictionary is required.")
-    service.events().insert(calendarId="primary", body=event).execute()
+    scheduler.execute(service.events().insert(calendarId="primary", body=event), priority)
 
 
 def create_event(title: Optional[str], start_time: Optional[datetime],
@@ -101,12 +112,15 @@ def create_event(title: Optional[str], start_time: Optional[datetime],
     }
 
 
-def update_event(service: Resource, event_id: str, updated_event: Dict[str, Any]) -> None:
+def update_event(service: 'Resource', event_id: str, updated_event: Dict[str, Any],
+                 scheduler: RequestScheduler = default_scheduler, priority: Priority = Priority.INTERACTIVE) -> None:
     """
     Updates an event on the user's primary Google Calendar.
 
     :param service: Authorized Google Calendar API service instance.
     :param event_id: The ID of the event to be updated.
     :param updated_event: A dictionary containing updated event details.
+    :param scheduler: Rate limits and retries the request.
+    :param priority: The lane of the request.
     """
-    service.events().update(calendarId="primary", eventId=event_id, body=updated_event).execute()
\ No newline at end of file
+    scheduler.execute(service.events().update(calendarId="primary", eventId=event_id, body=updated_event), priority)
\ No newline at end of file
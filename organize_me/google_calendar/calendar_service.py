@@ -1,7 +1,5 @@
 from datetime import datetime
 
-from googleapiclient.errors import HttpError    # type: ignore
-
 from organize_me.google_calendar.auth_connection import connect
 import organize_me.google_calendar.calendar_events as calendar
 
@@ -13,6 +11,8 @@ def main() -> None:
 
     Before running this script, make sure you have at lease one event in your primary calendar
     """
+    from googleapiclient.errors import HttpError  # type: ignore
+
     try:
         # Connect to the Google Calendar API
         service = connect()
@@ -0,0 +1,230 @@
+"""
+Batched synchronization of task changes to Google Calendar.
+
+Every change is a request of its own, but the requests are sent together through the batch endpoint
+of the API, up to BATCH_SIZE at a time: a sync of hundreds of tasks is a handful of round trips. The
+result of every change is collected from its batch, and only the changes that failed with a transient
+error (rate limits, server errors, a failed batch) are sent again, in fewer and fewer batches.
+
+A task is mapped to the event whose id is derived from the task id, so an event is found without
+keeping a mapping. An insert answered 409 Conflict found its id taken, by an earlier attempt whose
+response was lost or by a deleted event (the API keeps the ids of deleted events): the event is read
+back, and restored when it was deleted.
+"""
+
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from organize_me.app.task import Task
+from organize_me.google_calendar.request_scheduler import Priority, RequestScheduler, error_status, is_retryable
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource  # type: ignore
+
+BATCH_SIZE = 50             # requests per batch, the most the Calendar API recommends
+MAX_ATTEMPTS = 4            # sends of a change before its error is final
+RETRY_DELAY = 1.0           # seconds to wait before the second attempt, doubled before every later one
+TASK_ID_PROPERTY = 'organizeMeTaskId'
+
+
+class EventChange(NamedTuple):
+    method: str                              # insert, update, patch or delete
+    task_id: int
+    body: Optional[Dict[str, Any]] = None    # the event, or the fields to patch, None to delete
+
+    @classmethod
+    def insert(cls, task: Task) -> 'EventChange':
+        return cls('insert', task.id, task_to_event(task))
+
+    @classmethod
+    def update(cls, task: Task) -> 'EventChange':
+        return cls('update', task.id, task_to_event(task))
+
+    @classmethod
+    def delete(cls, task_id: int) -> 'EventChange':
+        return cls('delete', task_id)
+
+
+# called with a change and the outcome of its request: the response, or the error
+Callback = Callable[[EventChange, Optional[Dict[str, Any]], Optional[Exception]], None]
+
+
+class SyncResult(NamedTuple):
+    events: Dict[int, Optional[Dict[str, Any]]]  # task id -> the event the API returned, None once deleted
+    errors: Dict[int, Exception]                 # task id -> the error of a change that did not go through
+
+
+def event_id(task_id: int) -> str:
+    """
+    Get the id of the event of a task: hex digits are valid event id characters (base32hex).
+    :param task_id: The id of the task.
+    :return: The event id.
+    """
+    return f'{task_id:032x}'
+
+
+def task_to_event(task: Task) -> Dict[str, Any]:
+    """
+    Convert a task to a Calendar event.
+    :param task: A task with a start and an end date.
+    :return: The event body, which keeps the task id in its private extended properties.
+    """
+    return fields_to_event(task.__dict__)
+
+
+def fields_to_event(fields: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Convert the fields of a task to a Calendar event, without building a Task.
+    :param fields: Task field values by name, e.g. a row of Api.iter_rows keyed by Api.columns.
+    :return: The event body, see task_to_event.
+    """
+    if fields['start_date'] is None or fields['end_date'] is None:
+        raise ValueError(f"Task {fields['id']} has no dates, it cannot be a calendar event")
+    return {
+        'id': event_id(fields['id']),
+        'summary': fields['title'],
+        'description': fields['description'],
+        'start': {'dateTime': _event_date(fields['start_date'])},
+        'end': {'dateTime': _event_date(fields['end_date'])},
+        'extendedProperties': {'private': {TASK_ID_PROPERTY: str(fields['id'])}},
+    }
+
+
+def _event_date(date: datetime) -> str:
+    return date.astimezone().isoformat()  # naive dates are local time, an offset makes a timeZone unnecessary
+
+
+class CalendarSync:
+    """Sends task changes to a calendar in batches, retrying the changes that failed transiently."""
+
+    def __init__(self, service: 'Resource', calendar_id: str = 'primary', batch_size: int = BATCH_SIZE,
+                 max_attempts: int = MAX_ATTEMPTS, retry_delay: float = RETRY_DELAY,
+                 sleep: Callable[[float], None] = time.sleep, scheduler: Optional[RequestScheduler] = None) -> None:
+        """
+        :param service: Authorized Google Calendar API service instance.
+        :param calendar_id: The calendar to sync the tasks to.
+        :param batch_size: The most requests sent in a batch.
+        :param max_attempts: The number of times a change is sent before giving up on it.
+        :param retry_delay: Seconds to wait before resending the failed changes, doubled on every round.
+        :param sleep: Waits between rounds, replaced in tests.
+        :param scheduler: Rate limits the batches, each costing its number of requests, in the background lane.
+        """
+        self.service = service
+        self.calendar_id = calendar_id
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sleep = sleep
+        self.scheduler = scheduler
+
+    def sync(self, changes: Iterable[EventChange]) -> SyncResult:
+        """
+        Send changes to the calendar.
+        :param changes: At most one change per task, the requests of a batch may run in any order.
+        :return: The events of the changes that went through and the errors of the ones that did not.
+        """
+        pending = list(changes)
+        if len({change.task_id for change in pending}) != len(pending):
+            raise ValueError("More than one change of the same task, merge them before syncing")
+        result = SyncResult({}, {})
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.sleep(self.retry_delay * 2 ** (attempt - 1))
+            retry: List[EventChange] = []
+            for start in range(0, len(pending), self.batch_size):
+                retry += self._send_batch(pending[start:start + self.batch_size], result)
+            if not retry:
+                break
+            pending = retry
+        return result
+
+    def _send_batch(self, changes: List[EventChange], result: SyncResult) -> List[EventChange]:
+        # sends a batch and records the outcome of every change, returns the changes to send again
+        retry: List[EventChange] = []
+        conflicts: List[EventChange] = []
+
+        def record(change: EventChange, response: Optional[Dict[str, Any]], error: Optional[Exception]) -> None:
+            if error is not None and change.method == 'insert' and error_status(error) == 409:
+                conflicts.append(change)  # the event id is taken: by an earlier attempt, or by a deleted event
+            else:
+                _record(change, response, error, result, retry)
+
+        retry += self._execute([(change, self._request(change)) for change in changes], record, result)
+        if conflicts:
+            retry += self._resolve_conflicts(conflicts, result)
+        return retry
+
+    def _resolve_conflicts(self, inserts: List[EventChange], result: SyncResult) -> List[EventChange]:
+        # an insert whose id exists went through if the event is there, the event is restored if it was deleted,
+        # the real API keeps the ids of deleted events reserved
+        events = self.service.events()
+        retry: List[EventChange] = []
+        deleted: List[EventChange] = []
+
+        def record(change: EventChange, event: Optional[Dict[str, Any]], error: Optional[Exception]) -> None:
+            if event is not None and event.get('status') == 'cancelled':
+                deleted.append(change)
+            else:
+                _record(change, event, error, result, retry)
+
+        gets = [(change, events.get(calendarId=self.calendar_id, eventId=event_id(change.task_id)))
+                for change in inserts]
+        retry += self._execute(gets, record, result)
+        if deleted:
+            restores = [(change, events.update(calendarId=self.calendar_id, eventId=event_id(change.task_id),
+                                               body={**(change.body or {}), 'status': 'confirmed'}))
+                        for change in deleted]
+            retry += self._execute(restores, lambda change, event, error: _record(change, event, error, result, retry),
+                                   result)
+        return retry
+
+    def _execute(self, requests: List[Tuple[EventChange, Any]], callback: Callback,
+                 result: SyncResult) -> List[EventChange]:
+        # sends the requests of changes in a batch, calling back with the outcome of every one, returns the
+        # changes to send again when the batch itself failed
+        from googleapiclient.errors import HttpError  # type: ignore
+        from httplib2 import HttpLib2Error  # type: ignore
+
+        batch = self.service.new_batch_http_request(
+            callback=lambda request_id, response, error: callback(requests[int(request_id)][0], response, error))
+        for number, (_, request) in enumerate(requests):
+            batch.add(request, request_id=str(number))
+        if self.scheduler is not None:
+            self.scheduler.acquire(Priority.BACKGROUND, len(requests))
+        try:
+            batch.execute()
+        except (HttpError, HttpLib2Error, OSError) as error:  # the batch itself failed, none of it is known to be applied
+            for change, _ in requests:
+                result.errors[change.task_id] = error
+            return [change for change, _ in requests] if is_retryable(error) else []
+        return []
+
+    def _request(self, change: EventChange) -> Any:
+        events = self.service.events()
+        if change.method == 'insert':
+            return events.insert(calendarId=self.calendar_id, body=change.body)
+        if change.method == 'update':
+            return events.update(calendarId=self.calendar_id, eventId=event_id(change.task_id), body=change.body)
+        if change.method == 'patch':
+            return events.patch(calendarId=self.calendar_id, eventId=event_id(change.task_id), body=change.body)
+        if change.method == 'delete':
+            return events.delete(calendarId=self.calendar_id, eventId=event_id(change.task_id))
+        raise ValueError(f"Unknown change method {change.method!r}")
+
+
+def _record(change: EventChange, response: Optional[Dict[str, Any]], error: Optional[Exception],
+            result: SyncResult, retry: List[EventChange]) -> None:
+    # records the outcome of a change, adding it to retry when it failed transiently
+    if error is None or _already_deleted(change, error):
+        result.events[change.task_id] = None if change.method == 'delete' else response
+        result.errors.pop(change.task_id, None)
+        return
+    result.errors[change.task_id] = error
+    if is_retryable(error):
+        retry.append(change)
+
+
+def _already_deleted(change: EventChange, error: Exception) -> bool:
+    # a delete whose response was lost went through: the event is gone already
+    return change.method == 'delete' and error_status(error) in (404, 410)
@@ -0,0 +1,131 @@
+"""
+Local cache of the events of a calendar, kept up to date by incremental sync.
+
+The first sync lists every event. The last page of a listing carries a sync token, and a later sync
+lists only the events changed since that token (deleted ones as cancelled). A sync that finds
+nothing new is a single request, whatever the size of the calendar. When the token has expired,
+the API answers 410 Gone and the cache is rebuilt from a full listing.
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from organize_me.file_utils import Durability, atomic_write
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource  # type: ignore
+
+CACHE_FILE = "events.json"  # next to token.json
+CACHE_VERSION = 1
+PAGE_SIZE = 2500            # events per page, the most the API returns
+
+
+class EventCache:
+    """The events of a calendar by id, with the sync token they are current as of."""
+
+    def __init__(self, service: 'Resource', calendar_id: str = 'primary', path: Optional[str] = CACHE_FILE,
+                 page_size: int = PAGE_SIZE) -> None:
+        """
+        :param service: Authorized Google Calendar API service instance.
+        :param calendar_id: The calendar to cache.
+        :param path: The file the cache is kept in between runs, None to keep it in memory only.
+        :param page_size: The most events fetched per request.
+        """
+        self.service = service
+        self.calendar_id = calendar_id
+        self.path = path
+        self.page_size = page_size
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.sync_token: Optional[str] = None  # None until a full sync completed
+        self.load()
+
+    def sync(self) -> List[str]:
+        """
+        Bring the cache up to date, incrementally once it holds a sync token, and save it.
+        :return: The ids of the events added, changed or deleted since the last sync.
+        """
+        from googleapiclient.errors import HttpError  # type: ignore
+
+        try:
+            changed = self._pull(self.sync_token)
+        except HttpError as error:
+            if self.sync_token is None or error.resp.status != 410:
+                raise
+            # the token expired, the events changed since cannot be listed: start over
+            previous = self.events
+            self.sync_token = None
+            changed = self._pull(None)
+            changed += [event_id for event_id in previous if event_id not in self.events]
+        self.save()
+        return changed
+
+    def _pull(self, sync_token: Optional[str]) -> List[str]:
+        # lists every event (sync_token None) or the events changed since the token, page by page
+        events = self.events if sync_token is not None else {}
+        changed: List[str] = []
+        page_token: Optional[str] = None
+        while True:
+            parameters: Dict[str, Any] = {'calendarId': self.calendar_id, 'maxResults': self.page_size}
+            if sync_token is not None:
+                parameters['syncToken'] = sync_token
+            if page_token is not None:
+                parameters['pageToken'] = page_token
+            page = self.service.events().list(**parameters).execute()
+            for event in page.get('items', []):
+                cached = self.events.get(event['id'])
+                current: Optional[Dict[str, Any]] = event
+                if event.get('status') == 'cancelled':
+                    events.pop(event['id'], None)
+                    current = None
+                else:
+                    events[event['id']] = event
+                if current != cached:  # a full listing repeats the events that did not change
+                    changed.append(event['id'])
+            page_token = page.get('nextPageToken')
+            if page_token is None:
+                # applied deltas are kept even when a later page fails, the next sync lists them again
+                self.events = events
+                self.sync_token = page.get('nextSyncToken')
+                return changed
+
+    def upcoming(self, limit: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get the next events from the cache, without a request.
+        :param limit: The most events to return.
+        :param now: Events starting before it are left out, the current time by default.
+        :return: The events ordered by start.
+        """
+        now = now or datetime.now(timezone.utc)
+        starts = [(_event_start(event), event) for event in self.events.values()]
+        upcoming = sorted((item for item in starts if item[0] >= now), key=lambda item: item[0])
+        return [event for _, event in upcoming[:limit]]
+
+    def load(self) -> None:
+        """Read the cache saved by the last run, a missing, unreadable or foreign one leaves it empty."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except ValueError:
+            return
+        if data.get('version') == CACHE_VERSION and data.get('calendar_id') == self.calendar_id:
+            self.events = data['events']
+            self.sync_token = data['sync_token']
+
+    def save(self) -> None:
+        """Write the cache, a cache lost in a crash costs a full sync so it is not fsynced."""
+        if self.path is None:
+            return
+        data = {'version': CACHE_VERSION, 'calendar_id': self.calendar_id, 'sync_token': self.sync_token,
+                'events': self.events}
+        atomic_write(self.path, json.dumps(data), Durability.NONE)
+
+
+def _event_start(event: Dict[str, Any]) -> datetime:
+    # timed events have a dateTime, all-day events a date, taken as midnight UTC
+    start = event.get('start', {})
+    value = datetime.fromisoformat(start['dateTime'] if 'dateTime' in start else start.get('date', '0001-01-01'))
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
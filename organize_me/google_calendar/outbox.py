@@ -0,0 +1,183 @@
+"""
+Durable queue of the calendar changes waiting to be sent.
+
+A change is appended to the outbox file (and fsynced) before it is sent, so queueing one is a local
+write that does not wait for the network, and a change made offline or lost to a crash is sent by a
+later drain. The changes of a task are coalesced as they are queued: an insert followed by updates is
+a single insert of the last content, an insert followed by a delete is nothing at all. A drain sends
+the queued changes in batches; the ones that fail transiently (offline, rate limited) stay queued,
+merged with the changes queued meanwhile, and the file is rewritten with what is left.
+
+The file does not tell whether an insert was being sent when the process stopped, so when it is read
+back a delete does not cancel the insert before it: the event may have been created already. A delete
+of an event that was never created costs a request, answered 404 and counted as done.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from organize_me.file_utils import Durability, atomic_write, fsync_dir
+from organize_me.google_calendar.calendar_sync import CalendarSync, EventChange, SyncResult
+from organize_me.google_calendar.request_scheduler import is_retryable
+
+OUTBOX_FILE = "calendar.outbox"  # next to token.json
+
+
+class Outbox:
+    """The changes not sent yet, at most one per task, appended to a file as they are queued."""
+
+    def __init__(self, path: Optional[str] = OUTBOX_FILE, durability: Durability = Durability.FSYNC_FILE) -> None:
+        """
+        :param path: The file the changes are kept in until sent, None to keep them in memory only.
+        :param durability: How hard an append tries to survive a crash.
+        """
+        self.path = path
+        self.durability = durability
+        self._lock = threading.Lock()
+        self._pending: Dict[int, EventChange] = {}    # task id -> the coalesced change to send
+        self._in_flight: Dict[int, EventChange] = {}  # taken by a drain, not settled yet
+        self.load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._in_flight)
+
+    def add(self, *changes: EventChange) -> None:
+        """Queue changes, with a single write. A change of a task being sent is queued after it."""
+        with self._lock:
+            for change in changes:
+                _queue(self._pending, change)
+            self._append(changes)
+
+    def take(self) -> List[EventChange]:
+        """
+        Start a drain.
+        :return: The changes to send, none while another drain has not settled.
+        """
+        with self._lock:
+            if self._in_flight:
+                return []
+            self._in_flight, self._pending = self._pending, {}
+            return list(self._in_flight.values())
+
+    def drain(self, calendar_sync: CalendarSync) -> SyncResult:
+        """
+        Send the queued changes once, in batches.
+        :param calendar_sync: Sends the changes, with a single attempt the outbox being the retry.
+        :return: The events of the changes that went through and the errors of the ones that did not.
+        """
+        result = SyncResult({}, {})
+        try:
+            result = calendar_sync.sync(self.take())
+        finally:
+            self.settle(result)
+        return result
+
+    def settle(self, result: SyncResult) -> Dict[int, Exception]:
+        """
+        End a drain: the changes that went through are dropped, the ones that failed transiently or
+        were not sent at all are queued again, before the changes queued meanwhile.
+        :param result: The outcome of sending the changes of take.
+        :return: The errors of the changes dropped without going through, they would fail again.
+        """
+        dropped: Dict[int, Exception] = {}
+        with self._lock:
+            pending: Dict[int, EventChange] = {}
+            sent = set()
+            for task_id, change in self._in_flight.items():
+                error = result.errors.get(task_id)
+                if task_id in result.events and error is None:
+                    sent.add(task_id)
+                elif error is not None and not is_retryable(error):
+                    dropped[task_id] = error
+                else:
+                    pending[task_id] = change
+            for change in self._pending.values():
+                previous = self._in_flight.get(change.task_id)
+                # an insert that went through created the event, one that failed transiently may have
+                exists = previous is not None and (previous.method != 'delete' if change.task_id in sent
+                                                   else previous.method == 'insert' and change.task_id in pending)
+                _queue(pending, change, exists)
+            self._pending, self._in_flight = pending, {}
+            self._rewrite()
+        return dropped
+
+    def load(self) -> None:
+        """Replay the changes queued by the last run, cutting off a record torn by a crash."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        records = valid_size = 0
+        with open(self.path, 'rb') as outbox:
+            for line in outbox:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                change = EventChange(record['method'], record['task_id'], record['body'])
+                # an insert followed by a delete may have been sent before the crash, the delete is kept
+                _queue(self._pending, change, exists=change.method == 'delete')
+                valid_size += len(line)
+                records += 1
+        if valid_size != os.path.getsize(self.path) or records > len(self._pending):
+            self._rewrite()
+
+    def _append(self, changes: Tuple[EventChange, ...]) -> None:
+        if self.path is None or not changes:
+            return
+        created = not os.path.exists(self.path)
+        with open(self.path, 'a') as outbox:
+            outbox.write(''.join(_record(change) for change in changes))
+            if self.durability != Durability.NONE:
+                outbox.flush()
+                os.fsync(outbox.fileno())
+        if created and self.durability == Durability.FSYNC_DIR:
+            fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+
+    def _rewrite(self) -> None:
+        # the changes still queued, the ones being sent first (as they were queued first)
+        if self.path is None:
+            return
+        changes = [*self._in_flight.values(), *self._pending.values()]
+        if not changes:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        atomic_write(self.path, ''.join(_record(change) for change in changes), self.durability)
+
+
+def coalesce(queued: Optional[EventChange], change: EventChange, exists: bool = False) -> Optional[EventChange]:
+    """
+    Merge a change of a task into the change already queued for it.
+    :param queued: The queued change, None if there is none.
+    :param change: The later change.
+    :param exists: The event may exist already, a drain sent an insert of it.
+    :return: The change doing both, None when they cancel out.
+    """
+    if queued is None:
+        return change._replace(method='update') if exists and change.method == 'insert' else change
+    if change.method == 'delete':
+        # an event never sent is not deleted
+        return None if queued.method == 'insert' and not exists else change
+    if queued.method == 'insert':  # still to be created, with the latest content
+        body = {**(queued.body or {}), **(change.body or {})} if change.method == 'patch' else change.body
+        return queued._replace(body=body)
+    if change.method == 'patch' and queued.method in ('update', 'patch'):
+        return queued._replace(body={**(queued.body or {}), **(change.body or {})})
+    # replaces an update, or an event whose delete was not sent yet
+    return change._replace(method='update') if change.method == 'insert' else change
+
+
+def _queue(changes: Dict[int, EventChange], change: EventChange, exists: bool = False) -> None:
+    coalesced = coalesce(changes.get(change.task_id), change, exists)
+    if coalesced is None:
+        changes.pop(change.task_id, None)
+    else:
+        changes[change.task_id] = coalesced
+
+
+def _record(change: EventChange) -> str:
+    return json.dumps({'method': change.method, 'task_id': change.task_id, 'body': change.body}) + '\n'
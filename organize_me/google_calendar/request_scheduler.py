@@ -0,0 +1,223 @@
+"""
+Rate limiting and retries of Calendar API requests, shared by every caller of the process.
+
+Requests wait for a token of a token bucket: the bucket holds up to `burst` tokens and refills at `rate`
+tokens a second, so short bursts go out at once and longer ones are spread to stay under the per-user
+quota. Requests waiting for a token are served by priority lane first (interactive edits ahead of
+background sync), then in arrival order. A request failing with a transient error (rate limits, server
+errors, transport errors) is sent again after an exponential backoff with full jitter, so that clients
+throttled together do not retry together; a rate limit error also empties the bucket, slowing every
+other request down with it.
+"""
+
+import heapq
+import random
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+RATE = 10.0                 # tokens a second, the default Calendar API quota is 600 requests a minute per user
+BURST = 50                  # tokens the bucket holds, a full batch
+MAX_ATTEMPTS = 5            # sends of a request before its error is raised
+RETRY_DELAY = 1.0           # seconds of the first backoff, doubled for every later one
+MAX_RETRY_DELAY = 32.0
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+RETRY_REASONS = frozenset(('rateLimitExceeded', 'userRateLimitExceeded'))  # of 403 errors
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0         # edits the user waits for
+    BACKGROUND = 1          # sync, served when no interactive request is waiting
+
+
+class SchedulerStats(NamedTuple):
+    queue_depth: Dict[Priority, int]    # requests waiting for their turn now, per lane
+    max_queue_depth: int                # the most requests that waited at the same time
+    requests: Dict[Priority, int]       # requests let through, per lane, retries included
+    wait_time: Dict[Priority, float]    # seconds spent waiting for a turn, per lane
+    max_wait: float                     # the longest wait of a single request
+    retries: int
+
+    def mean_wait(self, priority: Priority) -> float:
+        return self.wait_time[priority] / self.requests[priority] if self.requests[priority] else 0.0
+
+
+class TokenBucket:
+    """Tokens refilled at a constant rate up to a capacity, not thread safe on its own."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        :param rate: Tokens added a second.
+        :param capacity: The most tokens held, the bucket starts full.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def take(self, cost: float = 1) -> float:
+        """
+        Take tokens if there are enough.
+        :param cost: The tokens to take, at most the capacity.
+        :return: 0 when they were taken, otherwise the seconds until there will be enough.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """Drop the tokens held, the next ones come at the refill rate."""
+        self.take(0)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+    """Lets Calendar API requests through at a limited rate, by priority, retrying transient failures."""
+
+    def __init__(self, rate: float = RATE, burst: float = BURST, max_attempts: int = MAX_ATTEMPTS,
+                 retry_delay: float = RETRY_DELAY, max_retry_delay: float = MAX_RETRY_DELAY,
+                 sleep: Callable[[float], None] = time.sleep, jitter: Callable[[], float] = random.random) -> None:
+        """
+        :param rate: Requests a second in the long run.
+        :param burst: Requests let through at once after a quiet period.
+        :param max_attempts: The number of times a request is sent before its error is raised.
+        :param retry_delay: The most seconds of the first backoff, doubled for every later one.
+        :param max_retry_delay: The most seconds of any backoff.
+        :param sleep: Waits out a backoff, replaced in tests.
+        :param jitter: A random number in [0, 1) the backoff is scaled by, replaced in tests.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.sleep = sleep
+        self.jitter = jitter
+        self._condition = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, ticket), the head is served next
+        self._tickets = itertools.count()
+        self._queue_depth = {priority: 0 for priority in Priority}
+        self._max_queue_depth = 0
+        self._requests = {priority: 0 for priority in Priority}
+        self._wait_time = {priority: 0.0 for priority in Priority}
+        self._max_wait = 0.0
+        self._retries = 0
+
+    def acquire(self, priority: Priority = Priority.BACKGROUND, cost: float = 1) -> float:
+        """
+        Wait for the turn of a request, or of a batch of requests.
+        :param priority: The lane of the request.
+        :param cost: The tokens it takes, the number of requests of a batch; capped to the burst.
+        :return: The seconds waited.
+        """
+        start = time.monotonic()
+        ticket = (int(priority), next(self._tickets))
+        cost = min(cost, self.bucket.capacity)
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._queue_depth[priority] += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._waiting))
+            self._condition.notify_all()  # a waiting head of lower priority gives up its turn
+            while True:
+                if self._waiting[0] == ticket:
+                    delay = self.bucket.take(cost)
+                    if not delay:
+                        break
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+            heapq.heappop(self._waiting)
+            self._queue_depth[priority] -= 1
+            waited = time.monotonic() - start
+            self._requests[priority] += 1
+            self._wait_time[priority] += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._condition.notify_all()  # the next head
+        return waited
+
+    def execute(self, request: Any, priority: Priority = Priority.INTERACTIVE) -> Any:
+        """
+        Send a request in its turn, again after a backoff while it fails transiently.
+        :param request: A request of the client library, e.g. service.events().insert(...).
+        :param priority: The lane of the request.
+        :return: The response of the request.
+        """
+        from googleapiclient.errors import HttpError  # type: ignore
+        from httplib2 import HttpLib2Error  # type: ignore
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.acquire(priority)
+            try:
+                return request.execute()
+            except (HttpError, HttpLib2Error, OSError) as error:
+                if attempt >= self.max_attempts or not is_retryable(error):
+                    raise
+                self.back_off(error, attempt)
+
+    def back_off(self, error: Exception, attempt: int) -> None:
+        """
+        Wait before sending a failed request again.
+        :param error: The error of the request.
+        :param attempt: The number of times it was sent.
+        """
+        delay = self.jitter() * min(self.max_retry_delay, self.retry_delay * 2 ** (attempt - 1))
+        if is_rate_limited(error):
+            delay = max(delay, _retry_after(error) or 0.0)
+            with self._condition:
+                self.bucket.drain()
+        with self._condition:
+            self._retries += 1
+        self.sleep(delay)
+
+    def stats(self) -> SchedulerStats:
+        with self._condition:
+            return SchedulerStats(dict(self._queue_depth), self._max_queue_depth, dict(self._requests),
+                                  dict(self._wait_time), self._max_wait, self._retries)
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """
+    Get the HTTP status of an error.
+    :param error: An error of the client library or of the transport.
+    :return: The status, None for a transport error.
+    """
+    response = getattr(error, 'resp', None)
+    return response.status if response is not None else None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    status = error_status(error)
+    if status == 403:
+        details = getattr(error, 'error_details', None) or []
+        return any(isinstance(detail, dict) and detail.get('reason') in RETRY_REASONS for detail in details)
+    return status == 429
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Tell a transient error from a final one.
+    :param error: An error of the client library or of the transport.
+    :return: True when sending the request again may succeed.
+    """
+    status = error_status(error)
+    if status is None:
+        return True  # a transport error, the request may not even have been sent
+    return status in RETRY_STATUSES or is_rate_limited(error)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'resp', None)
+    try:
+        return float(response.get('retry-after')) if response is not None else None
+    except (TypeError, ValueError):
+        return None  # missing, or an HTTP date
+
+
+default_scheduler = RequestScheduler()  # the scheduler of the process, shared by all calendar requests
@@ -0,0 +1,312 @@
+"""
+Two-way sync of tasks and calendar events that only sends what changed.
+
+The sync state keeps, for every synced task, the id of its event and a fingerprint (a hash of the
+synced fields) of both as they were after the last sync. A pass compares the tasks and the cached
+events with these fingerprints:
+
+- neither side changed: the task is skipped, without a request
+- the task changed: the event is patched with the fields that differ, not replaced
+- the event changed: the task is updated from it
+- both changed: the side edited last wins, by the update_date of the task against the updated
+  timestamp of the event
+
+Deletions go both ways alike: a synced task that is gone deletes its event, and an event deleted from
+the calendar deletes its task, unless the other side changed since, in which case it is recreated.
+
+A pass reads the tasks as rows, a Task is only built for the tasks updated from their events. The
+changes are sent between the plan and its application: the tasks edited or deleted meanwhile are not
+touched, they are left to the next pass.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional
+
+from organize_me.app.api import Api
+from organize_me.app.task import Task
+from organize_me.file_utils import atomic_write
+from organize_me.google_calendar.calendar_sync import (CalendarSync, EventChange, SyncResult, event_id, fields_to_event,
+                                                      task_to_event)
+from organize_me.google_calendar.event_cache import EventCache
+
+SYNC_STATE_FILE = "sync_state.json"  # next to token.json
+SYNC_STATE_VERSION = 1
+SYNCED_FIELDS = ('summary', 'description', 'start', 'end')
+
+
+class SyncRecord(NamedTuple):
+    event_id: str
+    task_hash: str   # fingerprint of the task as last synced
+    event_hash: str  # fingerprint of its event as last synced
+
+
+class SyncPlan(NamedTuple):
+    changes: List[EventChange]               # to send to the calendar, at most one per task
+    task_hashes: Dict[int, str]              # task id -> the fingerprint of the task of a change
+    task_updates: Dict[int, Dict[str, Any]]  # task id -> the fields to take from its event
+    task_deletes: List[int]                  # tasks whose events were deleted from the calendar
+    records: Dict[int, SyncRecord]           # pairs in sync once the task updates are applied
+    forgotten: List[int]                     # records of pairs gone from both sides, or no longer synced
+    task_versions: Dict[int, datetime]       # task id -> the update_date of a task to update or delete
+    skipped: int                             # pairs unchanged since the last sync
+
+
+class SyncReport(NamedTuple):
+    sent: int                       # changes that went through to the calendar
+    received: int                   # tasks updated or deleted from their events
+    skipped: int
+    errors: Dict[int, Exception]    # task id -> the error of a change that did not go through, retried next pass
+
+
+class SyncState:
+    """The synced pairs of tasks and events, by task id."""
+
+    def __init__(self, path: Optional[str] = SYNC_STATE_FILE) -> None:
+        """
+        :param path: The file the state is kept in between runs, None to keep it in memory only.
+        """
+        self.path = path
+        self.records: Dict[int, SyncRecord] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Read the state saved by the last run, a missing or unreadable one leaves it empty."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except ValueError:
+            return
+        if data.get('version') == SYNC_STATE_VERSION:
+            self.records = {int(task_id): SyncRecord(*record) for task_id, record in data['records'].items()}
+
+    def save(self) -> None:
+        """Write the state, fsynced: deletions are decided from it."""
+        if self.path is None:
+            return
+        data = {'version': SYNC_STATE_VERSION, 'records': {str(task_id): record for task_id, record in self.records.items()}}
+        atomic_write(self.path, json.dumps(data))
+
+
+class TaskEventSync:
+    """Plans a sync pass from the tasks, the cached events and the sync state, and applies its outcome."""
+
+    def __init__(self, api: Api, cache: EventCache, state: SyncState) -> None:
+        """
+        :param api: The tasks.
+        :param cache: The events of the calendar, up to date.
+        :param state: The pairs synced so far.
+        """
+        self.api = api
+        self.cache = cache
+        self.state = state
+
+    def run(self, calendar_sync: CalendarSync) -> SyncReport:
+        """
+        Run a whole pass: refresh the events, plan, send the changes and apply the outcome.
+        :param calendar_sync: Sends the changes to the calendar of the cache.
+        :return: What the pass did.
+        """
+        self.cache.sync()
+        plan = self.plan()
+        return self.apply(plan, calendar_sync.sync(plan.changes))
+
+    def plan(self) -> SyncPlan:
+        """
+        Compare the tasks and the cached events with the sync state.
+        :return: The changes to make on both sides.
+        """
+        return plan_sync(api_tasks(self.api), self.cache.events, self.state.records)
+
+    def apply(self, plan: SyncPlan, result: SyncResult) -> SyncReport:
+        """
+        Apply the event changes of a plan to the tasks, and record the pairs now in sync.
+        :param plan: The plan of the pass.
+        :param result: The outcome of sending its changes to the calendar.
+        :return: What the pass did.
+        """
+        records = self.state.records
+        # the tasks may have changed while the changes were sent: the ones edited or deleted since the
+        # plan are left to the next pass, rather than overwritten with what the plan read
+        versions = task_versions(self.api, plan.task_versions.keys())
+        stale = {task_id for task_id, version in plan.task_versions.items() if versions.get(task_id) != version}
+        task_updates = {task_id: data for task_id, data in plan.task_updates.items() if task_id not in stale}
+        task_deletes = [task_id for task_id in plan.task_deletes if task_id not in stale]
+        with self.api.transaction():
+            self.api.update_many(task_updates)
+            self.api.delete_many(task_deletes)
+        for task_id in plan.forgotten + task_deletes:
+            records.pop(task_id, None)
+        records.update((task_id, record) for task_id, record in plan.records.items() if task_id not in stale)
+        methods = {change.task_id: change.method for change in plan.changes}
+        for task_id, event in result.events.items():
+            if methods[task_id] == 'delete':
+                record = records.pop(task_id, None)
+                self.cache.events.pop(record.event_id if record is not None else event_id(task_id), None)
+            elif event is not None:
+                # the next incremental sync of the cache lists the event as well, this is the same version
+                self.cache.events[event['id']] = event
+                records[task_id] = SyncRecord(event['id'], plan.task_hashes[task_id], fingerprint(event_fields(event)))
+        self.state.save()
+        return SyncReport(len(result.events), len(task_updates) + len(task_deletes), plan.skipped, result.errors)
+
+
+def plan_sync(tasks: Iterable[Mapping[str, Any]], events: Mapping[str, Dict[str, Any]],
+              records: Mapping[int, SyncRecord]) -> SyncPlan:
+    """
+    Compare tasks and events with the fingerprints of their last sync. A Task is only built for the
+    tasks to update from their events.
+    :param tasks: All the tasks, their field values by name, see api_tasks.
+    :param events: All the events of the calendar, by id.
+    :param records: The pairs synced so far, by task id.
+    :return: The changes to make on both sides.
+    """
+    plan = SyncPlan([], {}, {}, [], {}, [], {}, 0)
+    seen = set()
+    skipped = 0
+    for task in tasks:
+        task_id = task['id']
+        seen.add(task_id)
+        record = records.get(task_id)
+        event = events.get(record.event_id if record is not None else event_id(task_id))
+        if task['start_date'] is None or task['end_date'] is None:  # not (or no longer) an event
+            if record is not None:
+                if event is not None:
+                    plan.changes.append(EventChange.delete(task_id))
+                else:
+                    plan.forgotten.append(task_id)
+            continue
+        body = fields_to_event(task)
+        task_now = event_fields(body)
+        task_hash = fingerprint(task_now)
+        task_changed = record is None or task_hash != record.task_hash
+        if event is None:
+            if task_changed:  # new, or changed since its event was deleted from the calendar
+                plan.changes.append(EventChange('insert', task_id, body))
+                plan.task_hashes[task_id] = task_hash
+            else:
+                plan.task_deletes.append(task_id)
+                plan.task_versions[task_id] = task['update_date']
+            continue
+        event_now = event_fields(event)
+        if record is None:  # the event of the task exists, its sync was not recorded
+            event_changed = task_changed = task_now != event_now
+        else:
+            event_changed = fingerprint(event_now) != record.event_hash
+        if not task_changed and not event_changed:
+            if record is None:
+                plan.records[task_id] = SyncRecord(event['id'], task_hash, fingerprint(event_now))
+            else:
+                skipped += 1
+        elif task_now == event_now:  # both sides made the same change
+            plan.records[task_id] = SyncRecord(event['id'], task_hash, fingerprint(event_now))
+        elif task_changed and (not event_changed or _task_is_newer(task, event)):
+            patch = {field: body[field] for field in SYNCED_FIELDS if task_now[field] != event_now[field]}
+            plan.changes.append(EventChange('patch', task_id, patch))
+            plan.task_hashes[task_id] = task_hash
+        else:
+            data = event_to_task_data(event)
+            try:
+                updated = Task.model_validate({**task, **data})
+            except ValueError:
+                continue  # the event cannot be a task, e.g. it ends before it starts
+            plan.task_updates[task_id] = data
+            plan.task_versions[task_id] = task['update_date']
+            plan.records[task_id] = SyncRecord(event['id'], fingerprint(task_fields(updated)), fingerprint(event_now))
+    for task_id, record in records.items():
+        if task_id in seen:
+            continue
+        event = events.get(record.event_id)
+        if event is not None and fingerprint(event_fields(event)) == record.event_hash:
+            plan.changes.append(EventChange.delete(task_id))
+        else:  # gone from both sides, or the event changed since: it is kept, no longer synced
+            plan.forgotten.append(task_id)
+    return plan._replace(skipped=skipped)
+
+
+def api_tasks(api: Api) -> Iterator[Dict[str, Any]]:
+    """
+    Read the tasks of an API, without building Task objects.
+    :param api: An API of tasks.
+    :return: The field values of every task by name, in the order of the API.
+    """
+    columns = api.columns()
+    return (dict(zip(columns, row)) for row in api.iter_rows())
+
+
+def task_versions(api: Api, task_ids: Collection[int]) -> Dict[int, datetime]:
+    """
+    Read the update dates of tasks of an API.
+    :param api: An API of tasks.
+    :param task_ids: The tasks to read.
+    :return: The update date of every one of them still in the API, by id.
+    """
+    if not task_ids:
+        return {}
+    columns = api.columns()
+    id_column, update_column = columns.index('id'), columns.index('update_date')
+    return {row[id_column]: row[update_column] for row in api.iter_rows() if row[id_column] in task_ids}
+
+
+def fingerprint(fields: Mapping[str, Any]) -> str:
+    """
+    Hash synced fields.
+    :param fields: The fields of event_fields.
+    :return: A digest that changes with any of them.
+    """
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def task_fields(task: Task) -> Dict[str, Any]:
+    return event_fields(task_to_event(task))
+
+
+def event_fields(event: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Get the synced fields of an event in a form comparable with those of a task.
+    :param event: An event body, as sent or as returned by the API.
+    :return: The fields, dates in UTC and an empty description as None.
+    """
+    return {
+        'summary': event.get('summary'),
+        'description': event.get('description') or None,
+        'start': _utc_date(event.get('start', {})),
+        'end': _utc_date(event.get('end', {})),
+    }
+
+
+def event_to_task_data(event: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Get the task fields of an event.
+    :param event: An event returned by the API.
+    :return: The title, description and dates, the dates in local time like the ones of tasks.
+    """
+    return {
+        'title': event.get('summary') or event['id'],
+        'description': event.get('description') or '',  # None would leave the description of the task as is
+        'start_date': _local_date(event['start']),
+        'end_date': _local_date(event['end']),
+    }
+
+
+def _utc_date(date: Mapping[str, str]) -> Optional[str]:
+    # the API may answer with another offset than the one sent, the same instant compares equal in UTC
+    if 'dateTime' in date:
+        return datetime.fromisoformat(date['dateTime']).astimezone(timezone.utc).isoformat()
+    return date.get('date')
+
+
+def _local_date(date: Mapping[str, str]) -> datetime:
+    if 'dateTime' in date:
+        return datetime.fromisoformat(date['dateTime']).astimezone().replace(tzinfo=None)
+    return datetime.fromisoformat(date['date'])  # an all-day event, from midnight
+
+
+def _task_is_newer(task: Mapping[str, Any], event: Mapping[str, Any]) -> bool:
+    if 'updated' not in event:
+        return True
+    return bool(task['update_date'].astimezone() > datetime.fromisoformat(event['updated']))
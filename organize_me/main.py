@@ -1,2 +1,196 @@
-def run() -> None:
-    print("Hello, world!")
+"""
+Command line entry point. Without a command the TUI is started, the commands act on the tasks of the
+current directory headlessly, e.g. from scripts:
+
+    organize-me add "Write report" --start 2024-05-01T09:00 --end 2024-05-01T11:00 --tags work
+    organize-me list --sort start_date --tags "work and not done"
+    organize-me update <id> --title "Write the report" --tags work,done
+    organize-me rm <id> [<id> ...]
+    organize-me search report
+    organize-me export tasks.ics
+    organize-me import tasks.csv --skip-invalid
+
+Rows are printed one per line, the id, title, start and end dates and tags separated by tabs.
+
+Scripts run these in loops, so startup time matters: only argparse is imported up front, the task store
+(and pydantic with it) is imported by the commands that use it, Textual only by the TUI.
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from organize_me.app.task_api import TaskApi
+
+PROG = 'organize-me'
+LIST_COLUMNS = ('id', 'title', 'start_date', 'end_date', 'tags')
+SEARCH_LIMIT = 50
+FILE_FORMATS = ('jsonl', 'csv', 'ics')  # the values of task_io.TaskFileFormat, not imported for the parser
+
+
+def run(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Run a command, or the TUI when none is given
+
+    Args:
+        :param argv: the command line arguments, sys.argv[1:] when None
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # imported here rather than up front, it is a small module without dependencies
+    from organize_me.app.exceptions import (DuplicateIdError, TagFilterSyntaxError, TaskImportError,
+                                            TaskNotFoundError)
+    try:
+        args.handler(args)
+    except (TaskNotFoundError, DuplicateIdError, TagFilterSyntaxError, TaskImportError,
+            ValueError, TypeError, KeyError, OSError) as error:
+        parser.exit(1, f"{PROG}: error: {error}\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the parser of the command line, each command sets the handler to call."""
+    parser = argparse.ArgumentParser(prog=PROG, description="Manage tasks from the terminal.")
+    parser.set_defaults(handler=_tui, calendar=False)
+    commands = parser.add_subparsers(title='commands', metavar='<command>')
+
+    add = commands.add_parser('add', help="add a task and print its id")
+    add.add_argument('title')
+    _add_task_arguments(add)
+    add.set_defaults(handler=_add)
+
+    list_ = commands.add_parser('list', help="print the tasks")
+    list_.add_argument('--sort', metavar='FIELD', help="order the tasks by a field, tasks without a value last")
+    list_.add_argument('--tags', metavar='FILTER', help="only the tasks passing a tag filter, e.g. 'work and not done'")
+    list_.add_argument('--limit', type=int, help="print at most this many tasks")
+    list_.set_defaults(handler=_list)
+
+    update = commands.add_parser('update', help="change fields of a task")
+    update.add_argument('id', type=int)
+    update.add_argument('--title')
+    _add_task_arguments(update)
+    update.set_defaults(handler=_update)
+
+    rm = commands.add_parser('rm', help="remove tasks")
+    rm.add_argument('ids', metavar='id', type=int, nargs='+')
+    rm.set_defaults(handler=_rm)
+
+    search = commands.add_parser('search', help="print the tasks whose title or description hold words")
+    search.add_argument('words', metavar='word', nargs='+')
+    search.add_argument('--limit', type=int, default=SEARCH_LIMIT, help="print at most this many tasks")
+    search.set_defaults(handler=_search)
+
+    export = commands.add_parser('export', help="write the tasks to a JSON Lines, CSV or iCalendar file")
+    export.add_argument('path')
+    export.add_argument('--format', choices=FILE_FORMATS, help="the file format, by default from the extension")
+    export.set_defaults(handler=_export)
+
+    import_ = commands.add_parser('import', help="add the tasks of a JSON Lines, CSV or iCalendar file")
+    import_.add_argument('path')
+    import_.add_argument('--format', choices=FILE_FORMATS, help="the file format, by default from the extension")
+    import_.add_argument('--skip-invalid', action='store_true', help="skip invalid records instead of failing")
+    import_.set_defaults(handler=_import)
+
+    tui = commands.add_parser('tui', help="start the terminal user interface (the default)")
+    tui.add_argument('--calendar', action='store_true', help="connect to Google Calendar, c syncs the tasks with it")
+    tui.set_defaults(handler=_tui)
+    return parser
+
+
+def _add_task_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('-d', '--description')
+    parser.add_argument('--start', dest='start_date', metavar='DATE', help="ISO date, e.g. 2024-05-01T09:00")
+    parser.add_argument('--end', dest='end_date', metavar='DATE', help="ISO date, e.g. 2024-05-01T11:00")
+    parser.add_argument('--tags', help="comma-separated tags")
+
+
+def _task_data(args: argparse.Namespace) -> dict[str, Any]:
+    fields = ('title', 'description', 'start_date', 'end_date', 'tags')
+    return {field: getattr(args, field) for field in fields if getattr(args, field) is not None}
+
+
+def _task_api() -> 'TaskApi':
+    from organize_me.app.task_api import TaskApi
+    return TaskApi()
+
+
+def _add(args: argparse.Namespace) -> None:
+    api = _task_api()
+    print(api.add(**_task_data(args)))
+
+
+def _list(args: argparse.Namespace) -> None:
+    api = _task_api()
+    rows: Iterable[List[Any]]
+    if args.tags and args.sort:
+        # the tag index keeps no order, the matching rows are picked from the sorted ones
+        id_column = api.columns().index('id')
+        matching = {row[id_column] for row in api.filter_by_tags(args.tags, api.count())}
+        rows = islice((row for row in api.page(0, api.count(), args.sort) if row[id_column] in matching), args.limit)
+    elif args.tags:
+        rows = api.filter_by_tags(args.tags, api.count() if args.limit is None else args.limit)
+    elif args.sort or args.limit is not None:
+        rows = api.page(0, api.count() if args.limit is None else args.limit, args.sort)
+    else:
+        rows = api.iter_rows()
+    _print_rows(api.columns(), rows)
+
+
+def _update(args: argparse.Namespace) -> None:
+    data = _task_data(args)
+    if not data:
+        raise ValueError("nothing to update, give at least one field")
+    api = _task_api()
+    api.update(args.id, **api.serialize_data(**data))
+
+
+def _rm(args: argparse.Namespace) -> None:
+    _task_api().delete_many(args.ids)
+
+
+def _search(args: argparse.Namespace) -> None:
+    api = _task_api()
+    _print_rows(api.columns(), api.search(' '.join(args.words), args.limit))
+
+
+def _export(args: argparse.Namespace) -> None:
+    from organize_me.app.task_io import TaskFileFormat, export_tasks
+    file_format = TaskFileFormat(args.format) if args.format else None
+    print(f"exported {export_tasks(_task_api(), args.path, file_format)} tasks")
+
+
+def _import(args: argparse.Namespace) -> None:
+    from organize_me.app.task_io import TaskFileFormat, import_tasks
+    file_format = TaskFileFormat(args.format) if args.format else None
+    result = import_tasks(_task_api(), args.path, file_format, skip_invalid=args.skip_invalid)
+    print(f"imported {result.imported} tasks" + (f", skipped {result.skipped} invalid" if result.skipped else ""))
+
+
+def _tui(args: argparse.Namespace) -> None:
+    from organize_me.app.controller import Controller
+    calendar = None
+    if args.calendar:
+        from organize_me.google_calendar.async_calendar import AsyncCalendarClient
+        calendar = AsyncCalendarClient()
+    Controller(calendar=calendar).run()
+
+
+def _print_rows(columns: List[str], rows: Iterable[List[Any]]) -> None:
+    positions = [columns.index(column) for column in LIST_COLUMNS]
+    sys.stdout.writelines('\t'.join(_format_value(row[position]) for position in positions) + '\n' for row in rows)
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'minutes')
+    if isinstance(value, tuple):
+        return ','.join(value)
+    return str(value)
+
+
+if __name__ == '__main__':
+    run()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, ClassVar, Any
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, ValidationError, Field, field_validator, model_validator
 
 
 class Task(BaseModel):
@@ -69,11 +69,20 @@ class Task(BaseModel):
             self.update_date = datetime.now()
 
     def update(self, **kwargs: Any) -> None:
-        for field, value in kwargs.items():
-            if value is not None and field in self.model_fields:
-                setattr(self, field, value)
-        self.__validate__()
-
-    def __validate__(self) -> None:
-        self.__class__.model_validate(self.model_dump())
-        # Task.model_validate(self.model_dump())
+        """
+        Apply several changes at once: the task is validated a single time with all of them applied
+        (field validators and the date range alike) and update_date is bumped once. Nothing is changed
+        when the validation fails. None values and unknown fields are ignored.
+        """
+        changes = {field: value for field, value in kwargs.items()
+                   if value is not None and field in self.__class__.model_fields}
+        if not changes:
+            return
+        for field, value in changes.items():
+            if self.__class__.model_fields[field].frozen:
+                raise ValidationError.from_exception_data(
+                    self.__class__.__name__, [{'type': 'frozen_field', 'loc': (field,), 'input': value}]
+                )
+        validated = self.__class__.model_validate({**self.__dict__, 'update_date': datetime.now(), **changes})
+        self.__dict__.update(validated.__dict__)
+        self.__pydantic_fields_set__.update(changes, ('update_date',))
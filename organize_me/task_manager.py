@@ -1,33 +1,35 @@
 import os
-import json
 import uuid
 from datetime import datetime
 from typing import Optional, Dict
 from organize_me.exceptions import DuplicateIdError, TaskNotFoundError
 from organize_me.task import Task
+from organize_me.file_utils import Durability, atomic_write
+from organize_me.task_snapshot import dump_tasks, load_tasks
 
 
 class TaskManager:
     JSON_FILE = os.path.join(os.getcwd(), 'tasks.json')
+    DURABILITY = Durability.FSYNC_FILE
 
-    def __init__(self, tasks: Optional[Dict[int, Task]] = None):
+    def __init__(self, tasks: Optional[Dict[int, Task]] = None, durability: Optional[Durability] = None):
+        self.durability = self.DURABILITY if durability is None else durability
         self.tasks: Dict[int, Task] = tasks or self.read_json()
 
     def save_tasks(self) -> None:
-        with open(self.JSON_FILE, 'w') as outfile:
-            json.dump(self._tasks_to_json(), outfile)
+        atomic_write(self.JSON_FILE, self._tasks_to_json(), self.durability)
 
-    def _tasks_to_json(self) -> Dict[int, str]:
-        return {task_id: task.model_dump_json() for task_id, task in self.tasks.items()}
+    def _tasks_to_json(self) -> bytes:
+        return dump_tasks(self.tasks, Task)
 
     @staticmethod
-    def _json_to_tasks(data: Dict[int, str]) -> Dict[int, Task]:
-        return {int(task_id): Task.model_validate_json(task_json) for task_id, task_json in data.items()}
+    def _json_to_tasks(data: bytes) -> Dict[int, Task]:
+        return load_tasks(data, Task)
 
     def read_json(self) -> Dict[int, Task]:
         if os.path.exists(self.JSON_FILE):
-            with open(self.JSON_FILE, 'r') as file:
-                return self._json_to_tasks(json.load(file))
+            with open(self.JSON_FILE, 'rb') as file:
+                return self._json_to_tasks(file.read())
         return {}
 
     def add_task(self, title: str, description: Optional[str] = None,
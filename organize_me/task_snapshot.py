@@ -0,0 +1,47 @@
+import json
+from typing import ClassVar, Dict, Generic, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+TaskT = TypeVar('TaskT', bound=BaseModel)
+
+
+class TaskSnapshot(BaseModel, Generic[TaskT]):
+    """
+    On-disk format of tasks.json: ``{"version": 2, "tasks": {"<id>": {<task fields>}}}``.
+
+    The whole task map is encoded and validated by pydantic in a single pass. Version 1 files
+    (implicit, no version key) mapped each id to the task encoded as a JSON string of its own.
+    """
+    VERSION: ClassVar[int] = 2
+
+    version: int
+    tasks: Dict[int, TaskT]
+
+
+def dump_tasks(tasks: Dict[int, TaskT], task_cls: Type[TaskT]) -> bytes:
+    """
+    Encode tasks in the current snapshot format.
+
+    :param tasks: the tasks to encode, keyed by id
+    :param task_cls: the task model the tasks are instances of
+    :return: the encoded snapshot
+    """
+    snapshot = TaskSnapshot[task_cls].model_construct(version=TaskSnapshot.VERSION, tasks=tasks)  # type: ignore[valid-type]
+    return snapshot.model_dump_json().encode()
+
+
+def load_tasks(data: bytes, task_cls: Type[TaskT]) -> Dict[int, TaskT]:
+    """
+    Decode a snapshot, of the current format or the legacy one.
+
+    :param data: the content of the snapshot file
+    :param task_cls: the task model to validate the tasks with
+    :return: the tasks keyed by id
+    """
+    try:
+        return TaskSnapshot[task_cls].model_validate_json(data).tasks  # type: ignore[valid-type]
+    except ValidationError:
+        legacy = json.loads(data)
+        if not isinstance(legacy, dict) or not all(isinstance(value, str) for value in legacy.values()):
+            raise
+        return {int(task_id): task_cls.model_validate_json(task_json) for task_id, task_json in legacy.items()}
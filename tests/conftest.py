@@ -0,0 +1,25 @@
+import pytest
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from tests.fake_calendar import FakeCalendarHttp
+
+
+@pytest.fixture
+def task_files(monkeypatch, tmp_path):
+    """Fixture to keep the files of TaskApi in a temporary directory."""
+    for name in ('JSON_FILE', 'BINARY_FILE', 'JOURNAL_FILE', 'SEARCH_INDEX_FILE'):
+        monkeypatch.setattr(TaskApi, name, str(tmp_path / name.lower()))
+    return tmp_path
+
+
+@pytest.fixture
+def task_api(task_files) -> TaskApi:
+    """Fixture to provide a TaskApi holding 25 tasks tagged odd or even, persisted in a temporary directory."""
+    return TaskApi(tasks={task_id: Task(id=task_id, title=f'Task {task_id}', tags=['odd' if task_id % 2 else 'even'])
+                          for task_id in range(1, 26)})
+
+
+@pytest.fixture
+def fake_http() -> FakeCalendarHttp:
+    """Fixture to provide an empty fake of the Calendar API."""
+    return FakeCalendarHttp()
@@ -0,0 +1,200 @@
+"""
+A local fake of the events part of the Google Calendar HTTP API, for the real client library to talk to:
+
+    service = calendar_service(FakeCalendarHttp())
+
+It serves single requests and the multipart batches of new_batch_http_request from memory, and can
+be told to fail chosen requests or whole batches, or to lose the response of served batches. Event lists are paged and support incremental sync:
+every change is numbered, a sync token is the number of the last change listed, and tokens older than
+sync_tokens_valid_from are answered with 410 Gone. Like the real API, a deleted event is kept as
+cancelled: its id cannot be inserted again (409 Conflict), it can be read and restored by an update
+setting its status back to confirmed. Requests from several threads are served one at a
+time, after a simulated round trip (latency) that does overlap between threads.
+"""
+
+import re
+import json
+import time
+import itertools
+import threading
+from datetime import datetime, timezone
+from email.parser import Parser
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from httplib2 import Response
+from googleapiclient.discovery import build
+
+EVENTS_PATH = re.compile(r'^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$')
+BOUNDARY = 'batch_fake_calendar'
+
+
+def calendar_service(http: 'FakeCalendarHttp') -> Any:
+    """Build a Calendar API service of the client library talking to a fake."""
+    return build('calendar', 'v3', http=http, static_discovery=True)
+
+
+class FakeCalendarHttp:
+    def __init__(self) -> None:
+        self.calendars: Dict[str, Dict[str, Dict[str, Any]]] = {}  # calendar id -> event id -> event
+        self.cancelled: Dict[str, Dict[str, Dict[str, Any]]] = {}  # calendar id -> event id -> deleted event
+        # event id (calendar id for lists) -> statuses to answer its next requests with
+        self.failures: Dict[str, List[int]] = {}
+        self.batch_failures: List[int] = []  # statuses to answer the next batches with
+        self.lost_responses = 0  # the next batches are served, then answered with 503 as if their response was lost
+        self.batches: List[int] = []  # the number of requests of every batch served
+        self.requests = 0  # HTTP requests received, a batch is one
+        self.latency = 0.0  # seconds every request takes
+        self.offline = False  # requests fail to connect
+        self.in_flight = 0
+        self.max_in_flight = 0  # the most requests served at the same time
+        self._lock = threading.Lock()
+        self.sync_tokens_valid_from = 0  # older sync tokens have expired
+        self._etags = itertools.count(1)
+        self._sequence = 0  # number of the last change
+        self._changes: Dict[str, Dict[str, int]] = {}  # calendar id -> event id -> number of its last change
+
+    def events(self, calendar_id: str = 'primary') -> Dict[str, Dict[str, Any]]:
+        return self.calendars.setdefault(calendar_id, {})
+
+    def store_event(self, event: Dict[str, Any], calendar_id: str = 'primary',
+                    updated: Optional[datetime] = None) -> Dict[str, Any]:
+        """Add or replace an event, as if changed by another client, updated now unless told otherwise."""
+        stored = self.events(calendar_id)[event['id']] = {
+            'status': 'confirmed', **event, 'etag': str(next(self._etags)),
+            'updated': (updated or datetime.now(timezone.utc)).isoformat().replace('+00:00', 'Z'),
+        }
+        self.cancelled.get(calendar_id, {}).pop(event['id'], None)
+        self._log_change(calendar_id, event['id'])
+        return stored
+
+    def remove_event(self, event_id: str, calendar_id: str = 'primary') -> None:
+        """Delete an event, as if deleted by another client: it is kept as cancelled."""
+        del self.events(calendar_id)[event_id]
+        self.cancelled.setdefault(calendar_id, {})[event_id] = {
+            'id': event_id, 'status': 'cancelled', 'etag': str(next(self._etags)),
+            'updated': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        }
+        self._log_change(calendar_id, event_id)
+
+    def expire_sync_tokens(self) -> None:
+        self.sync_tokens_valid_from = self._sequence + 1
+
+    def _log_change(self, calendar_id: str, event_id: str) -> None:
+        self._sequence += 1
+        self._changes.setdefault(calendar_id, {})[event_id] = self._sequence
+
+    def request(self, uri: str, method: str = 'GET', body: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> Tuple[Response, bytes]:
+        if self.offline:
+            raise ConnectionRefusedError("offline")
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            with self._lock:
+                return self._serve(uri, method, body, headers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _serve(self, uri: str, method: str, body: Optional[str],
+               headers: Optional[Dict[str, str]]) -> Tuple[Response, bytes]:
+        parsed = urlparse(uri)
+        if parsed.path.startswith('/batch/'):
+            return self._batch(body or '', (headers or {})['content-type'])
+        status, content = self._handle(method, parsed.path, parse_qs(parsed.query), body)
+        return Response({'status': str(status), 'content-type': 'application/json'}), content.encode()
+
+    def _batch(self, body: str, content_type: str) -> Tuple[Response, bytes]:
+        if self.batch_failures:
+            status = self.batch_failures.pop(0)
+            return Response({'status': str(status)}), _error(status).encode()
+        message = Parser().parsestr(f'Content-Type: {content_type}\r\n\r\n{body}')
+        parts = message.get_payload()
+        self.batches.append(len(parts))
+        response_parts = []
+        for part in parts:
+            request_line, request = part.get_payload().split('\n', 1)
+            method, target, _ = request_line.split(' ')
+            request_message = Parser().parsestr(request)
+            parsed = urlparse(target)
+            status, content = self._handle(method, parsed.path, parse_qs(parsed.query),
+                                           request_message.get_payload() or None)
+            response_parts.append(
+                f'--{BOUNDARY}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{part["Content-ID"][1:-1]}>\r\n\r\n'
+                f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n\r\n{content}\r\n'
+            )
+        if self.lost_responses:
+            self.lost_responses -= 1
+            return Response({'status': '503'}), _error(503).encode()
+        content = ''.join(response_parts) + f'--{BOUNDARY}--\r\n'
+        return Response({'status': '200', 'content-type': f'multipart/mixed; boundary={BOUNDARY}'}), content.encode()
+
+    def _handle(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[str]) -> Tuple[int, str]:
+        match = EVENTS_PATH.match(path)
+        if match is None:
+            return 404, _error(404)
+        events = self.events(match[1])
+        data = json.loads(body) if body else {}
+        event_id = match[2] or data.get('id')
+        target = event_id or match[1]
+        if self.failures.get(target):
+            status = self.failures[target].pop(0)
+            return status, _error(status)
+        if method == 'GET' and match[2] is None:
+            return self._list(match[1], query)
+        cancelled = self.cancelled.get(match[1], {})
+        if method == 'POST':
+            if event_id in events or event_id in cancelled:
+                return 409, _error(409)
+            event_id = event_id or f'{next(self._etags):032x}'
+            return 200, json.dumps(self.store_event({**data, 'id': event_id}, match[1]))
+        event = events.get(event_id) or cancelled.get(event_id)
+        if event is None:
+            return 404, _error(404)
+        if method == 'GET':
+            return 200, json.dumps(event)
+        if method == 'DELETE':
+            if event_id in cancelled:
+                return 410, _error(410, 'deleted')
+            self.remove_event(event_id, match[1])
+            return 204, ''
+        if method in ('PUT', 'PATCH'):
+            base = event if method == 'PATCH' else {}
+            updated = {**base, **data, 'id': event_id}
+            if updated.get('status') == 'cancelled':  # still deleted
+                cancelled[event_id] = {**updated, 'etag': str(next(self._etags))}
+                return 200, json.dumps(cancelled[event_id])
+            return 200, json.dumps(self.store_event(updated, match[1]))
+        return 405, _error(405)
+
+    def _list(self, calendar_id: str, query: Dict[str, List[str]]) -> Tuple[int, str]:
+        events = self.events(calendar_id)
+        changes = self._changes.get(calendar_id, {})
+        if 'syncToken' in query:
+            since = int(query['syncToken'][0])
+            if since < self.sync_tokens_valid_from:
+                return 410, _error(410, 'fullSyncRequired')
+            # the events changed since the token, the deleted ones as cancelled
+            changed = sorted((sequence, event_id) for event_id, sequence in changes.items() if sequence > since)
+            items = [events.get(event_id) or self.cancelled[calendar_id][event_id] for _, event_id in changed]
+        else:
+            items = [events[event_id] for event_id in sorted(events)]
+        offset = int(query.get('pageToken', ['0'])[0])
+        limit = int(query.get('maxResults', ['250'])[0])
+        page: Dict[str, Any] = {'kind': 'calendar#events', 'items': items[offset:offset + limit]}
+        if offset + limit < len(items):
+            page['nextPageToken'] = str(offset + limit)
+        else:
+            page['nextSyncToken'] = str(self._sequence)
+        return 200, json.dumps(page)
+
+
+def _error(status: int, reason: str = 'backendError') -> str:
+    return json.dumps({'error': {'code': status, 'message': HTTPStatus(status).phrase,
+                                 'errors': [{'reason': reason, 'message': HTTPStatus(status).phrase}]}})
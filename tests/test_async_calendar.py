@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import pytest
+from organize_me.app.layout import Layout
+from organize_me.google_calendar.async_calendar import AsyncCalendarClient
+from organize_me.google_calendar.calendar_sync import EventChange, event_id
+from organize_me.google_calendar.request_scheduler import RequestScheduler
+from tests.fake_calendar import calendar_service
+from tests.test_calendar_sync import make_tasks
+
+
+@pytest.fixture
+def service_threads():
+    return []
+
+
+@pytest.fixture
+def calendar(fake_http, service_threads) -> AsyncCalendarClient:
+    def service_factory():
+        service_threads.append(threading.current_thread().name)
+        return calendar_service(fake_http)
+    client = AsyncCalendarClient(service_factory, cache_path=None, max_workers=4,
+                                 scheduler=RequestScheduler(rate=1000, burst=200), state_path=None,
+                                 outbox_path=None)
+    yield client
+    client.close()
+
+
+def test_push_runs_batches_concurrently(calendar, fake_http, service_threads):
+    fake_http.latency = 0.1
+    progress = []
+    result = asyncio.run(calendar.push([EventChange.insert(task) for task in make_tasks(200)],
+                                       lambda done, total: progress.append((done, total))))
+    assert fake_http.max_in_flight == 3  # round trips at once, not one after the other, a thread kept for edits
+    assert progress == [(50, 200), (100, 200), (150, 200), (200, 200)]
+    assert len(result.events) == 200 and not result.errors
+    assert len(service_threads) == 1  # a service shared by the pool threads
+
+
+def test_requests_and_refresh(calendar, fake_http):
+    async def scenario():
+        event = await calendar.insert_event({'id': 'event1', 'summary': 'Event'})
+        await calendar.update_event('event1', {**event, 'summary': 'Renamed'})
+        await calendar.insert_event({'id': 'event2', 'summary': 'Event'})
+        await calendar.delete_event('event2')
+        return await calendar.refresh_events()
+    assert asyncio.run(scenario()) == ['event1']
+    assert calendar.cache.events['event1']['summary'] == 'Renamed'
+
+
+@pytest.mark.asyncio
+async def test_layout_stays_responsive(task_api, calendar, fake_http):
+    fake_http.latency = 0.3
+    for task in make_tasks(3):
+        task_api.update(task.id, start_date=task.start_date, end_date=task.end_date)
+    app = Layout(api=task_api, calendar=calendar)
+    async with app.run_test() as pilot:
+        await pilot.press('c', 'down', 'down', 'down')
+        assert app.table.cursor_row == 3  # moved while the sync waits for the calendar
+        assert str(app.label_status.renderable) == 'calendar: syncing...'
+        await app.workers.wait_for_complete()
+        assert str(app.label_status.renderable) == 'calendar: 3 sent, 0 received, 0 unchanged'
+        fake_http.store_event({**fake_http.events()[event_id(2)], 'summary': 'Renamed'})
+        await pilot.press('c')
+        await app.workers.wait_for_complete()
+        assert str(app.label_status.renderable) == 'calendar: 0 sent, 1 received, 2 unchanged'
+        assert app.table.get_row_at(1)[1] == 'Renamed'
+        app.push_to_calendar([EventChange.delete(task.id) for task in make_tasks(2)])
+        await app.workers.wait_for_complete()
+        assert str(app.label_status.renderable) == 'calendar: 2 changes sent'
+        assert len(fake_http.events()) == 1
+
+
+@pytest.mark.asyncio
+async def test_layout_without_calendar(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press('c')
+        assert str(app.label_status.renderable) == 'no calendar connected'
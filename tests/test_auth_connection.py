@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import pytest
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery
+from organize_me.google_calendar import auth_connection
+from organize_me.google_calendar.async_calendar import AsyncCalendarClient
+from organize_me.google_calendar.auth_connection import Connection, connect, disconnect
+from organize_me.google_calendar.calendar_sync import CalendarSync, EventChange
+from tests.fake_calendar import FakeCalendarHttp
+from tests.test_calendar_sync import make_tasks
+
+
+class FakeCredentials(Credentials):
+    """Credentials whose refresh hands out the next numbered token, without a request."""
+
+    def __init__(self, expires_in: float, failures: int = 0, lifetime: float = 3600) -> None:
+        super().__init__(token='token0', refresh_token='refresh', token_uri='https://oauth2.googleapis.com/token',
+                         client_id='client', client_secret='secret', scopes=auth_connection.SCOPES,
+                         expiry=_utc_now() + timedelta(seconds=expires_in))
+        self.refreshes = 0
+        self.failures = failures
+        self.lifetime = lifetime  # seconds the refreshed tokens are valid
+        self.refreshed = threading.Event()
+
+    def refresh(self, request) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise RefreshError("offline")
+        self.refreshes += 1
+        self.token = f'token{self.refreshes}'
+        self.expiry = _utc_now() + timedelta(seconds=self.lifetime)
+        self.refreshed.set()
+
+
+class RecordingHttp(FakeCalendarHttp):
+    def __init__(self) -> None:
+        super().__init__()
+        self.authorizations = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.authorizations.append((headers or {}).get('authorization'))
+        return super().request(uri, method, body, headers, **kwargs)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # credentials keep a naive UTC expiry
+
+
+@pytest.fixture(autouse=True)
+def token_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_connection, 'TOKEN_FILE', str(tmp_path / 'token.json'))
+    yield tmp_path / 'token.json'
+    disconnect()
+
+
+def test_service_is_built_once(monkeypatch):
+    builds = []
+    build = discovery.build
+
+    def counting_build(*args, **kwargs):
+        builds.append(threading.current_thread().name)
+        return build(*args, **kwargs)
+    monkeypatch.setattr(discovery, 'build', counting_build)
+    monkeypatch.setattr(auth_connection, 'load_credentials', lambda: FakeCredentials(3600))
+    with ThreadPoolExecutor(8) as pool:
+        services = list(pool.map(lambda _: connect(), range(32)))
+    assert len(builds) == 1
+    assert all(service is services[0] for service in services)
+    client = AsyncCalendarClient(cache_path=None, state_path=None, outbox_path=None)
+    try:
+        assert asyncio.run(client.run(lambda service: service)) is services[0]
+    finally:
+        client.close()
+    assert len(builds) == 1
+    disconnect()
+    assert connect() is not services[0]
+    assert len(builds) == 2
+
+
+def test_threads_share_the_service_over_their_own_connections():
+    fake_http = RecordingHttp()
+    threads = []
+
+    def http_factory():
+        threads.append(threading.current_thread().name)
+        return fake_http
+    connection = Connection(FakeCredentials(3600), http_factory=http_factory)
+    try:
+        changes = [EventChange.insert(task) for task in make_tasks(200)]
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda start: CalendarSync(connection.service).sync(changes[start:start + 50]),
+                                    range(0, 200, 50)))
+    finally:
+        connection.close()
+    assert sum(len(result.events) for result in results) == 200
+    assert len(fake_http.events()) == 200
+    assert len(threads) == len(set(threads)) == 4
+    assert set(fake_http.authorizations) == {'Bearer token0'}
+
+
+def test_token_is_refreshed_before_it_expires(token_file, monkeypatch):
+    saved = threading.Event()
+    save_credentials = auth_connection.save_credentials
+    monkeypatch.setattr(auth_connection, 'save_credentials', lambda creds: (save_credentials(creds), saved.set()))
+    fake_http = RecordingHttp()
+    creds = FakeCredentials(expires_in=300)  # still valid to the client library, it would not refresh it
+    connection = Connection(creds, refresh_margin=299.8, http_factory=lambda: fake_http)
+    try:
+        connection.service.events().insert(calendarId='primary', body={'id': 'event1'}).execute()
+        assert saved.wait(5)
+        assert creds.refreshes == 1 and creds.valid
+        assert Credentials.from_authorized_user_file(str(token_file)).token == 'token1'
+        connection.service.events().get(calendarId='primary', eventId='event1').execute()
+    finally:
+        connection.close()
+    assert fake_http.authorizations == ['Bearer token0', 'Bearer token1']
+
+
+def test_failed_refresh_is_retried(monkeypatch):
+    monkeypatch.setattr(auth_connection, 'REFRESH_RETRY_DELAY', 0.1)
+    creds = FakeCredentials(expires_in=0, failures=2)
+    connection = Connection(creds, http_factory=FakeCalendarHttp)
+    try:
+        assert creds.refreshed.wait(5)
+    finally:
+        connection.close()
+    assert creds.refreshes == 1 and creds.failures == 0
+
+
+def test_short_lived_tokens_are_not_refreshed_in_a_loop(monkeypatch):
+    monkeypatch.setattr(auth_connection, 'REFRESH_RETRY_DELAY', 0.2)
+    monkeypatch.setattr(auth_connection, 'save_credentials', lambda creds: None)
+    creds = FakeCredentials(expires_in=0, lifetime=60)  # shorter than the refresh margin
+    connection = Connection(creds, http_factory=FakeCalendarHttp)
+    try:
+        assert creds.refreshed.wait(5)
+        time.sleep(0.5)
+    finally:
+        connection.close()
+    assert 1 <= creds.refreshes <= 4
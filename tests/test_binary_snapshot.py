@@ -0,0 +1,82 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from organize_me.app import binary_snapshot
+from organize_me.app.binary_snapshot import BinaryTasks, dump_binary, load_binary, read_header
+from organize_me.app.task import Task
+from organize_me.app.task_columns import TaskColumns
+
+
+def test_round_trip():
+    tasks = {
+        1: Task(id=1, title='Task 1'),
+        2: Task(id=2, title='Täsk 2 ✓', description=''),
+        3: Task(id=3, title='Task 3', description='Description 3', tags=['work', 'ünïcode'],
+                start_date=datetime(2021, 1, 1, 8, 30, 0, 123456), end_date=datetime(2021, 1, 2)),
+        2 ** 128 - 1: Task(id=2 ** 128 - 1, title='Task 4', description='Description 4',
+                           start_date=datetime(1900, 1, 1, tzinfo=timezone(timedelta(hours=-5))),
+                           end_date=datetime(2100, 1, 1, tzinfo=timezone.utc)),
+    }
+    loaded = load_binary(dump_binary(TaskColumns.from_tasks(tasks.values())))
+    assert loaded == tasks
+    assert [list(task.__dict__.values()) for task in loaded.values()] == \
+        [list(task.__dict__.values()) for task in tasks.values()]
+
+
+def test_read_version_1(monkeypatch):
+    tasks = {1: Task(id=1, title='Task 1', description='Description 1')}
+    with monkeypatch.context() as patch:
+        patch.setattr(binary_snapshot, 'VERSION', 1)
+        patch.setattr(binary_snapshot, 'COLUMNS', binary_snapshot.V1_COLUMNS)
+        patch.setattr(binary_snapshot, 'LIST_FIELDS', ())
+        snapshot = dump_binary(TaskColumns.from_tasks(tasks.values()))
+    assert read_header(snapshot)[0] == 1
+    assert load_binary(snapshot) == tasks
+
+
+def test_empty():
+    assert load_binary(dump_binary(TaskColumns())) == {}
+
+
+def test_invalid_snapshot():
+    with pytest.raises(ValueError):
+        load_binary(b'{"version": 2, "tasks": {}}')
+
+
+def test_tasks_decoded_on_access():
+    tasks = {task_id: Task(id=task_id, title=f'Task {task_id}') for task_id in range(1, 4)}
+    loaded = load_binary(dump_binary(TaskColumns.from_tasks(tasks.values())))
+    assert len(loaded) == 3 and 2 in loaded
+    assert not loaded._cache
+    assert loaded[2] == tasks[2]
+    assert list(loaded._cache) == [2]
+    del loaded[1]
+    loaded[4] = Task(id=4, title='Task 4')
+    assert list(loaded) == [2, 3, 4]
+    assert 1 not in loaded
+    with pytest.raises(KeyError):
+        loaded[1]
+
+
+def test_decoded_tasks_cache(monkeypatch):
+    monkeypatch.setattr(BinaryTasks, 'CACHE_SIZE', 2)
+    tasks = {task_id: Task(id=task_id, title=f'Task {task_id}') for task_id in range(1, 6)}
+    loaded = load_binary(dump_binary(TaskColumns.from_tasks(tasks.values())))
+    assert dict(loaded) == tasks
+    assert list(loaded._cache) == [4, 5]
+    modified = loaded[1]
+    modified.update(title='New Task 1')
+    loaded[1] = modified
+    for task_id in range(2, 6):
+        loaded[task_id]
+    assert loaded[1].title == 'New Task 1'
+    assert len(loaded._cache) == 2
+
+
+def test_read_columns_bypasses_cache():
+    tasks = {task_id: Task(id=task_id, title=f'Task {task_id}') for task_id in range(1, 4)}
+    loaded = load_binary(dump_binary(TaskColumns.from_tasks(tasks.values())))
+    loaded[3] = Task(id=3, title='New Task 3')
+    columns = loaded.read_columns([3, 1])
+    assert columns.title == ('New Task 3', 'Task 1')
+    assert columns.rows()[1] == list(tasks[1].__dict__.values())
+    assert not loaded._cache
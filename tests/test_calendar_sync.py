@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import pytest
+from organize_me.app.task import Task
+from organize_me.google_calendar.calendar_sync import CalendarSync, EventChange, event_id, task_to_event
+from organize_me.google_calendar.request_scheduler import Priority, RequestScheduler
+from tests.fake_calendar import calendar_service
+
+
+@pytest.fixture
+def delays():
+    return []
+
+
+@pytest.fixture
+def calendar_sync(fake_http, delays) -> CalendarSync:
+    service = calendar_service(fake_http)
+    return CalendarSync(service, sleep=delays.append)
+
+
+def make_tasks(count: int):
+    start = datetime(2024, 5, 1, 9)
+    return [Task(id=task_id, title=f'Task {task_id}', start_date=start + timedelta(days=task_id),
+                 end_date=start + timedelta(days=task_id, hours=1)) for task_id in range(1, count + 1)]
+
+
+def test_task_to_event():
+    task = Task(id=255, title='Task', description='Description', tags=['work'],
+                start_date=datetime(2024, 5, 1, 9), end_date=datetime(2024, 5, 1, 10))
+    event = task_to_event(task)
+    assert event['id'] == event_id(255) == '000000000000000000000000000000ff'
+    assert datetime.fromisoformat(event['start']['dateTime']) == task.start_date.astimezone()
+    assert event['extendedProperties']['private'] == {'organizeMeTaskId': '255'}
+    with pytest.raises(ValueError):
+        task_to_event(Task(id=1, title='Without dates'))
+
+
+def test_changes_are_batched(calendar_sync, fake_http):
+    tasks = make_tasks(120)
+    result = calendar_sync.sync(EventChange.insert(task) for task in tasks)
+    assert fake_http.batches == [50, 50, 20]
+    assert not result.errors
+    assert result.events[7]['summary'] == 'Task 7'
+    assert len(fake_http.events()) == 120
+    renamed = tasks[0].model_copy(update={'title': 'Renamed'})
+    result = calendar_sync.sync([EventChange.update(renamed), EventChange.delete(2)])
+    assert fake_http.batches[-1] == 2
+    assert result.events == {1: fake_http.events()[event_id(1)], 2: None}
+    assert fake_http.events()[event_id(1)]['summary'] == 'Renamed'
+    assert event_id(2) not in fake_http.events()
+
+
+def test_only_failed_changes_are_retried(calendar_sync, fake_http, delays):
+    fake_http.failures = {event_id(3): [503, 429], event_id(5): [400], event_id(8): [403]}
+    result = calendar_sync.sync(EventChange.insert(task) for task in make_tasks(10))
+    assert fake_http.batches == [10, 1, 1]  # task 3 twice, the bad request and the forbidden one never again
+    assert delays == [1.0, 2.0]
+    assert set(result.events) == {1, 2, 3, 4, 6, 7, 9, 10}
+    assert {task_id: error.resp.status for task_id, error in result.errors.items()} == {5: 400, 8: 403}
+
+
+def test_failed_batch_is_retried(calendar_sync, fake_http):
+    fake_http.batch_failures = [503]
+    result = calendar_sync.sync(EventChange.insert(task) for task in make_tasks(3))
+    assert fake_http.requests == 2
+    assert not result.errors
+    assert len(fake_http.events()) == 3
+
+
+def test_attempts_are_limited(calendar_sync, fake_http, delays):
+    fake_http.failures = {event_id(1): [503] * 10}
+    result = calendar_sync.sync([EventChange.insert(make_tasks(1)[0])])
+    assert fake_http.requests == calendar_sync.max_attempts
+    assert result.errors[1].resp.status == 503
+    assert len(delays) == calendar_sync.max_attempts - 1
+
+
+def test_lost_responses_count_as_applied(calendar_sync, fake_http):
+    task = make_tasks(1)[0]
+    calendar_sync.sync([EventChange.insert(task)])
+    result = calendar_sync.sync([EventChange.insert(task), EventChange.delete(2)])  # exists, never existed
+    assert not result.errors
+    assert result.events == {1: fake_http.events()[event_id(1)], 2: None}
+
+
+def test_deleted_event_is_restored(calendar_sync, fake_http):
+    task = make_tasks(1)[0]
+    calendar_sync.sync([EventChange.insert(task)])
+    calendar_sync.sync([EventChange.delete(task.id)])
+    assert fake_http.cancelled['primary'][event_id(1)]['status'] == 'cancelled'
+    result = calendar_sync.sync([EventChange.insert(task)])  # the id of a deleted event stays reserved
+    assert not result.errors
+    assert result.events[1]['status'] == 'confirmed' and result.events[1]['summary'] == 'Task 1'
+    assert fake_http.events()[event_id(1)] == result.events[1]
+    assert fake_http.batches == [1, 1, 1, 1, 1]  # the insert, the delete, then the insert, its read and its restore
+
+
+def test_one_change_per_task(calendar_sync):
+    with pytest.raises(ValueError):
+        calendar_sync.sync([EventChange.delete(1), EventChange.delete(1)])
+
+
+def test_batches_are_rate_limited(fake_http):
+    scheduler = RequestScheduler()
+    turns = []
+    scheduler.acquire = lambda priority, cost: turns.append((priority, cost))
+    calendar_sync = CalendarSync(calendar_service(fake_http), scheduler=scheduler)
+    calendar_sync.sync(EventChange.insert(task) for task in make_tasks(120))
+    assert turns == [(Priority.BACKGROUND, 50), (Priority.BACKGROUND, 50), (Priority.BACKGROUND, 20)]
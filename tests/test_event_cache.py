@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from googleapiclient.errors import HttpError
+from organize_me.google_calendar.event_cache import EventCache
+from tests.fake_calendar import FakeCalendarHttp, calendar_service
+
+
+def make_calendar(count: int) -> FakeCalendarHttp:
+    fake_http = FakeCalendarHttp()
+    start = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+    for number in range(count):
+        fake_http.store_event({'id': f'event{number:05}', 'summary': f'Event {number}',
+                               'start': {'dateTime': (start + timedelta(hours=number)).isoformat()},
+                               'end': {'dateTime': (start + timedelta(hours=number + 1)).isoformat()}})
+    return fake_http
+
+
+def event_cache(fake_http: FakeCalendarHttp, **kwargs) -> EventCache:
+    return EventCache(calendar_service(fake_http), **kwargs)
+
+
+def test_full_then_incremental_sync(tmp_path):
+    fake_http = make_calendar(250)
+    cache = event_cache(fake_http, path=str(tmp_path / 'events.json'), page_size=100)
+    assert len(cache.sync()) == 250
+    assert fake_http.requests == 3  # pages of 100
+    fake_http.store_event({**fake_http.events()['event00001'], 'summary': 'Renamed'})
+    fake_http.remove_event('event00002')
+    fake_http.store_event({'id': 'new', 'start': {'date': '2024-06-01'}, 'end': {'date': '2024-06-02'}})
+    reloaded = event_cache(fake_http, path=str(tmp_path / 'events.json'), page_size=100)
+    assert sorted(reloaded.sync()) == ['event00001', 'event00002', 'new']
+    assert fake_http.requests == 4
+    assert reloaded.events['event00001']['summary'] == 'Renamed'
+    assert 'event00002' not in reloaded.events
+    assert reloaded.events == fake_http.events()
+    assert reloaded.sync() == []
+
+
+@pytest.mark.parametrize('size', [10, 1000, 5000])
+def test_requests_stay_flat_as_the_calendar_grows(size):
+    fake_http = make_calendar(size)
+    cache = event_cache(fake_http, path=None)
+    cache.sync()
+    full_sync_requests = fake_http.requests
+    for number in range(3):
+        fake_http.store_event({**fake_http.events()[f'event{number:05}'], 'summary': 'Renamed'})
+        assert cache.sync() == [f'event{number:05}']
+    assert full_sync_requests == -(-size // 2500)  # pages of 2500
+    assert fake_http.requests - full_sync_requests == 3
+
+
+def test_expired_sync_token_falls_back_to_full_sync():
+    fake_http = make_calendar(5)
+    cache = event_cache(fake_http, path=None)
+    cache.sync()
+    fake_http.remove_event('event00000')
+    fake_http.store_event({**fake_http.events()['event00001'], 'summary': 'Renamed'})
+    fake_http.expire_sync_tokens()
+    assert sorted(cache.sync()) == ['event00000', 'event00001']
+    assert fake_http.requests == 3  # the full sync, the expired token, the full sync again
+    assert cache.events == fake_http.events()
+    assert cache.sync() == []
+
+
+def test_other_errors_are_raised():
+    fake_http = make_calendar(1)
+    cache = event_cache(fake_http, path=None)
+    fake_http.failures = {'primary': [500]}
+    with pytest.raises(HttpError):
+        cache.sync()
+    assert cache.sync_token is None
+    cache.sync()
+    fake_http.failures = {'primary': [500]}
+    with pytest.raises(HttpError):
+        cache.sync()
+    assert cache.sync_token is not None
+
+
+def test_upcoming():
+    cache = event_cache(make_calendar(10), path=None)
+    cache.sync()
+    now = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    assert [event['summary'] for event in cache.upcoming(2, now)] == ['Event 4', 'Event 5']
@@ -0,0 +1,25 @@
+import os
+import pytest
+from organize_me.file_utils import Durability, atomic_write
+
+
+@pytest.mark.parametrize("durability", list(Durability))
+def test_atomic_write(tmp_path, durability):
+    path = tmp_path / 'tasks.json'
+    atomic_write(str(path), '{"old": 1}', durability)
+    atomic_write(str(path), b'{"new": 2}', durability)
+    assert path.read_text() == '{"new": 2}'
+    assert os.listdir(tmp_path) == ['tasks.json']
+
+
+def test_failed_write_keeps_old_content(tmp_path, monkeypatch):
+    path = tmp_path / 'tasks.json'
+    atomic_write(str(path), '{"old": 1}')
+
+    def crash(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, 'replace', crash)
+    with pytest.raises(OSError):
+        atomic_write(str(path), '{"new": 2}')
+    assert path.read_text() == '{"old": 1}'
+    assert os.listdir(tmp_path) == ['tasks.json']
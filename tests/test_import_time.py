@@ -0,0 +1,31 @@
+import re
+import sys
+import subprocess
+from typing import List
+import pytest
+
+# modules that must not be imported by the modules that start the application, their import time is
+# measured by benchmarks/bench_cli_startup.py
+HEAVY_MODULES = ('pydantic', 'textual', 'googleapiclient', 'google_auth_oauthlib', 'google.auth', 'google.oauth2')
+STARTUP_MODULES = (
+    'organize_me.main',
+    'organize_me.google_calendar.auth_connection',
+    'organize_me.google_calendar.calendar_events',
+    'organize_me.google_calendar.calendar_service',
+)
+IMPORT_TIME_LINE = re.compile(r'import time:\s+\d+ \|\s+\d+ \| *(\S+)')
+
+
+def imported_modules(module: str) -> List[str]:
+    """Import a module in a fresh interpreter, get the names of every module imported."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True).stderr
+    return [match[1] for match in IMPORT_TIME_LINE.finditer(stderr)]
+
+
+@pytest.mark.parametrize('module', STARTUP_MODULES)
+def test_no_heavy_imports(module):
+    modules = imported_modules(module)
+    assert module in modules
+    heavy = sorted(name for name in modules if name.startswith(HEAVY_MODULES))
+    assert not heavy, f"{module} imports {', '.join(heavy)}, import them on first use"
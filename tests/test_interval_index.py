@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from organize_me.app.task import Task
+from organize_me.app.interval_index import IntervalIndex
+
+
+def day(number: int, hour: int = 0) -> datetime:
+    return datetime(2024, 1, number, hour)
+
+
+@pytest.fixture
+def index() -> IntervalIndex:
+    """Fixture to provide an index of tasks of different lengths."""
+    index = IntervalIndex()
+    index.build([
+        Task(id=1, title='Meeting', start_date=day(2, 10), end_date=day(2, 11)),
+        Task(id=2, title='Sprint', start_date=day(1), end_date=day(14)),
+        Task(id=3, title='Trip', start_date=day(5), end_date=day(8)),
+        Task(id=4, title='Instant', start_date=day(9), end_date=day(9)),
+        Task(id=5, title='No dates'),
+    ])
+    return index
+
+
+def test_starting_between(index):
+    assert index.starting_between(day(2), day(9)) == [1, 3, 4]
+    assert index.starting_between(day(3), day(4)) == []
+
+
+def test_overlapping(index):
+    assert index.overlapping(day(3), day(4)) == [2]
+    assert index.overlapping(day(2, 11), day(5)) == [2, 1, 3]
+    assert index.overlapping(day(9), day(9)) == [2, 4]
+    assert index.overlapping(day(15), day(20)) == []
+
+
+def test_overlapping_matches_linear_scan():
+    index = IntervalIndex()
+    ranges = {task_id: (day(1) + timedelta(hours=task_id * 7 % 500), timedelta(minutes=task_id ** 3 % 20000))
+              for task_id in range(1, 300)}
+    index.build_ranges((task_id, start, start + length) for task_id, (start, length) in ranges.items())
+    for hours in range(0, 600, 13):
+        start, end = day(1) + timedelta(hours=hours), day(1) + timedelta(hours=hours + 5)
+        expected = sorted((task_start, task_id) for task_id, (task_start, length) in ranges.items()
+                          if task_start <= end and task_start + length >= start)
+        assert index.overlapping(start, end) == [task_id for _, task_id in expected]
+
+
+def test_incremental_updates(index):
+    index.reindex(Task(id=3, title='Trip', start_date=day(20), end_date=day(21)))
+    index.remove(1)
+    index.remove(5)
+    assert index.overlapping(day(2), day(8)) == [2]
+    index.add(Task(id=6, title='Call', start_date=day(6), end_date=day(6, 1)))
+    assert index.overlapping(day(2), day(8)) == [2, 6]
+    assert index.starting_between(day(15), day(31)) == [3]
+    assert len(index) == 4
+
+
+def test_aware_dates():
+    index = IntervalIndex()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    index.add(Task(id=1, title='Aware', start_date=start, end_date=start + timedelta(hours=1)))
+    assert index.overlapping(start.astimezone().replace(tzinfo=None), start.astimezone().replace(tzinfo=None)) == [1]
@@ -0,0 +1,87 @@
+import pytest
+from organize_me.app.layout import Layout
+from organize_me.app.task_api import TaskApi
+
+
+@pytest.fixture
+def task_api(task_api, monkeypatch) -> TaskApi:
+    """Fixture to make the tasks of the shared task_api a few pages."""
+    monkeypatch.setattr(Layout, 'PAGE_SIZE', 10)
+    return task_api
+
+
+@pytest.mark.asyncio
+async def test_first_page_only(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test():
+        assert app.table.row_count == Layout.PAGE_SIZE
+        assert not app.all_rows_fetched
+
+
+@pytest.mark.asyncio
+async def test_fetch_pages_while_scrolling(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press(*['down'] * (Layout.PAGE_SIZE // 2))
+        assert app.table.row_count == 2 * Layout.PAGE_SIZE
+        await pilot.press(*['down'] * Layout.PAGE_SIZE)
+        assert app.table.row_count == task_api.count()
+        assert app.all_rows_fetched
+
+
+@pytest.mark.asyncio
+async def test_live_filter(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press('slash', '2', '1')
+        assert app.table.row_count == 1
+        assert app.table.get_row_at(0)[1] == 'Task 21'
+        await pilot.press('backspace')
+        assert app.table.row_count == 7  # 2, 12, 20..24
+        await pilot.press('escape')
+        assert app.table.row_count == Layout.PAGE_SIZE
+        assert not app.search_input.display
+
+
+@pytest.mark.asyncio
+async def test_sort(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press(*['s'] * (1 + task_api.sort_columns().index('title')))
+        assert app.sort_by == 'title'
+        assert [app.table.get_row_at(row)[1] for row in range(3)] == ['Task 1', 'Task 10', 'Task 11']
+        await pilot.press(*['down'] * Layout.PAGE_SIZE)
+        assert app.table.row_count == 2 * Layout.PAGE_SIZE
+        await pilot.press(*['s'] * (len(task_api.sort_columns()) - task_api.sort_columns().index('title')))
+        assert app.sort_by is None
+        assert app.table.get_row_at(1)[1] == 'Task 2'
+
+
+@pytest.mark.asyncio
+async def test_tag_filter(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press('t', '(', 'o', 'd', 'd')
+        assert app.table.get_row_at(1)[1] == 'Task 2'  # incomplete filter, the rows stay
+        await pilot.press(')')
+        assert {app.table.get_row_at(row)[-1] for row in range(app.table.row_count)} == {'odd'}
+        await pilot.press(*' even')
+        assert app.table.row_count == 0
+        await pilot.press('escape')
+        assert app.table.row_count == Layout.PAGE_SIZE
+        assert not app.tag_input.display
+
+
+@pytest.mark.asyncio
+async def test_remove_selected_rows(task_api):
+    app = Layout(api=task_api)
+    async with app.run_test() as pilot:
+        await pilot.press('space', 'down', 'down', 'space', 'down', 'space', 'space')
+        assert list(app.selected_rows) == [1, 3]
+        await pilot.press('r')
+        assert [app.table.get_row_at(row)[0] for row in range(3)] == [2, 4, 5]
+        assert not app.selected_rows
+        assert task_api.count() == 23
+        assert 1 not in TaskApi().tasks
+        await pilot.press('r')  # without a selection, the current row
+        assert task_api.count() == 22
@@ -0,0 +1,70 @@
+import pytest
+from organize_me.main import run
+from organize_me.app.task_api import TaskApi
+
+
+@pytest.fixture(autouse=True)
+def task_files(monkeypatch, tmp_path):
+    """Fixture to keep the files of the commands in a temporary directory."""
+    for name in ('JSON_FILE', 'BINARY_FILE', 'JOURNAL_FILE', 'SEARCH_INDEX_FILE'):
+        monkeypatch.setattr(TaskApi, name, str(tmp_path / name.lower()))
+    return tmp_path
+
+
+def output_of(capsys, *argv: str) -> str:
+    run(argv)
+    return capsys.readouterr().out
+
+
+def test_add_and_list(capsys):
+    task_id = int(output_of(capsys, 'add', 'Write report', '--start', '2024-05-01T09:00', '--end',
+                            '2024-05-01T11:00', '--tags', 'work, urgent'))
+    output_of(capsys, 'add', 'Read mail', '-d', 'inbox zero', '--tags', 'home')
+    assert TaskApi().get_task(task_id).tags == ('work', 'urgent')
+    rows = [line.split('\t') for line in output_of(capsys, 'list', '--sort', 'title').splitlines()]
+    assert [row[1:] for row in rows] == [['Read mail', '', '', 'home'],
+                                         ['Write report', '2024-05-01 09:00', '2024-05-01 11:00', 'work,urgent']]
+    assert output_of(capsys, 'list', '--tags', 'work and not home').split('\t')[0] == str(task_id)
+    assert output_of(capsys, 'search', 'inbox').split('\t')[1] == 'Read mail'
+
+
+def test_list_sorted_by_tags(capsys):
+    for title, start, tags in (('Late', '2024-05-03', 'work'), ('Home', '2024-05-01', 'home'),
+                               ('Early', '2024-05-02', 'work')):
+        output_of(capsys, 'add', title, '--start', start, '--end', start, '--tags', tags)
+    output_of(capsys, 'add', 'Undated', '--tags', 'work')
+    rows = output_of(capsys, 'list', '--sort', 'start_date', '--tags', 'work and not done').splitlines()
+    assert [row.split('\t')[1] for row in rows] == ['Early', 'Late', 'Undated']
+    rows = output_of(capsys, 'list', '--sort', 'start_date', '--tags', 'work', '--limit', '1').splitlines()
+    assert [row.split('\t')[1] for row in rows] == ['Early']
+
+
+def test_update_and_rm(capsys):
+    task_ids = [int(output_of(capsys, 'add', f'Task {number}')) for number in range(3)]
+    run(['update', str(task_ids[0]), '--title', 'Renamed', '--tags', 'done'])
+    assert TaskApi().get_task(task_ids[0]).title == 'Renamed'
+    run(['rm', str(task_ids[0]), str(task_ids[2])])
+    assert list(TaskApi().tasks) == [task_ids[1]]
+
+
+def test_errors(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        run(['rm', '1'])
+    assert exit_info.value.code == 1
+    assert 'Task ID 1 not found' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        run(['list', '--tags', 'work and'])
+    assert 'Invalid tag filter' in capsys.readouterr().err
+    with pytest.raises(SystemExit) as exit_info:
+        run(['update', '1'])
+    assert 'nothing to update' in capsys.readouterr().err
+
+
+def test_export_and_import(capsys, task_files):
+    output_of(capsys, 'add', 'Write report', '--tags', 'work')
+    path = str(task_files / 'tasks.jsonl')
+    assert output_of(capsys, 'export', path) == 'exported 1 tasks\n'
+    run(['rm', *(str(task_id) for task_id in TaskApi().tasks)])
+    assert output_of(capsys, 'import', path) == 'imported 1 tasks\n'
+    assert [task.title for task in TaskApi().tasks.values()] == ['Write report']
+
@@ -0,0 +1,128 @@
+import pytest
+from organize_me.google_calendar.async_calendar import AsyncCalendarClient
+from organize_me.app.layout import Layout
+from organize_me.google_calendar.calendar_sync import CalendarSync, EventChange, event_id
+from organize_me.google_calendar.outbox import Outbox, coalesce
+from organize_me.google_calendar.request_scheduler import RequestScheduler
+from tests.fake_calendar import calendar_service
+from tests.test_calendar_sync import make_tasks
+
+INSERT = EventChange('insert', 1, {'id': event_id(1), 'summary': 'Task', 'description': 'First'})
+UPDATE = EventChange('update', 1, {'id': event_id(1), 'summary': 'Renamed'})
+PATCH = EventChange('patch', 1, {'description': 'Second'})
+DELETE = EventChange.delete(1)
+
+
+@pytest.mark.parametrize('changes, expected', [
+    ([INSERT, UPDATE], INSERT._replace(body=UPDATE.body)),
+    ([INSERT, PATCH], INSERT._replace(body={**INSERT.body, **PATCH.body})),
+    ([INSERT, UPDATE, PATCH, DELETE], None),
+    ([UPDATE, PATCH], UPDATE._replace(body={**UPDATE.body, **PATCH.body})),
+    ([PATCH, UPDATE], UPDATE),
+    ([UPDATE, DELETE], DELETE),
+    ([DELETE, INSERT], INSERT._replace(method='update')),  # the event was not deleted yet, it is replaced
+])
+def test_coalesce(changes, expected):
+    queued = None
+    for change in changes:
+        queued = coalesce(queued, change)
+    assert queued == expected
+
+
+@pytest.fixture
+def calendar_sync(fake_http) -> CalendarSync:
+    return CalendarSync(calendar_service(fake_http), max_attempts=1)
+
+
+def test_changes_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'calendar.outbox')
+    outbox = Outbox(path)
+    tasks = make_tasks(3)
+    outbox.add(*(EventChange.insert(task) for task in tasks))
+    outbox.add(EventChange.update(tasks[0]), EventChange.delete(tasks[1].id))
+    with open(path, 'a') as file:
+        file.write('{"method": "delete", "task_id": 3')  # torn by a crash
+    reloaded = Outbox(path)
+    # the insert of task 2 may have been sent before the restart, its delete is kept
+    assert reloaded.take() == [EventChange.insert(tasks[0]), EventChange.delete(tasks[1].id),
+                               EventChange.insert(tasks[2])]
+    with open(path) as file:
+        assert len(file.readlines()) == 3  # compacted
+
+
+def test_insert_sent_before_a_crash_is_deleted(tmp_path, calendar_sync, fake_http):
+    path = str(tmp_path / 'calendar.outbox')
+    outbox = Outbox(path)
+    task, = make_tasks(1)
+    outbox.add(EventChange.insert(task))
+    calendar_sync.sync(outbox.take())  # the event is created, the process stops before settling
+    outbox.add(EventChange.delete(task.id))
+    reloaded = Outbox(path)
+    result = reloaded.drain(calendar_sync)
+    assert result.events == {task.id: None} and not result.errors
+    assert fake_http.events() == {} and len(reloaded) == 0
+
+
+def test_offline_changes_are_sent_later(tmp_path, fake_http, calendar_sync):
+    outbox = Outbox(str(tmp_path / 'calendar.outbox'))
+    outbox.add(*(EventChange.insert(task) for task in make_tasks(120)))
+    fake_http.offline = True
+    result = outbox.drain(calendar_sync)
+    assert len(result.errors) == 120 and len(outbox) == 120
+    outbox.add(*(EventChange.delete(task.id) for task in make_tasks(20)))  # cancel the inserts never sent
+    assert len(outbox) == 100
+    assert len(Outbox(outbox.path)) == 120  # read back, the deletes are kept in case the inserts were sent
+    fake_http.offline = False
+    result = outbox.drain(calendar_sync)
+    assert len(result.events) == 100 and not result.errors
+    assert fake_http.batches == [50, 50]
+    assert len(fake_http.events()) == 100
+    assert len(outbox) == 0 and len(Outbox(outbox.path)) == 0
+
+
+def test_changes_queued_while_sending(calendar_sync, fake_http):
+    outbox = Outbox(None)
+    first, second = make_tasks(2)
+    outbox.add(EventChange.insert(first), EventChange.insert(second))
+    changes = outbox.take()
+    assert outbox.take() == []  # a single drain at a time
+    outbox.add(EventChange.insert(first), EventChange.delete(second.id))  # queued after the ones being sent
+    fake_http.failures = {event_id(second.id): [503]}
+    outbox.settle(calendar_sync.sync(changes))
+    # the first event exists now, it is replaced; the second may exist, it is deleted
+    assert sorted(outbox.take(), key=lambda change: change.task_id) == [EventChange.update(first),
+                                                                        EventChange.delete(second.id)]
+
+
+def test_final_errors_are_dropped(calendar_sync, fake_http):
+    outbox = Outbox(None)
+    task, = make_tasks(1)
+    outbox.add(EventChange.insert(task))
+    fake_http.failures = {event_id(task.id): [400]}
+    changes = outbox.take()
+    dropped = outbox.settle(calendar_sync.sync(changes))
+    assert list(dropped) == [task.id] and len(outbox) == 0
+
+
+@pytest.mark.asyncio
+async def test_layout_queues_removals(task_api, fake_http, tmp_path):
+    for task in make_tasks(3):
+        task_api.update(task.id, start_date=task.start_date, end_date=task.end_date)
+    calendar = AsyncCalendarClient(lambda: calendar_service(fake_http),
+                                   cache_path=None, scheduler=RequestScheduler(rate=1000, burst=100),
+                                   state_path=None, outbox_path=str(tmp_path / 'calendar.outbox'))
+    app = Layout(api=task_api, calendar=calendar)
+    async with app.run_test() as pilot:
+        await pilot.press('c')
+        await app.workers.wait_for_complete()
+        fake_http.offline = True
+        await pilot.press('space', 'down', 'space', 'r')  # removes the rows at once, the calendar is unreachable
+        assert task_api.count() == 23
+        await app.workers.wait_for_complete()
+        assert str(app.label_status.renderable) == 'calendar: 0 changes sent, 2 failed, 2 pending'
+        assert len(Outbox(calendar.outbox.path)) == 2
+        fake_http.offline = False
+        app.drain_outbox()  # as the retry interval would
+        await app.workers.wait_for_complete()
+        assert str(app.label_status.renderable) == 'calendar: 2 changes sent'
+        assert list(fake_http.events()) == [event_id(3)]
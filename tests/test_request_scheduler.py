@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from organize_me.google_calendar import calendar_events
+from organize_me.google_calendar.request_scheduler import Priority, RequestScheduler, TokenBucket
+from tests.fake_calendar import calendar_service
+
+
+class FlakyRequest:
+    """A request answering with the given statuses before succeeding."""
+
+    def __init__(self, *statuses: int, reason: str = 'backendError', retry_after: str = None) -> None:
+        self.statuses = list(statuses)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.statuses:
+            status = self.statuses.pop(0)
+            headers = {'status': str(status)}
+            if self.retry_after is not None:
+                headers['retry-after'] = self.retry_after
+            content = {'error': {'code': status, 'message': self.reason, 'errors': [{'reason': self.reason}]}}
+            raise HttpError(Response(headers), json.dumps(content).encode())
+        return {'id': 'event'}
+
+
+def scheduler(**kwargs) -> RequestScheduler:
+    return RequestScheduler(**{'rate': 1000, 'burst': 100, 'sleep': lambda delay: None, 'jitter': lambda: 0.5,
+                               **kwargs})
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert 0.05 < bucket.take() <= 0.1
+    time.sleep(0.1)
+    assert bucket.take() == 0
+    bucket.drain()
+    assert bucket.take(2) > 0.15
+
+
+def test_rate_is_limited():
+    limited = RequestScheduler(rate=50, burst=5)
+    start = time.monotonic()
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: limited.acquire(), range(15)))
+    assert time.monotonic() - start >= 0.19  # a burst of 5, then 10 at 50 a second
+    stats = limited.stats()
+    assert stats.requests[Priority.BACKGROUND] == 15
+    assert stats.queue_depth == {Priority.INTERACTIVE: 0, Priority.BACKGROUND: 0}
+    assert stats.max_queue_depth >= 2
+    assert 0 < stats.mean_wait(Priority.BACKGROUND) <= stats.max_wait
+
+
+def test_interactive_requests_go_first():
+    limited = RequestScheduler(rate=20, burst=1)
+    order = []
+
+    def acquire(priority):
+        limited.acquire(priority)
+        order.append(priority)
+    threads = [threading.Thread(target=acquire, args=(Priority.BACKGROUND,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while limited.stats().queue_depth[Priority.BACKGROUND] < 7:
+        time.sleep(0.01)
+    admitted = len(order)
+    interactive = [threading.Thread(target=acquire, args=(Priority.INTERACTIVE,)) for _ in range(2)]
+    for thread in interactive:
+        thread.start()
+    for thread in threads + interactive:
+        thread.join()
+    # the head of the queue may have been taking its token already
+    assert order[admitted:admitted + 3].count(Priority.INTERACTIVE) == 2
+    stats = limited.stats()
+    assert stats.mean_wait(Priority.INTERACTIVE) < stats.mean_wait(Priority.BACKGROUND)
+
+
+def test_transient_errors_are_retried_with_backoff():
+    delays = []
+    retrying = scheduler(sleep=delays.append)
+    request = FlakyRequest(503, 500, 429)
+    assert retrying.execute(request) == {'id': 'event'}
+    assert delays == [0.5, 1.0, 2.0]  # jittered, doubled on every retry
+    assert retrying.stats().retries == 3
+    assert retrying.stats().requests[Priority.INTERACTIVE] == 4
+
+
+def test_rate_limits_honor_retry_after_and_slow_everyone_down():
+    delays = []
+    retrying = scheduler(sleep=delays.append, rate=10, burst=10)
+    assert retrying.execute(FlakyRequest(403, reason='userRateLimitExceeded', retry_after='3')) == {'id': 'event'}
+    assert delays == [3.0]
+    assert retrying.bucket.tokens < 1  # drained, the next request waits for a refill
+
+
+def test_final_errors_are_raised():
+    retrying = scheduler(max_attempts=3)
+    request = FlakyRequest(404)
+    with pytest.raises(HttpError):
+        retrying.execute(request)
+    assert request.calls == 1
+    forbidden = FlakyRequest(403, reason='forbidden')
+    with pytest.raises(HttpError):
+        retrying.execute(forbidden)
+    assert forbidden.calls == 1
+    request = FlakyRequest(503, 503, 503, 503)
+    with pytest.raises(HttpError):
+        retrying.execute(request)
+    assert request.calls == 3
+
+
+def test_calendar_events_are_scheduled(fake_http):
+    service = calendar_service(fake_http)
+    retrying = scheduler()
+    fake_http.failures = {'event1': [503, 429]}
+    calendar_events.add_event(service, {'id': 'event1', 'summary': 'Event'}, retrying)
+    calendar_events.update_event(service, 'event1', {'summary': 'Renamed'}, retrying)
+    assert fake_http.events()['event1']['summary'] == 'Renamed'
+    fake_http.failures = {'primary': [500]}
+    assert [event['id'] for event in calendar_events.get_future_events(service, retrying)] == ['event1']
+    calendar_events.delete_event(service, 'event1', retrying, Priority.BACKGROUND)
+    assert fake_http.events() == {}
+    with pytest.raises(HttpError):
+        calendar_events.delete_event(service, 'event1', retrying)
+    stats = retrying.stats()
+    assert stats.retries == 3
+    assert stats.requests == {Priority.INTERACTIVE: 7, Priority.BACKGROUND: 1}
@@ -0,0 +1,51 @@
+import pytest
+from organize_me.app.task import Task
+from organize_me.app.search_index import SearchIndex, tokenize
+
+
+@pytest.fixture
+def index() -> SearchIndex:
+    """Fixture to provide an index of a few tasks."""
+    index = SearchIndex()
+    index.build([
+        Task(id=1, title='Buy milk', description='From the Store'),
+        Task(id=2, title='Buy bread'),
+        Task(id=3, title='Call the plumber', description='about the milkshake machine'),
+    ])
+    return index
+
+
+def test_tokenize():
+    assert tokenize('Call the PLUMBER, now!') == ['call', 'the', 'plumber', 'now']
+
+
+def test_search_all_words(index):
+    assert index.search('buy', 10) == [1, 2]
+    assert index.search('BUY milk', 10) == [1]
+    assert index.search('buy plumber', 10) == []
+    assert index.search('  ', 10) == []
+
+
+def test_search_prefix(index):
+    assert index.search('bu', 10) == [1, 2]
+    # the whole word match ranks before the prefix match
+    assert index.search('milk', 10) == [1, 3]
+    assert index.search('milk', 1) == [1]
+
+
+def test_incremental_updates(index):
+    index.reindex(Task(id=2, title='Sell bread'))
+    assert index.search('buy', 10) == [1]
+    assert index.search('sell', 10) == [2]
+    index.remove(1)
+    index.remove(4)
+    assert index.search('buy', 10) == []
+    assert len(index) == 2
+
+
+def test_dumps_loads(index):
+    loaded, metadata = SearchIndex.loads(index.dumps(snapshot=[1, 2]))
+    assert metadata == {'snapshot': [1, 2]}
+    assert loaded.search('milk', 10) == [1, 3]
+    with pytest.raises(ValueError):
+        SearchIndex.loads('{"version": 0, "words": {}}')
@@ -0,0 +1,32 @@
+from datetime import datetime
+from organize_me.app.task import Task
+from organize_me.app.sort_index import SortIndex
+
+
+def test_order_nulls_last():
+    index = SortIndex('start_date')
+    index.build([
+        Task(id=1, title='No dates'),
+        Task(id=2, title='Late', start_date=datetime(2024, 2, 1), end_date=datetime(2024, 2, 2)),
+        Task(id=3, title='Early', start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 2)),
+        Task(id=4, title='No dates either'),
+    ])
+    assert index.page(0, 10) == [3, 2, 1, 4]
+    assert index.page(1, 2) == [2, 1]
+
+
+def test_title_order_ignores_case():
+    index = SortIndex('title')
+    index.build([Task(id=1, title='banana'), Task(id=2, title='Cherry'), Task(id=3, title='apple')])
+    assert index.page(0, 10) == [3, 1, 2]
+
+
+def test_incremental_updates():
+    index = SortIndex('title')
+    index.build([Task(id=1, title='b'), Task(id=2, title='c')])
+    index.add(Task(id=3, title='a'))
+    index.reindex(Task(id=2, title='0'))
+    index.remove(1)
+    index.remove(5)
+    assert index.page(0, 10) == [2, 3]
+    assert len(index) == 2
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import pytest
+from datetime import datetime
+from organize_me.app.sqlite_task_api import SqliteTaskApi
+from organize_me.app.task_api import StorageFormat, TaskApi
+from organize_me.app.task import Task
+from organize_me.app.exceptions import TaskNotFoundError, DuplicateIdError
+from tests.test_task import dummy_dates
+
+
+@pytest.fixture
+def sqlite_api(tmp_path) -> SqliteTaskApi:
+    """Fixture to initialize a SqliteTaskApi on an empty database."""
+    api = SqliteTaskApi(str(tmp_path / 'tasks.db'))
+    yield api
+    api.close()
+
+
+def add_task(api, dummy_dates):
+    data = {'title': 'Task 1', 'description': 'Description 1',
+            'start_date': dummy_dates['start_date'], 'end_date': dummy_dates['end_date']}
+    return api.add(**data)
+
+
+def test_add_task(sqlite_api, dummy_dates):
+    task_id = add_task(sqlite_api, dummy_dates)
+    task = sqlite_api.get_task(task_id)
+    assert task.id == task_id
+    assert task.start_date == dummy_dates['start_date']
+
+
+def test_add_duplicate_id(sqlite_api):
+    sqlite_api.add(id=1, title='Task 1')
+    with pytest.raises(DuplicateIdError):
+        sqlite_api.add(id=1, title='Task 1')
+
+
+def test_update_task(sqlite_api, dummy_dates):
+    task_id = add_task(sqlite_api, dummy_dates)
+    sqlite_api.update(task_id, title='New Task 1')
+    task = sqlite_api.get_task(task_id)
+    assert task.title == 'New Task 1'
+    assert task.description == 'Description 1'
+
+
+def test_delete_task(sqlite_api, dummy_dates):
+    task_id = add_task(sqlite_api, dummy_dates)
+    sqlite_api.delete(task_id)
+    with pytest.raises(TaskNotFoundError):
+        sqlite_api.get_task(task_id)
+    with pytest.raises(TaskNotFoundError):
+        sqlite_api.delete(task_id)
+
+
+def test_transaction(sqlite_api, tmp_path):
+    task_ids = sqlite_api.add_many([{'title': 'Task 1'}, {'title': 'Task 2', 'tags': 'done'}])
+    with pytest.raises(TaskNotFoundError):
+        with sqlite_api.transaction():
+            sqlite_api.update(task_ids[0], title='Renamed', tags='done')
+            sqlite_api.delete(task_ids[1])
+            sqlite_api.delete(3)
+    assert [row[1] for row in sqlite_api.data()[1]] == ['Task 1', 'Task 2']
+    assert [row[0] for row in sqlite_api.filter_by_tags('done', 10)] == [task_ids[1]]
+    sqlite_api.delete_many(task_ids)
+    other_connection = SqliteTaskApi(str(tmp_path / 'tasks.db'))
+    assert other_connection.count() == 0
+    other_connection.close()
+
+
+def test_data(sqlite_api, dummy_dates):
+    task_id = add_task(sqlite_api, dummy_dates)
+    columns, rows = sqlite_api.data()
+    assert columns == list(Task.model_fields.keys())
+    assert rows == [list(sqlite_api.get_task(task_id).__dict__.values())]
+
+
+def test_tasks_starting_between(sqlite_api):
+    for day in (1, 5, 10):
+        sqlite_api.add(id=day, title=f'Task {day}',
+                       start_date=datetime(2024, 1, day), end_date=datetime(2024, 1, day, 12))
+    tasks = sqlite_api.tasks_starting_between(datetime(2024, 1, 2), datetime(2024, 1, 10))
+    assert [task.id for task in tasks] == [5, 10]
+
+
+def test_tasks_overlapping(sqlite_api):
+    sqlite_api.add(id=1, title='Sprint', start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 14))
+    sqlite_api.add(id=2, title='Trip', start_date=datetime(2024, 1, 5), end_date=datetime(2024, 1, 8))
+    sqlite_api.add(id=3, title='No dates')
+    tasks = sqlite_api.tasks_overlapping(datetime(2024, 1, 8), datetime(2024, 1, 9))
+    assert [task.id for task in tasks] == [1, 2]
+
+
+def test_sorted_page(sqlite_api):
+    sqlite_api.add(id=1, title='b task')
+    sqlite_api.add(id=2, title='C task', start_date=datetime(2024, 2, 1), end_date=datetime(2024, 2, 2))
+    sqlite_api.add(id=3, title='a task', start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 2))
+    assert [row[0] for row in sqlite_api.page(0, 10, 'start_date')] == [3, 2, 1]
+    assert [row[0] for row in sqlite_api.page(1, 1, 'title')] == [1]
+
+
+def test_filter_by_tags(sqlite_api):
+    sqlite_api.add(id=1, title='Report', tags='work, Urgent')
+    sqlite_api.add(id=2, title='Review', tags='work')
+    sqlite_api.add(id=3, title='Groceries')
+    assert [row[0] for row in sqlite_api.filter_by_tags('work and not urgent', 10)] == [2]
+    assert [row[0] for row in sqlite_api.filter_by_tags('urgent or -work', 10)] == [1, 3]
+    assert sqlite_api.get_task(1).tags == ('work', 'Urgent')
+    sqlite_api.update(2, tags='home')
+    sqlite_api.delete(1)
+    assert sqlite_api.tags() == ['home']
+
+
+def test_add_tags_column(tmp_path):
+    db_file = str(tmp_path / 'old.db')
+    connection = sqlite3.connect(db_file)
+    connection.execute("CREATE TABLE tasks (id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT, "
+                       "create_date TEXT NOT NULL, update_date TEXT NOT NULL, start_date TEXT, end_date TEXT)")
+    connection.execute("INSERT INTO tasks VALUES ('1', 'Old task', NULL, ?, ?, NULL, NULL)",
+                       (datetime(2024, 1, 1).isoformat(timespec='microseconds'),) * 2)
+    connection.commit()
+    connection.close()
+    api = SqliteTaskApi(db_file)
+    assert api.get_task(1).tags == ()
+    assert [row[0] for row in api.search('old', 10)] == [1]
+    api.close()
+
+
+def test_indexes_are_used(sqlite_api):
+    plan = sqlite_api.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE start_date BETWEEN ? AND ?", ('a', 'b')
+    ).fetchall()
+    assert 'tasks_start_date' in str(plan)
+
+
+def test_search(sqlite_api):
+    for task_id, title in ((1, 'Buy milk'), (2, 'Buy bread'), (3, 'Call the plumber')):
+        sqlite_api.add(id=task_id, title=title)
+    assert [row[0] for row in sqlite_api.search('bu', 10)] == [1, 2]
+    assert [row[0] for row in sqlite_api.search('BUY mil', 10)] == [1]
+    sqlite_api.update(2, title='Sell bread')
+    sqlite_api.delete(1)
+    assert sqlite_api.search('buy', 10) == []
+    assert [row[0] for row in sqlite_api.search('bread', 10)] == [2]
+
+
+@pytest.mark.parametrize('storage_format', [StorageFormat.JSON, StorageFormat.BINARY])
+def test_migrate_from_task_api(sqlite_api, task_files, storage_format):
+    task_api = TaskApi(tasks={1: Task(id=1, title='Task 1'), 2: Task(id=2, title='Task 2')},
+                       storage_format=storage_format)
+    task_api.save_tasks()
+    task_api.update(2, title='New Task 2')
+    assert os.path.exists(TaskApi.JOURNAL_FILE)
+    assert sqlite_api.migrate_from_task_api() == 2
+    assert sqlite_api.get_task(1) == task_api.get_task(1)
+    assert sqlite_api.get_task(2) == task_api.get_task(2)
+    assert [row[0] for row in sqlite_api.search('new', 10)] == [2]
\ No newline at end of file
@@ -0,0 +1,24 @@
+import pytest
+from organize_me.app.exceptions import TagFilterSyntaxError
+from organize_me.app.tag_filter import matches, parse_tag_filter
+
+
+def test_parse():
+    assert parse_tag_filter('Work') == ('tag', 'work')
+    assert parse_tag_filter('a b or c') == ('or', ('and', ('tag', 'a'), ('tag', 'b')), ('tag', 'c'))
+    assert parse_tag_filter('a AND NOT (b OR c)') == \
+        ('and', ('tag', 'a'), ('not', ('or', ('tag', 'b'), ('tag', 'c'))))
+    assert parse_tag_filter('-done to-do') == ('and', ('not', ('tag', 'done')), ('tag', 'to-do'))
+
+
+@pytest.mark.parametrize('expression', ['', 'a and', '(a or b', 'a)', 'or a', 'not'])
+def test_parse_errors(expression):
+    with pytest.raises(TagFilterSyntaxError):
+        parse_tag_filter(expression)
+
+
+def test_matches():
+    tag_filter = parse_tag_filter('work and not (done or archived)')
+    assert matches(tag_filter, {'work'})
+    assert not matches(tag_filter, {'work', 'done'})
+    assert not matches(tag_filter, set())
@@ -0,0 +1,56 @@
+import pytest
+from organize_me.app.task import Task
+from organize_me.app.tag_index import TagIndex
+from organize_me.app.tag_filter import parse_tag_filter
+
+
+@pytest.fixture
+def index() -> TagIndex:
+    """Fixture to provide an index of a few tagged tasks."""
+    index = TagIndex()
+    index.build([
+        Task(id=10, title='Report', tags=['work', 'urgent']),
+        Task(id=20, title='Groceries', tags=['Home']),
+        Task(id=30, title='Review', tags=['work', 'done']),
+        Task(id=40, title='Untagged'),
+    ])
+    return index
+
+
+def select(index: TagIndex, expression: str) -> list:
+    return index.filter(parse_tag_filter(expression), 10)
+
+
+def test_filter(index):
+    assert select(index, 'work') == [10, 30]
+    assert select(index, 'home') == [20]
+    assert select(index, 'work not done') == [10]
+    assert select(index, 'urgent or home') == [10, 20]
+    assert select(index, 'not work') == [20, 40]
+    assert select(index, 'missing') == []
+    assert index.filter(parse_tag_filter('not missing'), 2) == [10, 20]
+    assert index.count(parse_tag_filter('not missing')) == 4
+    assert index.tags() == ['done', 'home', 'urgent', 'work']
+
+
+def test_incremental_updates(index):
+    index.reindex(Task(id=30, title='Review', tags=['home']))
+    index.remove(10)
+    index.remove(50)
+    assert select(index, 'work') == []
+    assert select(index, 'not home') == [40]
+    index.add(Task(id=50, title='Plan', tags=['work']))  # takes the slot of the removed task
+    assert select(index, 'work or home') == [50, 20, 30]
+    assert len(index) == 4
+    assert index.tags() == ['home', 'work']
+
+
+def test_build_matches_add():
+    tasks = [Task(id=task_id, title='Task', tags=[f'tag{task_id % 3}', f'tag{task_id % 5}'])
+             for task_id in range(1, 200)]
+    built, added = TagIndex(), TagIndex()
+    built.build(tasks)
+    for task in tasks:
+        added.add(task)
+    for expression in ('tag0', 'tag1 and not tag4', 'tag2 or tag3', 'not (tag0 or tag1)'):
+        assert built.filter(parse_tag_filter(expression), 500) == added.filter(parse_tag_filter(expression), 500)
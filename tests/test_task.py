@@ -123,3 +123,36 @@ class TestTask:
         with pytest.raises(ValueError, match=Task.ERROR_END_DATE_BEFORE_START):
             task.update(start_date=dummy_dates['end_date'])
         assert task.start_date == dummy_dates['start_date'] and task.end_date == dummy_dates['start_date']
+
+    def test_update_task_is_atomic(self, dummy_dates):
+        task = Task(id=1, title="Test Task", start_date=dummy_dates['start_date'], end_date=dummy_dates['start_date'])
+        prev_update_stamp = task.update_date
+        with pytest.raises(ValueError, match=Task.ERROR_END_DATE_BEFORE_START):
+            task.update(title="Updated Test Task", start_date=dummy_dates['end_date'])
+        assert task.title == "Test Task" and task.update_date == prev_update_stamp
+
+    def test_update_frozen_field(self):
+        task = Task(id=1, title="Test Task")
+        with pytest.raises(ValueError, match="frozen"):
+            task.update(id=2, title="Updated Test Task")
+        assert task.id == 1 and task.title == "Test Task"
+
+    def test_update_ignores_none_and_unknown_fields(self):
+        task = Task(id=1, title="Test Task")
+        prev_update_stamp = task.update_date
+        task.update(title=None, unknown="value")
+        assert task.title == "Test Task" and task.update_date == prev_update_stamp
+
+    def test_tags(self):
+        task = Task(id=1, title="Test Task", tags=[" work ", "urgent", "work"])
+        assert task.tags == ("work", "urgent")
+        assert Task(id=2, title="Test Task").tags == ()
+        for tags in (["two words"], ["a,b"], [""]):
+            with pytest.raises(ValueError, match=Task.ERROR_TAG_INVALID):
+                Task(id=1, title="Test Task", tags=tags)
+
+    def test_tags_field_converter(self):
+        convert = Task.fields()["tags"]
+        assert convert("work, urgent,,") == ("work", "urgent")
+        assert convert(["work"]) == ("work",)
+        assert convert(None) == ()
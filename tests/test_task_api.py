@@ -1,10 +1,12 @@
 import os
 import json
+from datetime import datetime
 import pytest
 from typing import Dict
-from organize_me.app.task_api import TaskApi
+from organize_me.app.task_api import TaskApi, StorageFormat
 from organize_me.app.task import Task
 from organize_me.app.exceptions import TaskNotFoundError
+from organize_me.app.search_index import SearchIndex
 from tests.test_task import dummy_dates
 
 
@@ -25,10 +27,16 @@ def dummy_tasks() -> Dict[int, Task]:
 
 
 @pytest.fixture(scope='function', autouse=True)
-def remove_json_file() -> None:
+def remove_json_file():
     """Fixture to remove the JSON file before and after each test."""
-    if os.path.exists(TaskApi.JSON_FILE):
-        os.remove(TaskApi.JSON_FILE)
+    paths = (TaskApi.JSON_FILE, TaskApi.BINARY_FILE, TaskApi.JOURNAL_FILE, TaskApi.SEARCH_INDEX_FILE)
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    yield
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
 
 
 def test_save_tasks(dummy_tasks: Dict[int, Task]):
@@ -37,8 +45,14 @@ def test_save_tasks(dummy_tasks: Dict[int, Task]):
     assert os.path.exists(TaskApi.JSON_FILE)
     with open(TaskApi.JSON_FILE, 'r') as file:
         data = json.load(file)
-    expected = {str(key): task.model_dump_json() for key, task in dummy_tasks.items()}
-    assert data == expected
+    expected = {str(key): json.loads(task.model_dump_json()) for key, task in dummy_tasks.items()}
+    assert data == {'version': 2, 'tasks': expected}
+
+
+def test_read_legacy_json(dummy_tasks):
+    with open(TaskApi.JSON_FILE, 'w') as file:
+        json.dump({key: task.model_dump_json() for key, task in dummy_tasks.items()}, file)
+    assert TaskApi().tasks == dummy_tasks
 
 
 def test_read_json(dummy_tasks):
@@ -84,5 +98,222 @@ def test_delete_task(task_manager, dummy_dates):
         task_manager.get_task(task_id)
 
 
+def test_mutations_are_journaled(task_manager, dummy_dates):
+    task_id = add_task(task_manager, dummy_dates)
+    removed_id = add_task(task_manager, dummy_dates)
+    task_manager.update(task_id, title='New Task 1')
+    task_manager.delete(removed_id)
+    assert not os.path.exists(TaskApi.JSON_FILE)
+    assert len(task_manager.journal) == 4
+    reloaded = TaskApi()
+    assert list(reloaded.tasks) == [task_id]
+    assert reloaded.get_task(task_id) == task_manager.get_task(task_id)
+
+
+def test_journal_compaction(task_manager, dummy_dates, monkeypatch):
+    monkeypatch.setattr(TaskApi, 'COMPACT_THRESHOLD', 2)
+    task_id = add_task(task_manager, dummy_dates)
+    task_manager.update(task_id, title='New Task 1')
+    task_manager.update(task_id, title='New Task 2')
+    assert os.path.exists(TaskApi.JSON_FILE)
+    assert len(task_manager.journal) == 0
+    assert TaskApi().get_task(task_id).title == 'New Task 2'
+
+
+def test_journal_torn_record_is_dropped(task_manager, dummy_dates):
+    task_id = add_task(task_manager, dummy_dates)
+    with open(TaskApi.JOURNAL_FILE, 'a') as journal:
+        journal.write('{"op": "put", "task": {"id"')
+    reloaded = TaskApi()
+    assert list(reloaded.tasks) == [task_id]
+    reloaded.update(task_id, title='New Task 1')
+    assert TaskApi().get_task(task_id).title == 'New Task 1'
+
+
+def test_given_tasks_overwrite_snapshot(dummy_tasks):
+    TaskApi(tasks={1: dummy_tasks[1]}).save_tasks()
+    task_manager = TaskApi(tasks=dummy_tasks)
+    task_manager.update(2, title='New Task 2')
+    assert TaskApi().tasks.keys() == dummy_tasks.keys()
+
+
+def test_debounced_flush(dummy_dates):
+    task_manager = TaskApi(flush_delay=60)
+    task_id = add_task(task_manager, dummy_dates)
+    for title in ('Task 2', 'Task 3', 'Task 4'):
+        task_manager.update(task_id, title=title)
+    assert not os.path.exists(TaskApi.JOURNAL_FILE)
+    task_manager.flush()
+    assert len(task_manager.journal) == 1
+    assert TaskApi().get_task(task_id).title == 'Task 4'
+
+
+def test_background_flush(dummy_dates):
+    task_manager = TaskApi(flush_delay=0.05)
+    task_id = add_task(task_manager, dummy_dates)
+    task_manager.delete(task_id)
+    flush_timer = task_manager._flush_timer
+    flush_timer.join()
+    assert os.path.exists(TaskApi.JOURNAL_FILE)
+    assert len(task_manager.journal) == 1
+    assert TaskApi().tasks == {}
+
+
+def test_transaction_flushes_once(task_manager, dummy_dates):
+    with task_manager.transaction():
+        task_ids = [add_task(task_manager, dummy_dates) for _ in range(3)]
+        task_manager.update(task_ids[0], title='New Task 1')
+        with task_manager.transaction():
+            task_manager.delete(task_ids[1])
+        assert not os.path.exists(TaskApi.JOURNAL_FILE)
+        task_manager.flush()  # waits for the transaction
+        assert not os.path.exists(TaskApi.JOURNAL_FILE)
+    assert len(task_manager.journal) == 3  # a record per changed task, written at once
+    reloaded = TaskApi()
+    assert set(reloaded.tasks) == {task_ids[0], task_ids[2]}
+    assert reloaded.get_task(task_ids[0]).title == 'New Task 1'
+
+
+def test_transaction_rollback(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    assert [row[0] for row in task_manager.search('task', 10)] == [1, 2, 3]  # builds the index
+    with pytest.raises(TaskNotFoundError):
+        with task_manager.transaction():
+            task_manager.update(1, title='Renamed')
+            task_manager.delete(2)
+            task_manager.add(title='Task 4')
+            task_manager.delete(5)
+    assert task_manager.tasks == dummy_tasks
+    assert task_manager.get_task(1).title == 'Task 1'
+    assert [row[0] for row in task_manager.search('task', 10)] == [1, 2, 3]
+    assert not task_manager.search('renamed', 10)
+    assert TaskApi().tasks == dummy_tasks
+
+
+def test_batch_methods(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    task_ids = task_manager.add_many([{'title': 'Task 4'}, {'title': 'Task 5', 'tags': 'done'}])
+    task_manager.update_many({1: {'tags': ('done',)}, 2: {'title': 'New Task 2', 'tags': ('done',)}})
+    done = [row[0] for row in task_manager.filter_by_tags('done', 10)]
+    assert sorted(done) == sorted([1, 2, task_ids[1]])
+    task_manager.delete_many(done)
+    assert list(TaskApi().tasks) == [3, task_ids[0]]
+    with pytest.raises(TaskNotFoundError):
+        task_manager.delete_many([3, 5])
+    assert list(TaskApi().tasks) == [3, task_ids[0]]
+
+
+def test_binary_storage_format(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks, storage_format=StorageFormat.BINARY)
+    task_manager.update(2, title='New Task 2')
+    assert os.path.exists(TaskApi.BINARY_FILE)
+    assert not os.path.exists(TaskApi.JSON_FILE)
+    reloaded = TaskApi(storage_format=StorageFormat.BINARY)
+    assert reloaded.tasks == task_manager.tasks
+    assert reloaded.data() == task_manager.data()
+
+
+def test_binary_snapshot_is_unmapped(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks, storage_format=StorageFormat.BINARY)
+    task_manager.save_tasks()
+    mapped = task_manager.tasks._data
+    task_manager.save_tasks()
+    assert mapped.closed and not task_manager.tasks._data.closed
+    task_manager.update(2, title='New Task 2')
+    mapped = task_manager.tasks._data
+    task_manager.close()
+    assert mapped.closed
+    assert TaskApi(storage_format=StorageFormat.BINARY).get_task(2).title == 'New Task 2'
+
+
+def test_switch_storage_format(dummy_tasks):
+    TaskApi(tasks=dummy_tasks).save_tasks()
+    task_manager = TaskApi(storage_format=StorageFormat.BINARY)
+    assert task_manager.tasks == dummy_tasks
+    task_manager.save_tasks()
+    assert not os.path.exists(TaskApi.JSON_FILE)
+    assert TaskApi().tasks == dummy_tasks
+
+
+def test_page(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    columns, rows = task_manager.data()
+    assert task_manager.columns() == columns
+    assert task_manager.count() == len(rows)
+    assert task_manager.page(1, 1) == rows[1:2]
+    assert task_manager.page(2, 10) == rows[2:]
+
+
+def test_sorted_page(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    assert [row[0] for row in task_manager.page(0, 10, 'start_date')] == [3, 1, 2]
+    task_manager.update(1, title='A task')
+    task_id = task_manager.add(title='Z task')
+    assert [row[0] for row in task_manager.page(0, 10, 'title')] == [1, 2, 3, task_id]
+    assert [row[0] for row in task_manager.page(2, 2, 'update_date')] == [1, task_id]
+    with pytest.raises(ValueError):
+        task_manager.page(0, 10, 'priority')
+
+
+def test_filter_by_tags(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    task_manager.update(1, tags='work, urgent')
+    task_manager.update(2, tags=['work'])
+    assert [row[0] for row in task_manager.filter_by_tags('work and not urgent', 10)] == [2]
+    assert [row[0] for row in task_manager.filter_by_tags('not work', 10)] == [3]
+    task_manager.delete(2)
+    assert task_manager.tags() == ['urgent', 'work']
+    assert task_manager.filter_by_tags('work', 10) == task_manager.read_columns([1]).rows()
+    assert TaskApi().get_task(1).tags == ('work', 'urgent')
+
+
+def test_search(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    assert [row[0] for row in task_manager.search('descr', 10)] == [2, 3]
+    task_manager.update(2, description='Something else')
+    task_manager.delete(3)
+    task_id = task_manager.add(title='Write description')
+    assert [row[0] for row in task_manager.search('description', 10)] == [task_id]
+    assert task_manager.search('description', 10) == task_manager.read_columns([task_id]).rows()
+
+
+def test_search_index_persistence(dummy_tasks, monkeypatch):
+    TaskApi(tasks=dummy_tasks).search('task', 10)
+    task_manager = TaskApi(tasks=dummy_tasks)
+    task_manager.search('task', 10)
+    task_manager.save_tasks()
+    assert os.path.exists(TaskApi.SEARCH_INDEX_FILE)
+    task_manager.update(1, title='Journaled title')
+    reloaded = TaskApi()
+    monkeypatch.setattr(SearchIndex, 'build', lambda *args: pytest.fail("the saved index was not used"))
+    assert [row[0] for row in reloaded.search('journaled', 10)] == [1]
+    assert [row[0] for row in reloaded.search('task', 10)] == [2, 3]
+
+
+def test_stale_search_index_is_rebuilt(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    task_manager.search('task', 10)
+    task_manager.save_tasks()
+    TaskApi(tasks={1: Task(id=1, title='Other')}).save_tasks()
+    assert not os.path.exists(TaskApi.SEARCH_INDEX_FILE)
+    assert [row[0] for row in TaskApi().search('task', 10)] == []
+
+
+def test_date_range_queries(dummy_tasks):
+    task_manager = TaskApi(tasks=dummy_tasks)
+    assert task_manager.tasks_overlapping(datetime(2021, 1, 2), datetime(2021, 1, 9)) == [dummy_tasks[3]]
+    task_manager.update(3, start_date='2021-01-05', end_date='2021-01-06')
+    task_manager.update(1, start_date='2021-01-03', end_date='2021-01-03')
+    assert [task.id for task in task_manager.tasks_starting_between(datetime(2021, 1, 1), datetime(2021, 1, 5))] == [1, 3]
+    task_manager.delete(1)
+    assert [task.id for task in task_manager.tasks_overlapping(datetime(2021, 1, 1), datetime(2021, 1, 9))] == [3]
+
+
+def test_date_range_queries_binary(dummy_tasks):
+    TaskApi(tasks=dummy_tasks, storage_format=StorageFormat.BINARY).save_tasks()
+    task_manager = TaskApi(storage_format=StorageFormat.BINARY)
+    assert task_manager.tasks_overlapping(datetime(2021, 1, 1), datetime(2021, 1, 1)) == [dummy_tasks[3]]
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,27 @@
+import pytest
+from datetime import datetime
+from organize_me.app.task import Task
+from organize_me.app.task_columns import TaskColumns
+
+
+def test_from_tasks():
+    tasks = [Task(id=1, title='Task 1'),
+             Task(id=2, title='Task 2', description='Description 2',
+                  start_date=datetime(2021, 1, 1), end_date=datetime(2021, 1, 2))]
+    columns = TaskColumns.from_tasks(tasks)
+    assert len(columns) == 2
+    assert columns.id == (1, 2)
+    assert columns.description == (None, 'Description 2')
+    assert columns.rows() == [list(task.__dict__.values()) for task in tasks]
+
+
+def test_empty():
+    columns = TaskColumns()
+    assert len(columns) == 0
+    assert columns.title == ()
+    assert columns.rows() == []
+
+
+def test_read_only():
+    with pytest.raises(AttributeError):
+        TaskColumns().id = (1,)
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from organize_me.google_calendar.calendar_sync import CalendarSync, EventChange, event_id
+from organize_me.google_calendar.event_cache import EventCache
+from organize_me.google_calendar.task_event_sync import (SyncState, TaskEventSync, event_fields, plan_sync,
+                                                        task_fields)
+from tests.fake_calendar import calendar_service
+from tests.test_calendar_sync import make_tasks
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path) -> TaskApi:
+    for name in ('JSON_FILE', 'BINARY_FILE', 'JOURNAL_FILE', 'SEARCH_INDEX_FILE'):
+        monkeypatch.setattr(TaskApi, name, str(tmp_path / name.lower()))
+    tasks = {task.id: task for task in make_tasks(5)}
+    tasks[6] = Task(id=6, title='Without dates')
+    return TaskApi(tasks=tasks)
+
+
+@pytest.fixture
+def sync(api, fake_http, tmp_path) -> TaskEventSync:
+    return make_sync(api, fake_http, str(tmp_path / 'sync_state.json'))
+
+
+def make_sync(api, fake_http, state_path) -> TaskEventSync:
+    service = calendar_service(fake_http)
+    return TaskEventSync(api, EventCache(service, path=None), SyncState(state_path))
+
+
+def run(sync: TaskEventSync):
+    return sync.run(CalendarSync(sync.cache.service, sleep=lambda delay: None))
+
+
+def test_unchanged_tasks_are_skipped(sync, fake_http):
+    report = run(sync)
+    assert (report.sent, report.received, report.skipped) == (5, 0, 0)
+    assert sorted(fake_http.events()) == [event_id(task_id) for task_id in range(1, 6)]
+    requests = fake_http.requests
+    report = run(sync)
+    assert (report.sent, report.received, report.skipped) == (0, 0, 5)
+    assert fake_http.requests - requests == 1  # the incremental sync of the cache, nothing to send
+
+
+def test_changed_task_is_patched(sync, api, fake_http):
+    run(sync)
+    api.update(2, title='Renamed')
+    plan = sync.plan()
+    assert plan.changes == [EventChange('patch', 2, {'summary': 'Renamed'})]
+    assert plan.skipped == 4
+    report = run(sync)
+    assert report.sent == 1 and report.skipped == 4
+    event = fake_http.events()[event_id(2)]
+    assert event['summary'] == 'Renamed'
+    assert event_fields(event) == task_fields(api.get_task(2))
+    assert run(sync).skipped == 5
+
+
+def test_changed_event_updates_its_task(sync, api, fake_http):
+    run(sync)
+    event = fake_http.events()[event_id(3)]
+    start = datetime(2024, 7, 1, 8, tzinfo=timezone.utc)
+    fake_http.store_event({**event, 'summary': 'Moved', 'description': 'In the calendar',
+                           'start': {'dateTime': start.isoformat()},
+                           'end': {'dateTime': (start + timedelta(hours=2)).isoformat()}})
+    report = run(sync)
+    assert (report.sent, report.received, report.skipped) == (0, 1, 4)
+    task = api.get_task(3)
+    assert (task.title, task.description) == ('Moved', 'In the calendar')
+    assert task.start_date == start.astimezone().replace(tzinfo=None)
+    assert run(sync).skipped == 5
+
+
+@pytest.mark.parametrize('event_is_newer', [False, True])
+def test_conflict_goes_to_the_last_edit(sync, api, fake_http, event_is_newer):
+    run(sync)
+    api.update(4, title='Task side')
+    updated = datetime.now(timezone.utc) + timedelta(hours=1 if event_is_newer else -1)
+    fake_http.store_event({**fake_http.events()[event_id(4)], 'summary': 'Event side'}, updated=updated)
+    report = run(sync)
+    expected = 'Event side' if event_is_newer else 'Task side'
+    assert (report.sent, report.received) == ((0, 1) if event_is_newer else (1, 0))
+    assert api.get_task(4).title == fake_http.events()[event_id(4)]['summary'] == expected
+    assert run(sync).skipped == 5
+
+
+def test_deletions_go_both_ways(sync, api, fake_http):
+    run(sync)
+    api.delete(1)
+    fake_http.remove_event(event_id(2))
+    api.update(3, title='Edited')
+    fake_http.remove_event(event_id(3))
+    report = run(sync)
+    assert (report.sent, report.received) == (2, 1)  # delete 1, insert 3 again; task 2 deleted
+    assert sorted(fake_http.events()) == [event_id(3), event_id(4), event_id(5)]
+    assert sorted(task.id for task in api.tasks.values()) == [3, 4, 5, 6]
+    assert sorted(sync.state.records) == [3, 4, 5]
+    assert run(sync).skipped == 3
+    # a task whose dates were removed is no longer an event
+    plan = plan_sync([Task(id=4, title='Task 4').model_dump()], sync.cache.events, {4: sync.state.records[4]})
+    assert plan.changes == [EventChange.delete(4)]
+
+
+def test_tasks_changed_while_sending(sync, api, fake_http):
+    run(sync)
+    for task_id in (2, 3):
+        fake_http.store_event({**fake_http.events()[event_id(task_id)], 'summary': 'Event side'})
+    fake_http.remove_event(event_id(4))
+    api.update(5, title='Sent')
+    sync.cache.sync()
+    plan = sync.plan()
+    assert set(plan.task_updates) == {2, 3} and plan.task_deletes == [4]
+    result = CalendarSync(sync.cache.service).sync(plan.changes)
+    # edited on the event loop while the changes were sent
+    api.update(2, title='Task side')
+    api.delete(3)
+    api.update(4, description='Still wanted')
+    report = sync.apply(plan, result)
+    assert (report.sent, report.received) == (1, 0)
+    assert api.get_task(2).title == 'Task side' and api.get_task(4).description == 'Still wanted'
+    assert sorted(sync.state.records) == [1, 2, 3, 4, 5]  # left as they were for the next pass
+    report = run(sync)
+    assert (report.sent, report.received) == (2, 0)  # task 2 edited last, task 4 inserted again
+    assert fake_http.events()[event_id(2)]['summary'] == 'Task side'
+    assert fake_http.events()[event_id(3)]['summary'] == 'Event side'  # changed since, kept
+    assert sorted(sync.state.records) == [1, 2, 4, 5]
+
+
+def test_lost_responses(sync, api, fake_http):
+    fake_http.lost_responses = 1  # the inserts are made, the retry finds their ids taken
+    report = run(sync)
+    assert (report.sent, report.errors) == (5, {})
+    assert sorted(sync.state.records) == [1, 2, 3, 4, 5]
+    api.delete(1)
+    api.update(2, title='Renamed')
+    api.update(6, start_date=datetime(2024, 6, 1, 9), end_date=datetime(2024, 6, 1, 10))
+    fake_http.lost_responses = 1  # the retry finds the event of task 1 gone already
+    report = run(sync)
+    assert (report.sent, report.errors) == (3, {})
+    assert sorted(fake_http.events()) == [event_id(task_id) for task_id in range(2, 7)]
+    assert fake_http.events()[event_id(2)]['summary'] == 'Renamed'
+    assert sorted(sync.state.records) == [2, 3, 4, 5, 6]
+    assert run(sync).skipped == 5
+
+
+def test_state_is_kept_between_runs(sync, api, fake_http, tmp_path):
+    run(sync)
+    reloaded = make_sync(api, fake_http, str(tmp_path / 'sync_state.json'))
+    assert reloaded.state.records == sync.state.records
+    assert run(reloaded).skipped == 5
+    # without the state, pairs found equal are recorded again without a request
+    lost = make_sync(api, fake_http, None)
+    requests = fake_http.requests
+    report = run(lost)
+    assert (report.sent, report.received, report.skipped) == (0, 0, 0)
+    assert fake_http.requests - requests == 1
+    assert lost.state.records == sync.state.records
+
+
+def test_only_changed_tasks_hit_the_network(api, fake_http, tmp_path):
+    api.import_tasks(make_tasks(1000)[5:])
+    sync = make_sync(api, fake_http, None)
+    run(sync)
+    for task_id in (10, 500, 900):
+        api.update(task_id, description='Changed')
+    fake_http.batches.clear()
+    report = run(sync)
+    assert (report.sent, report.skipped) == (3, 997)
+    assert fake_http.batches == [3]
@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from organize_me.app.exceptions import TaskImportError
+from organize_me.app.sqlite_task_api import SqliteTaskApi
+from organize_me.app.task import Task
+from organize_me.app.task_api import TaskApi
+from organize_me.app.task_io import TaskFileFormat, export_tasks, import_tasks
+
+
+@pytest.fixture
+def task_api(task_files) -> TaskApi:
+    """Fixture to provide an empty TaskApi persisting in a temporary directory."""
+    return TaskApi()
+
+
+@pytest.fixture
+def tasks():
+    """Fixture to provide tasks using every field."""
+    return [
+        Task(id=1, title='Task 1'),
+        Task(id=2, title='Task, "quoted"; 2', description='Line 1\nLine 2 ✓', tags=['work', 'urgent'],
+             start_date=datetime(2024, 1, 1, 9, 30), end_date=datetime(2024, 1, 1, 10)),
+        Task(id=2 ** 127, title='Task 3 ' + 'long ' * 30, create_date=datetime(2023, 5, 1),
+             start_date=datetime(2024, 2, 1, tzinfo=timezone(timedelta(hours=2))),
+             end_date=datetime(2024, 2, 2, tzinfo=timezone.utc)),
+    ]
+
+
+@pytest.mark.parametrize('extension', ['jsonl', 'csv', 'ics'])
+def test_round_trip(task_api, tasks, tmp_path, extension):
+    task_api.import_tasks(tasks)
+    path = str(tmp_path / f'tasks.{extension}')
+    assert export_tasks(task_api, path) == 3
+    sqlite_api = SqliteTaskApi(str(tmp_path / 'tasks.db'))
+    assert import_tasks(sqlite_api, path) == (3, 0)
+    for task in tasks:
+        imported = sqlite_api.get_task(task.id)
+        assert (imported.title, imported.description, imported.tags) == (task.title, task.description, task.tags)
+        if extension != 'ics':
+            assert imported == task
+        else:  # no sub-second precision, and aware dates are imported in local time
+            assert imported.start_date == local_time(task.start_date)
+            assert imported.end_date == local_time(task.end_date)
+    sqlite_api.close()
+
+
+def local_time(date):
+    if date is None or date.tzinfo is None:
+        return date
+    return date.astimezone().replace(tzinfo=None)
+
+
+def test_import_persists_once(task_api, tmp_path, monkeypatch):
+    path = tmp_path / 'tasks.csv'
+    path.write_text('title,tags,start_date,end_date\nTask 1,"a,b",,\nTask 2,,2024-01-01,2024-01-02\n')
+    saves = []
+    monkeypatch.setattr(TaskApi, 'save_tasks', lambda self: saves.append(len(self.tasks)))
+    assert import_tasks(task_api, str(path), batch_size=1) == (2, 0)
+    assert saves == [2]
+    assert sorted(task.title for task in task_api.tasks.values()) == ['Task 1', 'Task 2']
+    assert not task_api.journal.records
+
+
+def test_import_invalid_record(task_api, tmp_path):
+    path = tmp_path / 'tasks.jsonl'
+    path.write_text('{"title": "Task 1"}\n\n{"title": " "}\n{"title": "Task 3"}\n')
+    with pytest.raises(TaskImportError) as error:
+        import_tasks(task_api, str(path), batch_size=2)
+    assert error.value.record_number == 2
+    assert task_api.count() == 0
+    assert import_tasks(task_api, str(path), skip_invalid=True) == (2, 1)
+    path = tmp_path / 'reversed.ics'
+    path.write_text('BEGIN:VTODO\nSUMMARY:Reversed\nDTSTART:20240102T000000\nDUE:20240101T000000\nEND:VTODO\n')
+    with pytest.raises(TaskImportError):  # ends before it starts
+        import_tasks(task_api, str(path))
+    assert TaskApi().count() == 2
+
+
+def test_import_ics_events(task_api, tmp_path):
+    path = tmp_path / 'calendar.ics'
+    path.write_text('BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:abc@example.com\r\nSUMMARY:Stand\r\n up\\, daily\r\n'
+                    'DTSTART;TZID=Europe/Paris:20240105T090000\r\nDTEND:20240105T093000Z\r\n'
+                    'CATEGORIES:Team Work,daily\r\nBEGIN:VALARM\r\nDESCRIPTION:Reminder\r\nEND:VALARM\r\n'
+                    'END:VEVENT\r\nEND:VCALENDAR\r\n')
+    assert import_tasks(task_api, str(path)) == (1, 0)
+    task = next(iter(task_api.tasks.values()))
+    assert task.title == 'Standup, daily' and task.description is None
+    assert task.tags == ('Team-Work', 'daily')
+    assert task.start_date == local_time(datetime(2024, 1, 5, 8, tzinfo=timezone.utc))  # Paris is utc+1
+    assert task.end_date == local_time(datetime(2024, 1, 5, 9, 30, tzinfo=timezone.utc))
+
+
+def test_import_ics_utc_dates(task_api, tmp_path):
+    path = tmp_path / 'standard.ics'
+    path.write_text('BEGIN:VCALENDAR\r\nBEGIN:VTODO\r\nSUMMARY:Standard\r\nCREATED:20240101T120000Z\r\n'
+                    'LAST-MODIFIED:20240102T120000Z\r\nDTSTART:20240105T090000\r\nDUE:20240105T100000Z\r\n'
+                    'END:VTODO\r\nEND:VCALENDAR\r\n')
+    assert import_tasks(task_api, str(path)) == (1, 0)
+    task = next(iter(task_api.tasks.values()))
+    assert task.create_date == local_time(datetime(2024, 1, 1, 12, tzinfo=timezone.utc))
+    assert task.update_date == local_time(datetime(2024, 1, 2, 12, tzinfo=timezone.utc))
+    assert task.start_date == datetime(2024, 1, 5, 9) and task.end_date.tzinfo is None
+    export_path = str(tmp_path / 'export.ics')
+    export_tasks(task_api, export_path)
+    with open(export_path, newline='') as file:
+        exported = file.read()
+    assert 'CREATED:20240101T120000Z\r\n' in exported and 'LAST-MODIFIED:20240102T120000Z\r\n' in exported
+
+
+def test_format_from_path():
+    assert TaskFileFormat.from_path('export.NDJSON') == TaskFileFormat.JSONL
+    with pytest.raises(ValueError):
+        TaskFileFormat.from_path('tasks.xlsx')
+
@@ -33,8 +33,14 @@ def test_save_tasks(dummy_tasks):
     assert os.path.exists(TaskManager.JSON_FILE)
     with open(TaskManager.JSON_FILE, 'r') as file:
         data = json.load(file)
-    expected = {str(key): task.model_dump_json() for key, task in dummy_tasks.items()}
-    assert data == expected
+    expected = {str(key): json.loads(task.model_dump_json()) for key, task in dummy_tasks.items()}
+    assert data == {'version': 2, 'tasks': expected}
+
+
+def test_read_legacy_json(dummy_tasks):
+    with open(TaskManager.JSON_FILE, 'w') as file:
+        json.dump({key: task.model_dump_json() for key, task in dummy_tasks.items()}, file)
+    assert TaskManager().tasks == dummy_tasks
 
 
 def test_read_json(dummy_tasks):